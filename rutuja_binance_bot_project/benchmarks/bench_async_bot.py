@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_async_bot.py
+Order throughput against a local stub futures server (aiohttp, simulated exchange latency).
+Compares BasicBot placing orders sequentially with AsyncBasicBot placing them concurrently
+over one pooled keep-alive session.
+Usage:
+    python benchmarks/bench_async_bot.py --orders 500 --latency-ms 20 --connection-limit 100
+"""
+
+import argparse, asyncio, os, sys, tempfile, threading, time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from binance.client import Client
+from src.basic_bot import BasicBot
+from src.async_bot import AsyncBasicBot
+from src.exchange_info import ExchangeInfoCache
+
+EXCHANGE_INFO = {"symbols": [{"symbol": "BTCUSDT", "status": "TRADING", "filters": [
+    {"filterType": "PRICE_FILTER", "minPrice": "0.10", "maxPrice": "1000000", "tickSize": "0.10"},
+    {"filterType": "LOT_SIZE", "stepSize": "0.001", "maxQty": "1000", "minQty": "0.001"},
+    {"filterType": "MIN_NOTIONAL", "notional": "5"}]}]}
+
+def start_stub_server(latency: float):
+    """Run a stub exchange in a background thread and return its base URL."""
+    ready = threading.Event()
+    state = {}
+
+    async def order(request):
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.json_response({"orderId": 1, "status": "NEW"})
+
+    async def ping(request):
+        return web.json_response({})
+
+    async def exchange_info(request):
+        return web.json_response(EXCHANGE_INFO)
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post("/fapi/v1/order", order)
+        app.router.add_get("/api/v3/ping", ping)
+        app.router.add_get("/fapi/v1/exchangeInfo", exchange_info)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        state["url"] = "http://127.0.0.1:%d" % runner.addresses[0][1]
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return state["url"]
+
+def bench_sync(url: str, orders: int):
+    class StubClient(Client):
+        API_URL = url + "/api"
+        FUTURES_URL = url + "/fapi"
+    client = StubClient("key", "secret")
+    filters = ExchangeInfoCache(client, path=os.path.join(tempfile.mkdtemp(), "exchange_info.json"))
+    bot = BasicBot("key", "secret", testnet=False, client=client, filters=filters)
+    start = time.perf_counter()
+    for i in range(orders):
+        bot.place_limit_order("BTCUSDT", "BUY", 30000 + i, 0.001)
+    return time.perf_counter() - start
+
+def bench_async(url: str, orders: int, connection_limit: int):
+    async def run():
+        async with AsyncBasicBot("key", "secret", base_url=url, connection_limit=connection_limit) as bot:
+            start = time.perf_counter()
+            await asyncio.gather(*(bot.place_limit_order("BTCUSDT", "BUY", 30000 + i, 0.001) for i in range(orders)))
+            return time.perf_counter() - start
+    return asyncio.run(run())
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--connection-limit", type=int, default=100)
+    args = parser.parse_args()
+    url = start_stub_server(args.latency_ms / 1000.0)
+    sync_s = bench_sync(url, args.orders)
+    async_s = bench_async(url, args.orders, args.connection_limit)
+    print("orders=%d latency=%.1fms" % (args.orders, args.latency_ms))
+    print("sync sequential: %.3fs  %.0f orders/s" % (sync_s, args.orders / sync_s))
+    print("async concurrent: %.3fs  %.0f orders/s (connection_limit=%d)" % (async_s, args.orders / async_s, args.connection_limit))
+
+if __name__ == "__main__":
+    main()
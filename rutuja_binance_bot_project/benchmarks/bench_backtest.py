@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_backtest.py
+Replay speed of the simulator: one year of synthetic 1-minute bars (525,600) against a resting
+grid that is re-armed on every fill.
+Usage:
+    python benchmarks/bench_backtest.py --bars 525600 --levels 41
+"""
+
+import argparse, math, os, random, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from simulator import SimulatedFuturesClient
+from backtest import Columns, run_backtest
+
+def synthetic_klines(n: int, start: float = 30000.0, seed: int = 7) -> Columns:
+    rnd = random.Random(seed)
+    t, o, h, l, c, v = [], [], [], [], [], []
+    price = start
+    for i in range(n):
+        nxt = price * math.exp(rnd.gauss(0, 0.0008))
+        wick = abs(rnd.gauss(0, 0.0004)) * price
+        t.append(i * 60000); o.append(price); c.append(nxt)
+        h.append(max(price, nxt) + wick); l.append(min(price, nxt) - wick); v.append(rnd.uniform(5, 50))
+        price = nxt
+    return Columns(open_time=t, open=o, high=h, low=l, close=c, volume=v)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bars", type=int, default=525600)
+    parser.add_argument("--levels", type=int, default=41)
+    args = parser.parse_args()
+    klines = synthetic_klines(args.bars)
+    client = SimulatedFuturesClient()
+    client.process_bar("BTCUSDT", 0, klines.open[0], klines.open[0], klines.open[0], klines.open[0])
+    lower, upper = min(klines.low), max(klines.high)
+    step = (upper - lower) / (args.levels - 1)
+
+    def rearm(event):
+        o = event["o"]
+        if o["X"] == "FILLED" and o["o"] == "LIMIT":
+            side = "SELL" if o["S"] == "BUY" else "BUY"
+            price = float(o["p"]) + (step if side == "SELL" else -step)
+            client.futures_create_order(symbol="BTCUSDT", side=side, type="LIMIT", price=price, quantity=o["q"])
+    client.subscribe(rearm)
+    for i in range(args.levels):
+        price = lower + step * i
+        if abs(price - klines.open[0]) > step / 2:
+            client.futures_create_order(symbol="BTCUSDT", side="BUY" if price < klines.open[0] else "SELL",
+                                        type="LIMIT", price=price, quantity=0.001)
+    report = run_backtest(client, "BTCUSDT", klines)
+    print("bars=%d replay=%.2fs (%.0f bars/s)" % (report["bars"], report["elapsed_seconds"], report["bars"] / report["elapsed_seconds"]))
+    print("fills=%d realized=%.2f fees=%.2f net=%.2f" % (report["fills"], report["realized_pnl"], report["fees"], report["net_pnl"]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_daemon.py
+End-to-end latency of one market order against the local stub exchange from bench_async_bot.py:
+  one-shot   a fresh process per order, like the CLIs: interpreter start, imports, Client() (ping),
+             exchange filters from the disk cache, then the order
+  thin CLI   a fresh `market_orders.py --daemon` process per order, talking to a warm daemon
+  warm       an already-connected DaemonClient (for scripts that keep a connection open)
+Usage:
+    python benchmarks/bench_daemon.py --orders 20 --latency-ms 5
+"""
+
+import argparse, os, statistics, subprocess, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+sys.path.insert(0, SRC)
+
+def one_shot(url: str, cache: str):
+    """Child process body: what market_orders.main() does, with the client pointed at the stub."""
+    from binance.client import Client
+    from utils import ScheduledClient, default_scheduler
+    from exchange_info import ExchangeInfoCache
+    import market_orders
+    class StubClient(Client):
+        API_URL = url + "/api"
+        FUTURES_URL = url + "/fapi"
+    client = ScheduledClient(StubClient("key", "secret"), default_scheduler())
+    sys.stdout = open(os.devnull, "w")
+    market_orders.place_market_order(client, "BTCUSDT", "BUY", 0.001, filters=ExchangeInfoCache(client, path=cache))
+
+def timed(cmd, cwd) -> float:
+    start = time.perf_counter()
+    out = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if out.returncode != 0:
+        raise RuntimeError(out.stdout + out.stderr)
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--one-shot", nargs=2, metavar=("URL", "CACHE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.one_shot:
+        return one_shot(*args.one_shot)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from bench_async_bot import start_stub_server
+    from binance.client import Client
+    from utils import ScheduledClient, default_scheduler
+    from exchange_info import ExchangeInfoCache
+    from daemon import BotDaemon
+    from daemon_client import DaemonClient
+
+    url = start_stub_server(args.latency_ms / 1000.0)
+    tmp = tempfile.mkdtemp()
+    cache = os.path.join(tmp, "exchange_info.json")
+    sys.stdout = open(os.devnull, "w")  # keep the JSON log lines out of the report
+
+    cold = [timed([sys.executable, os.path.abspath(__file__), "--one-shot", url, cache], tmp) for _ in range(args.orders)]
+
+    class StubClient(Client):
+        API_URL = url + "/api"
+        FUTURES_URL = url + "/fapi"
+    client = ScheduledClient(StubClient("key", "secret"), default_scheduler())
+    bot = BotDaemon(client, os.path.join(tmp, "bot.sock"), ExchangeInfoCache(client, path=cache)).start()
+    cli = [sys.executable, os.path.join(SRC, "market_orders.py"), "--symbol", "BTCUSDT", "--side", "BUY",
+           "--quantity", "0.001", "--daemon", bot.address]
+    thin = [timed(cli, tmp) for _ in range(args.orders)]
+    warm = []
+    with DaemonClient(bot.address) as conn:
+        for _ in range(args.orders):
+            start = time.perf_counter()
+            conn.request("market", symbol="BTCUSDT", side="BUY", quantity=0.001)
+            warm.append(time.perf_counter() - start)
+    bot.shutdown()
+
+    sys.stdout = sys.__stdout__
+    print("orders=%d stub latency=%.1fms (median per order)" % (args.orders, args.latency_ms))
+    for name, samples in (("one-shot CLI", cold), ("thin CLI -> daemon", thin), ("warm connection", warm)):
+        print("%-20s %8.1f ms" % (name, statistics.median(samples) * 1e3))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_grid_batch.py
+Wall-clock time to place a whole grid against a local mock client with simulated REST latency.
+Compares create_grid (one request per level) with create_grid_batch (5 levels per request, concurrent).
+Usage:
+    python benchmarks/bench_grid_batch.py --levels 200 --latency-ms 30 --workers 8
+"""
+
+import argparse, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from advanced.grid_strategy import create_grid, create_grid_batch
+
+class LatencyMockClient:
+    """Mimics futures order endpoints; every request sleeps for one simulated round-trip."""
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+    def futures_create_order(self, **kwargs):
+        self.requests += 1
+        time.sleep(self.latency)
+        return {"orderId": self.requests, "status": "NEW", **kwargs}
+    def futures_place_batch_order(self, batchOrders):
+        self.requests += 1
+        time.sleep(self.latency)
+        return [{"orderId": self.requests * 10 + k, "status": "NEW", **o} for k, o in enumerate(batchOrders)]
+
+def time_grid(fn, levels: int, latency: float, **kwargs):
+    client = LatencyMockClient(latency)
+    start = time.perf_counter()
+    fn(client, "BTCUSDT", lower=30000, upper=40000, grid_size=levels, quantity=0.001, **kwargs)
+    return time.perf_counter() - start, client.requests
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--levels", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000.0
+    seq, seq_reqs = time_grid(create_grid, args.levels, latency)
+    bat, bat_reqs = time_grid(create_grid_batch, args.levels, latency, max_workers=args.workers)
+    print("levels=%d latency=%.1fms" % (args.levels, args.latency_ms))
+    print("sequential: %.3fs (%d requests)" % (seq, seq_reqs))
+    print("batched:    %.3fs (%d requests, %d workers)  speedup x%.1f" % (bat, bat_reqs, args.workers, seq / bat))
+
+if __name__ == "__main__":
+    main()
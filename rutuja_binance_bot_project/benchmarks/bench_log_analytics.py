@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_log_analytics.py
+Throughput and memory of log_analytics over synthetic bot logs in the JsonFormatter format: per
+order a request line, the full exchange response and two user-stream updates, plus unrelated
+INFO noise. The logs are written as a rotation set (plain and gzip) in a temp directory and
+analysed twice, at 1x and 2x the size, to show that peak memory does not grow with the input.
+The baseline is json.loads on every line with no byte-level prefilter.
+Usage:
+    python benchmarks/bench_log_analytics.py --mb 200
+"""
+
+import argparse, gzip, json, os, resource, shutil, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+RESPONSE = ("{'orderId': %d, 'symbol': 'BTCUSDT', 'status': 'NEW', 'clientOrderId': 'x-Cb7ytekJ2b1c0e7a8f0c', "
+            "'price': '30000.10', 'avgPrice': '0.00', 'origQty': '0.001', 'executedQty': '0', 'cumQty': '0', "
+            "'cumQuote': '0.00000', 'timeInForce': 'GTC', 'type': 'LIMIT', 'reduceOnly': False, 'closePosition': False, "
+            "'side': 'BUY', 'positionSide': 'BOTH', 'stopPrice': '0.00', 'workingType': 'CONTRACT_PRICE', "
+            "'priceProtect': False, 'origType': 'LIMIT', 'updateTime': 1754640000123}")
+
+def _line(t_ms: int, message: str, thread: int = 1, level: str = "INFO") -> str:
+    s, ms = divmod(t_ms, 1000)
+    ts = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(s)) + ".%03d+0000" % ms
+    return json.dumps({"timestamp": ts, "level": level, "logger": "binance_bot", "thread": thread, "message": message}) + "\n"
+
+def write_logs(folder: str, mb: float) -> int:
+    """A rotation set bot.log.2.gz, bot.log.1, bot.log of about `mb` megabytes of log text in total."""
+    target = int(mb * 1e6 / 3)
+    order_id, t = 1, 1760000000000
+    for name in ("bot.log.2.gz", "bot.log.1", "bot.log"):
+        f = gzip.open(os.path.join(folder, name), "wt", compresslevel=1) if name.endswith(".gz") else open(os.path.join(folder, name), "w")
+        size = 0
+        while size < target:
+            chunk = [_line(t, "Placing LIMIT order BUY BTCUSDT qty=0.001 price=30000.10"),
+                     _line(t + 12, "Limit order response: " + RESPONSE % order_id),
+                     _line(t + 20, "Heartbeat ok; 3 subscribers, queue depth 0"),
+                     _line(t + 900, "Order update id=%d status=PARTIALLY_FILLED" % order_id, thread=2),
+                     _line(t + 1500, "Order update id=%d status=FILLED" % order_id, thread=2),
+                     _line(t + 1600, "Recorder flushed 512 rows for BTCUSDT aggTrade")]
+            f.writelines(chunk)
+            size += sum(map(len, chunk))
+            order_id += 1
+            t += 50
+        f.close()
+    return order_id - 1
+
+def _baseline(folder: str) -> float:
+    start = time.perf_counter()
+    for name in ("bot.log.2.gz", "bot.log.1", "bot.log"):
+        path = os.path.join(folder, name)
+        with (gzip.open(path, "rb") if name.endswith(".gz") else open(path, "rb")) as f:
+            for line in f:
+                json.loads(line)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=200)
+    args = parser.parse_args()
+    sys.stdout, out = open(os.devnull, "w"), sys.stdout
+    from log_analytics import analyze
+    rows = []
+    for scale in (1, 2):
+        folder = tempfile.mkdtemp()
+        try:
+            orders = write_logs(folder, args.mb * scale)
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            start = time.perf_counter()
+            report = analyze([folder])
+            elapsed = time.perf_counter() - start
+            rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+            baseline = _baseline(folder) if scale == 1 else None
+            rows.append((report["bytes"] / 1e6, report["lines"], orders, elapsed, rss_growth / 1024, baseline,
+                         report["orders"]["by_final_status"].get("FILLED", 0), report["latency_ms"]["LIMIT"]["p50"]))
+        finally:
+            shutil.rmtree(folder)
+    sys.stdout = out
+    for mb, lines, orders, elapsed, rss_mb, baseline, filled, p50 in rows:
+        print("%.0f MB (%d lines, %d orders): %.1f s, %.0f MB/s, %.0f lines/s, peak RSS +%.0f MB; %d lifecycles FILLED, p50 latency %.0f ms"
+              % (mb, lines, orders, elapsed, mb / elapsed, lines / elapsed, rss_mb, filled, p50))
+        if baseline is not None:
+            print("  baseline json.loads on every line: %.1f s (%.0f MB/s)" % (baseline, mb / baseline))
+
+if __name__ == "__main__":
+    main()
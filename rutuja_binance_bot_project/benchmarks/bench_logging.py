@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_logging.py
+Per-order logging overhead seen by the order thread: the two log lines BasicBot writes per order
+(request + full exchange response), with synchronous handlers vs enable_queued_logging().
+Stdout is redirected to /dev/null and the rotating file goes to a temp directory.
+Usage:
+    python benchmarks/bench_logging.py --orders 20000
+"""
+
+import argparse, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+RESPONSE = {
+    "orderId": 4113918231, "symbol": "BTCUSDT", "status": "NEW", "clientOrderId": "x-Cb7ytekJ2b1c0e7a8f0c",
+    "price": "30000.10", "avgPrice": "0.00", "origQty": "0.001", "executedQty": "0", "cumQty": "0",
+    "cumQuote": "0.00000", "timeInForce": "GTC", "type": "LIMIT", "reduceOnly": False, "closePosition": False,
+    "side": "BUY", "positionSide": "BOTH", "stopPrice": "0.00", "workingType": "CONTRACT_PRICE",
+    "priceProtect": False, "origType": "LIMIT", "priceMatch": "NONE", "selfTradePreventionMode": "NONE",
+    "goodTillDate": 0, "updateTime": 1754640000123,
+}
+
+def run(logger, orders: int) -> float:
+    start = time.perf_counter()
+    for i in range(orders):
+        logger.info("Placing LIMIT order %s %s qty=%s price=%s", "BUY", "BTCUSDT", "0.001", "30000.10")
+        logger.info("Limit order response: %s", RESPONSE)
+    return (time.perf_counter() - start) / orders
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=20000)
+    args = parser.parse_args()
+    sys.stdout = open(os.devnull, "w")
+    import utils
+    logger = utils.setup_logger(os.path.join(tempfile.mkdtemp(), "bench.log"))
+    sync_cost = run(logger, args.orders)
+    utils.enable_queued_logging(queue_size=args.orders * 2)
+    queued_cost = run(logger, args.orders)
+    utils.disable_queued_logging()
+    sys.stdout = sys.__stdout__
+    print("serializer: %s" % ("orjson" if utils.orjson is not None else "json"))
+    print("synchronous: %.1f us/order" % (sync_cost * 1e6))
+    print("queued:      %.1f us/order (x%.1f less on the order thread)" % (queued_cost * 1e6, sync_cost / queued_cost))
+
+if __name__ == "__main__":
+    main()
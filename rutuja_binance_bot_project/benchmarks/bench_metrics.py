@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_metrics.py
+Per-sample cost of the latency instrumentation: Histogram.record(), a reused timer, a timer
+looked up per sample (what OrderTimer.stage() does), the timed() decorator, and a full
+OrderTimer.send() around a no-op call. Empty-loop and plain-call baselines are subtracted.
+Usage:
+    python benchmarks/bench_metrics.py --samples 500000
+"""
+
+import argparse, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+def best_of(fn, n: int, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(n)
+        best = min(best, (time.perf_counter() - start) / n)
+    return best * 1e9
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--samples", type=int, default=500000)
+    args = parser.parse_args()
+    from metrics import MetricsRegistry
+    reg = MetricsRegistry()
+    hist = reg.histogram("network", "BTCUSDT", "LIMIT")
+
+    def empty(n):
+        for _ in range(n):
+            pass
+
+    def noop():
+        return None
+
+    def plain_call(n):
+        for _ in range(n):
+            noop()
+
+    def record(n):
+        for i in range(n):
+            hist.record(1000 + i)
+
+    def reused_timer(n):
+        t = reg.timer("stage", "BTCUSDT", "LIMIT")
+        for _ in range(n):
+            with t:
+                pass
+
+    def timer_per_sample(n):
+        for _ in range(n):
+            with reg.timer("stage", "BTCUSDT", "LIMIT"):
+                pass
+
+    timed_noop = reg.timed("decorated")(noop)
+
+    def decorated(n):
+        for _ in range(n):
+            timed_noop()
+
+    order = reg.order("BTCUSDT", "LIMIT")
+
+    def order_send(n):
+        for _ in range(n):
+            order.send(noop)
+
+    loop = best_of(empty, args.samples)
+    call = best_of(plain_call, args.samples)
+    print("samples=%d (ns per sample, baselines subtracted)" % args.samples)
+    print("Histogram.record      %6.0f" % (best_of(record, args.samples) - loop))
+    print("reused timer          %6.0f" % (best_of(reused_timer, args.samples) - loop))
+    print("timer per sample      %6.0f" % (best_of(timer_per_sample, args.samples) - loop))
+    print("timed() decorator     %6.0f" % (best_of(decorated, args.samples) - call))
+    print("OrderTimer.send       %6.0f  (network + exchange check)" % (best_of(order_send, args.samples) - call))
+
+if __name__ == "__main__":
+    main()
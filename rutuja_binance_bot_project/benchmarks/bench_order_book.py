@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_order_book.py
+Diff-depth throughput of the local order book: a 1000-level snapshot, then synthetic depthUpdate
+messages (random-walk mid, ~10 changed levels per side, ~20% removals) fed through
+DepthStream.on_message, with and without JSON decoding of the raw frame.
+Usage:
+    python benchmarks/bench_order_book.py --messages 100000 --levels 10
+"""
+
+import argparse, json, os, random, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from order_book import DepthStream
+
+TICK = 0.1
+
+def snapshot(mid: float, depth: int = 1000) -> dict:
+    return {"lastUpdateId": 1,
+            "bids": [["%.1f" % (mid - TICK * (i + 1)), "1.000"] for i in range(depth)],
+            "asks": [["%.1f" % (mid + TICK * (i + 1)), "1.000"] for i in range(depth)]}
+
+def messages(n: int, levels: int, mid: float, seed: int = 3):
+    rnd = random.Random(seed)
+    out, last = [], 0  # first diff starts at U=1, straddling the snapshot id
+    for _ in range(n):
+        mid += rnd.choice((-TICK, 0, TICK))
+        side = lambda sign: [["%.1f" % (mid + sign * TICK * rnd.randint(1, 200)),
+                              "0" if rnd.random() < 0.2 else "%.3f" % rnd.uniform(0.001, 5)] for _ in range(levels)]
+        first, last = last + 1, last + rnd.randint(1, 5)
+        out.append({"stream": "btcusdt@depth@100ms",
+                    "data": {"e": "depthUpdate", "E": last, "s": "BTCUSDT", "U": first, "u": last, "pu": first - 1,
+                             "b": side(-1), "a": side(1)}})
+    return out
+
+class SnapshotClient:
+    def __init__(self, snap):
+        self.snap = snap
+    def futures_order_book(self, symbol, limit):
+        return self.snap
+
+def run(msgs, raw: bool, mid: float) -> float:
+    stream = DepthStream(SnapshotClient(snapshot(mid)), ["BTCUSDT"])
+    frames = [json.dumps(m) for m in msgs] if raw else msgs
+    start = time.perf_counter()
+    if raw:
+        for frame in frames:
+            stream.on_message(json.loads(frame))
+    else:
+        for msg in frames:
+            stream.on_message(msg)
+    elapsed = time.perf_counter() - start
+    assert stream["BTCUSDT"].synced and stream.resyncs == 1
+    return len(msgs) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--levels", type=int, default=10, help="changed levels per side per message")
+    args = parser.parse_args()
+    mid = 30000.0
+    msgs = messages(args.messages, args.levels, mid)
+    print("decoded dicts:  %9.0f msg/s" % run(msgs, False, mid))
+    print("raw JSON frames: %9.0f msg/s" % run(msgs, True, mid))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_order_encoding.py
+Encoding and signing throughput for one LIMIT order:
+  - signing only: hmac.new per call vs HmacSha256's precomputed pad states;
+  - async body: urlencode + hmac.new (the old AsyncBasicBot._sign) vs OrderEncoder.sign;
+  - python-binance request building (Client._get_request_kwargs, no network) before and after
+    install_fast_signing;
+  - price strings: format_decimal (re-normalizing tickSize per call) vs SymbolFilters.format_price,
+    which formats through the symbol's cached SymbolFormat.
+Usage:
+    python benchmarks/bench_order_encoding.py --orders 200000
+"""
+
+import argparse, hashlib, hmac, os, sys, time
+from urllib.parse import urlencode
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+SECRET = "NhqPtmdSJYdKjVHjA7PZj4Mge3R5YNiP1e3UZjInClVN65XAbvqqM6A7H5fATj0j"
+
+def _params(i: int) -> dict:
+    return {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "timeInForce": "GTC", "quantity": "0.001",
+            "price": "%d.1" % (30000 + i % 500), "newClientOrderId": "grid_%d" % i, "recvWindow": 5000}
+
+def _ns(fn, n: int) -> float:
+    start = time.perf_counter_ns()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter_ns() - start) / n
+
+def _client(fast: bool):
+    from binance.client import Client
+    from order_encoding import install_fast_signing
+    client = Client.__new__(Client)                     # no __init__: it pings the API
+    client.API_SECRET, client.session, client._requests_params, client.timestamp_offset = SECRET, None, None, 0
+    return install_fast_signing(client) if fast else client
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200000)
+    args = parser.parse_args()
+    n = args.orders
+    sys.stdout, out = open(os.devnull, "w"), sys.stdout
+    from order_encoding import HmacSha256, OrderEncoder
+    from exchange_info import SymbolFilters, format_decimal
+    key = SECRET.encode()
+    signer = HmacSha256(SECRET)
+    message = urlencode(_params(0)).encode()
+    rows = [("sign, hmac.new", _ns(lambda i: hmac.new(key, message, hashlib.sha256).hexdigest(), n)),
+            ("sign, precomputed state", _ns(lambda i: signer.hexdigest(message), n))]
+
+    def old_body(i):
+        params = _params(i)
+        params["timestamp"] = 1700000000000
+        query = urlencode(params)
+        return query + "&signature=" + hmac.new(key, query.encode("utf-8"), hashlib.sha256).hexdigest()
+    encoder = OrderEncoder(SECRET)
+    assert old_body(7) == encoder.sign(_params(7), 1700000000000)
+    rows.append(("async body, urlencode + hmac.new", _ns(old_body, n)))
+    rows.append(("async body, OrderEncoder.sign", _ns(lambda i: encoder.sign(_params(i), 1700000000000), n)))
+
+    for fast in (False, True):
+        client = _client(fast)
+        build = lambda i: client._get_request_kwargs("post", True, data=_params(i))
+        rows.append(("python-binance request, %s" % ("fast signing" if fast else "stock"), _ns(build, n)))
+
+    f = SymbolFilters({"symbol": "BTCUSDT", "filters": [{"filterType": "PRICE_FILTER", "tickSize": "0.10"},
+                                                          {"filterType": "LOT_SIZE", "stepSize": "0.001"}]})
+    prices = [30000 + (i % 5000) * 0.1 for i in range(1000)]
+    rows.append(("price string, format_decimal per call", _ns(lambda i: format_decimal(f.round_price(prices[i % 1000]), f.tick_size), n)))
+    rows.append(("price string, SymbolFilters.format_price", _ns(lambda i: f.format_price(prices[i % 1000]), n)))
+    sys.stdout = out
+    for name, ns in rows:
+        print("%-45s %7.2f us/order  %9.0f orders/s" % (name, ns / 1000, 1e9 / ns))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_order_journal.py
+Journaling overhead per order: intent() before and result() after a (mock) submission, as seen by
+the order thread, plus the time until the background writer has committed everything.
+Compared with committing each row synchronously.
+Usage:
+    python benchmarks/bench_order_journal.py --orders 20000
+"""
+
+import argparse, os, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from order_journal import OrderJournal
+
+RESPONSE = {"orderId": 4113918231, "symbol": "BTCUSDT", "status": "NEW", "price": "0", "origQty": "0.001",
+            "executedQty": "0", "type": "MARKET", "side": "BUY", "updateTime": 1754640000123}
+
+def run(journal: OrderJournal, orders: int, sync: bool):
+    run_id, _ = journal.new_run("bench", {"orders": orders})
+    start = time.perf_counter()
+    for i in range(orders):
+        cid = journal.intent(run_id, i, "BTCUSDT", {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": "0.001"})
+        if sync:
+            journal.flush()
+        journal.result(cid, dict(RESPONSE, clientOrderId=cid))
+        if sync:
+            journal.flush()
+    caller = time.perf_counter() - start
+    journal.flush()
+    return caller / orders, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=20000)
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp()
+    batched = OrderJournal(os.path.join(tmp, "batched.sqlite3"))
+    per_order, total = run(batched, args.orders, sync=False)
+    print("batched:     %.1f us/order on the caller, %d orders committed in %.2fs" % (per_order * 1e6, args.orders, total))
+    sync = OrderJournal(os.path.join(tmp, "sync.sqlite3"))
+    n = min(args.orders, 2000)
+    per_order, total = run(sync, n, sync=True)
+    print("synchronous: %.1f us/order (commit per write, %d orders)" % (per_order * 1e6, n))
+
+if __name__ == "__main__":
+    main()
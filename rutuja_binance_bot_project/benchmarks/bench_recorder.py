@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_recorder.py
+Recorded-trade storage and replay: bulk write rate, bytes per event against the raw aggTrade
+JSON, and read rates for a vectorized scan over the memory-mapped chunks, Python iteration
+(per-chunk tolist) and a full SimulatedFuturesClient replay, next to load_trades() on the same
+data as CSV. Files go to a temp directory.
+Usage:
+    python benchmarks/bench_recorder.py --trades 5000000 --replay 500000
+"""
+
+import argparse, csv, json, os, shutil, sys, tempfile, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trades", type=int, default=5000000)
+    parser.add_argument("--replay", type=int, default=500000, help="trades fed through the simulator")
+    parser.add_argument("--chunk-rows", type=int, default=65536)
+    args = parser.parse_args()
+    sys.stdout, out = open(os.devnull, "w"), sys.stdout
+    import numpy as np
+    from recorder import ChunkWriter, iter_chunks, replay_trades
+    from backtest import load_trades
+    from simulator import SimulatedFuturesClient
+    n = args.trades
+    root = tempfile.mkdtemp()
+    try:
+        rng = np.random.default_rng(1)
+        cols = {"time": 1700000000000 + np.arange(n) * 3, "id": np.arange(n),
+                "price": np.round(30000 + np.cumsum(rng.normal(0, 2, n)), 1), "qty": np.round(rng.exponential(0.05, n), 3),
+                "buyer_maker": rng.random(n) < 0.5}
+        start = time.perf_counter()
+        w = ChunkWriter(os.path.join(root, "BTCUSDT", "trade"), "trade", args.chunk_rows)
+        w.extend(cols)
+        w.flush()
+        write_rate = n / (time.perf_counter() - start)
+        disk = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(root) for f in fs)
+        sample = json.dumps({"stream": "btcusdt@aggTrade", "data": {"e": "aggTrade", "E": 1700000000123, "s": "BTCUSDT",
+                             "a": 2100000000, "p": "30012.3", "q": "0.042", "f": 4100000000, "l": 4100000001,
+                             "T": 1700000000120, "m": True}})
+
+        start = time.perf_counter()
+        notional = volume = 0.0
+        for chunk in iter_chunks(root, "BTCUSDT", "trade", columns=["price", "qty"]):
+            notional += float(np.dot(chunk.price, chunk.qty))
+            volume += float(chunk.qty.sum())
+        scan_rate = n / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        count = 0
+        for chunk in iter_chunks(root, "BTCUSDT", "trade", columns=["time", "price", "qty"]):
+            for t, p, q in zip(chunk.time.tolist(), chunk.price.tolist(), chunk.qty.tolist()):
+                count += 1
+        iter_rate = count / (time.perf_counter() - start)
+
+        end_ms = int(cols["time"][min(args.replay, n) - 1]) + 1
+        client = SimulatedFuturesClient()
+        report = replay_trades(client, root, "BTCUSDT", end=end_ms)
+        replay_rate = report["trades"] / report["elapsed_seconds"]
+
+        m = min(args.replay, n)
+        csv_path = os.path.join(root, "trades.csv")
+        with open(csv_path, "w", newline="") as f:
+            wr = csv.writer(f)
+            wr.writerow(["id", "price", "qty", "quote_qty", "time", "is_buyer_maker"])
+            for i in range(m):
+                wr.writerow([i, cols["price"][i], cols["qty"][i], 0, int(cols["time"][i]), "true"])
+        start = time.perf_counter()
+        load_trades(csv_path)
+        csv_rate = m / (time.perf_counter() - start)
+    finally:
+        shutil.rmtree(root)
+    sys.stdout = out
+    print("trades=%d chunk_rows=%d" % (n, args.chunk_rows))
+    print("write (bulk)                 %12.0f trades/s" % write_rate)
+    print("bytes per trade              %12.1f  (raw aggTrade JSON: %d)" % (disk / n, len(sample)))
+    print("vectorized scan (mmap)       %12.0f trades/s  vwap=%.2f" % (scan_rate, notional / volume))
+    print("Python iteration (mmap)      %12.0f trades/s" % iter_rate)
+    print("simulator replay             %12.0f trades/s" % replay_rate)
+    print("load_trades() from CSV       %12.0f trades/s" % csv_rate)
+
+if __name__ == "__main__":
+    main()
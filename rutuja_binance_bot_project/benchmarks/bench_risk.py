@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+benchmarks/bench_risk.py
+Cost of the pre-trade check per order: RiskClient over a client that answers instantly (resting
+LIMIT orders, so the book of open orders keeps growing) against the bare client, at increasing
+numbers of open orders and symbols to show the check does not grow with either. The REST
+alternative, fetching positions before every order, is one round-trip (tens of ms) per order.
+Usage:
+    python benchmarks/bench_risk.py --orders 200000
+"""
+
+import argparse, os, sys, time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+class InstantClient:
+    def __init__(self):
+        self.orders = 0
+    def futures_create_order(self, **params):
+        self.orders += 1
+        return {"orderId": self.orders, "clientOrderId": params.get("newClientOrderId"), "status": "NEW",
+                "executedQty": "0", "avgPrice": "0"}
+
+def _per_order_ns(client, n: int, symbols: int) -> float:
+    names = ["S%dUSDT" % i for i in range(symbols)]
+    start = time.perf_counter_ns()
+    for i in range(n):
+        client.futures_create_order(symbol=names[i % symbols], side="BUY" if i & 1 else "SELL", type="LIMIT",
+                                    price="100", quantity="0.001", timeInForce="GTC")
+    return (time.perf_counter_ns() - start) / n
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200000)
+    args = parser.parse_args()
+    sys.stdout, out = open(os.devnull, "w"), sys.stdout
+    from risk import RiskEngine, RiskLimits, RiskClient
+    rows = []
+    bare = _per_order_ns(InstantClient(), args.orders, 1)
+    for symbols in (1, 100, 1000):
+        engine = RiskEngine(RiskLimits(max_position=1e9, max_order_qty=1, max_order_notional=1e6, max_open_notional=1e12,
+                                       max_price_deviation=0.5), max_gross_exposure=1e15, max_leverage=100, equity=1e13)
+        for i in range(symbols):
+            engine.set_mark("S%dUSDT" % i, 100.0)
+        client = RiskClient(InstantClient(), engine)
+        first = _per_order_ns(client, args.orders // 2, symbols)    # 0 .. n/2 open orders
+        second = _per_order_ns(client, args.orders // 2, symbols)   # n/2 .. n open orders
+        rows.append((symbols, first, second, engine.status()["open_orders"]))
+    sys.stdout = out
+    print("bare client: %.0f ns/order" % bare)
+    for symbols, first, second, open_orders in rows:
+        print("risk-checked, %4d symbols: %.0f ns/order (first half), %.0f ns/order (second half), %d open orders at the end"
+              % (symbols, first, second, open_orders))
+    print("check overhead: about %.1f us per order" % ((rows[0][2] - bare) / 1000))
+
+if __name__ == "__main__":
+    main()
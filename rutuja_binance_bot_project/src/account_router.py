@@ -0,0 +1,211 @@
+"""
+account_router.py
+Fans one logical order, or a whole strategy run, out across N accounts and M symbols from one
+process. Every account has its own client, RequestScheduler and worker pool, so an account that
+is throttled or banned only queues its own calls. Results come back per (account, symbol) with
+errors captured instead of raised, so one failing account never hides the others' fills.
+Accounts file (JSON list); keys may be given inline or as the names of environment variables, and
+"risk" takes the same limits as a risk.py config file:
+    [{"name": "sub1", "api_key_env": "SUB1_KEY", "api_secret_env": "SUB1_SECRET", "workers": 4,
+      "risk": {"default": {"max_position": 0.1}}}, ...]
+Usage:
+    router = AccountRouter.from_config("accounts.json", testnet=True)
+    results = router.place_order(["BTCUSDT", "ETHUSDT"], "BUY", {"sub1": 0.01, "sub2": 0.02})
+    summarize(results)
+"""
+
+import json, os, time, logging
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from utils import setup_logger, get_client
+from rate_limiter import RequestScheduler, ScheduledClient
+from market_orders import market_order_params
+from limit_orders import limit_order_params
+from stop_limit_orders import stop_limit_params
+from metrics import REGISTRY
+from risk import RiskEngine, RiskClient
+
+logger = setup_logger("account_router.log")
+
+class Account:
+    """
+    One key pair. The client is wrapped in a RequestScheduler of its own (order-count limits
+    are per account on Binance) and calls run on the account's own thread pool. Positions and
+    margin are per account too, so `risk` is a RiskEngine for this account alone.
+    """
+    def __init__(self, name: str, api_key: str = None, api_secret: str = None, client=None, testnet: bool = False,
+                 workers: int = 4, limits: dict = None, risk: RiskEngine = None):
+        self.name = name
+        if isinstance(client, ScheduledClient):
+            self.scheduler = client.scheduler
+        else:
+            self.scheduler = RequestScheduler(limits)
+            if client is None:
+                client = get_client(api_key, api_secret, test=testnet, scheduler=self.scheduler)
+            else:
+                client = ScheduledClient(client, self.scheduler)
+        if risk is not None:
+            client = RiskClient(client, risk)
+        self.client = client
+        self.risk = risk
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="account-%s" % name)
+        self.sent = 0
+        self.failed = 0
+
+    def close(self, wait: bool = True):
+        self.pool.shutdown(wait=wait)
+
+def _result(account: str, symbol: str, response=None, error=None, seconds=None) -> dict:
+    return {"account": account, "symbol": symbol, "response": response, "error": error, "seconds": seconds}
+
+class AccountRouter:
+    """
+    Routes work to accounts. submit() queues task(account, symbol) for every selected account
+    and symbol on that account's pool; collect() turns the jobs into one result dict per pair, in
+    account then symbol order. Callers that must not wait on a slow account consume the futures
+    themselves.
+    """
+    def __init__(self, accounts, filters=None):
+        self.accounts = {}
+        for account in accounts:
+            if account.name in self.accounts:
+                raise ValueError("duplicate account name %r" % account.name)
+            self.accounts[account.name] = account
+        if not self.accounts:
+            raise ValueError("at least one account is required")
+        # Exchange filters are public and identical for every account, so one cache is shared.
+        self.filters = filters
+
+    @classmethod
+    def from_config(cls, path: str, testnet: bool = False, filters=None) -> "AccountRouter":
+        with open(path) as f:
+            entries = json.load(f)
+        accounts = []
+        for entry in entries:
+            key = entry.get("api_key") or os.environ.get(entry.get("api_key_env", ""))
+            secret = entry.get("api_secret") or os.environ.get(entry.get("api_secret_env", ""))
+            if not key or not secret:
+                raise EnvironmentError("no API key/secret for account %r" % entry.get("name"))
+            risk = RiskEngine.from_dict(entry["risk"]) if entry.get("risk") else None
+            accounts.append(Account(entry["name"], key, secret, testnet=testnet, workers=int(entry.get("workers", 4)), risk=risk))
+            if risk is not None:
+                risk.sync(accounts[-1].client)  # start from the account's real positions and open orders
+        return cls(accounts, filters)
+
+    def _select(self, accounts):
+        names = list(self.accounts) if accounts is None else list(accounts)
+        unknown = [n for n in names if n not in self.accounts]
+        if unknown:
+            raise ValueError("unknown account(s): %s" % ", ".join(unknown))
+        return [self.accounts[n] for n in names]
+
+    def _run(self, task, account: Account, symbol: str) -> dict:
+        start = time.perf_counter()
+        try:
+            res = task(account, symbol)
+        except Exception as e:
+            # Isolation: whatever one account raises is recorded against that pair only.
+            account.failed += 1
+            logger.exception("Account %s %s failed: %s", account.name, symbol, e)
+            return _result(account.name, symbol, error=str(e), seconds=time.perf_counter() - start)
+        account.sent += 1
+        return _result(account.name, symbol, res, seconds=time.perf_counter() - start)
+
+    def submit(self, task, symbols, accounts=None) -> list:
+        """Queue task(account, symbol) for every pair without waiting; returns (account, symbol, future) jobs."""
+        return [(account.name, symbol, account.pool.submit(self._run, task, account, symbol))
+                for account in self._select(accounts) for symbol in symbols]
+
+    @staticmethod
+    def collect(jobs: list, timeout: float = None) -> list:
+        """
+        Wait for submitted jobs and return their result dicts. With `timeout`, jobs still queued
+        or in flight when it expires are reported with a timeout error; they keep running.
+        """
+        wait_futures([job[2] for job in jobs], timeout=timeout)
+        results = []
+        for name, symbol, future in jobs:
+            if future.done():
+                results.append(future.result())
+            else:
+                logger.warning("Account %s %s still pending after %ss", name, symbol, timeout)
+                results.append(_result(name, symbol, error="timed out after %ss" % timeout))
+        return results
+
+    def fan_out(self, task, symbols, accounts=None, timeout: float = None) -> list:
+        """submit() then collect()."""
+        return self.collect(self.submit(task, symbols, accounts), timeout)
+
+    def _params(self, symbol, side, quantity, order_type, price, stop_price, time_in_force) -> dict:
+        if order_type == "MARKET":
+            return market_order_params(symbol, side, quantity, self.filters)
+        if order_type == "LIMIT":
+            return limit_order_params(symbol, side, price, quantity, time_in_force, self.filters)
+        if order_type == "STOP":
+            return stop_limit_params(symbol, side, stop_price, price, quantity, self.filters)
+        raise ValueError("order_type must be MARKET, LIMIT or STOP")
+
+    def submit_order(self, symbols, side: str, quantity, order_type: str = "MARKET", price: float = None,
+                     stop_price: float = None, time_in_force: str = "GTC", accounts=None) -> list:
+        """
+        Queue one logical order for every selected account and symbol; returns submit() jobs.
+        `quantity` is either one size for every account or a {account: quantity} dict (accounts
+        missing from it are skipped). Every order is validated before anything is queued, so bad
+        input raises ValueError instead of reaching some accounts and not others.
+        """
+        order_type = order_type.upper()
+        if isinstance(quantity, dict):
+            accounts = [n for n in (accounts if accounts is not None else self.accounts) if n in quantity]
+            sizes = quantity
+        else:
+            sizes = {n: quantity for n in (accounts if accounts is not None else self.accounts)}
+        selected = self._select(accounts)
+        params = {(a.name, s): self._params(s, side, sizes[a.name], order_type, price, stop_price, time_in_force)
+                  for a in selected for s in symbols}
+        logger.info("Routing %s %s to %d account(s) x %d symbol(s)", order_type, side.upper(), len(selected), len(symbols))
+
+        def send(account, symbol):
+            p = params[(account.name, symbol)]
+            return REGISTRY.order(symbol, order_type).send(account.client.futures_create_order, **p)
+        return self.submit(send, symbols, [a.name for a in selected])
+
+    def place_order(self, symbols, side: str, quantity, order_type: str = "MARKET", price: float = None,
+                    stop_price: float = None, time_in_force: str = "GTC", accounts=None, timeout: float = None) -> list:
+        """submit_order() then collect(): one result dict per (account, symbol)."""
+        return self.collect(self.submit_order(symbols, side, quantity, order_type, price, stop_price, time_in_force,
+                                              accounts), timeout)
+
+    def run_strategy(self, strategy, symbols, accounts=None, timeout: float = None, **kwargs) -> list:
+        """
+        Run strategy(client, symbol, filters=..., **kwargs) per account and symbol, e.g.
+        execute_twap or create_grid_batch; each result's "response" is the strategy's return value.
+        """
+        return self.fan_out(lambda account, symbol: strategy(account.client, symbol, filters=self.filters, **kwargs),
+                            symbols, accounts, timeout)
+
+    def status(self) -> dict:
+        return {name: {"sent": a.sent, "failed": a.failed, "rate_limits": a.scheduler.metrics(),
+                       "risk": a.risk.status() if a.risk is not None else None}
+                for name, a in self.accounts.items()}
+
+    def close(self, wait: bool = True):
+        for account in self.accounts.values():
+            account.close(wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def summarize(results: list) -> dict:
+    """Per-account counts: {account: {"ok": n, "failed": n, "errors": {symbol: message}}}."""
+    out = {}
+    for r in results:
+        entry = out.setdefault(r["account"], {"ok": 0, "failed": 0, "errors": {}})
+        if r["error"] is None:
+            entry["ok"] += 1
+        else:
+            entry["failed"] += 1
+            entry["errors"][r["symbol"]] = r["error"]
+    return out
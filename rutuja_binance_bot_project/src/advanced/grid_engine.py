@@ -0,0 +1,241 @@
+"""
+advanced/grid_engine.py
+Live grid maintenance: keeps a grid armed by reacting to fill events instead of polling.
+Level state lives in arrays indexed by grid level, and every order carries a clientOrderId that
+maps straight back to its level, so a fill re-arms the grid in constant time: a filled BUY at
+level i places a SELL at level i + 1, a filled SELL places a BUY at level i - 1.
+Events come from UserDataStream.subscribe (live) or SimulatedFuturesClient.subscribe (backtests).
+A send that dies on a transport error may or may not have reached the exchange; its levels are
+marked UNKNOWN, never resent, and reconciled from the exchange's open orders.
+"""
+
+import itertools, threading, uuid, logging
+import numpy as np
+import requests
+from utils import setup_logger, validate_symbol
+from advanced.grid_planner import GridPlan, BUY
+from advanced.grid_strategy import BATCH_ORDER_LIMIT
+from metrics import REGISTRY
+from order_encoding import format_number
+from binance.exceptions import BinanceAPIException, BinanceOrderException, BinanceRequestException
+
+logger = setup_logger("advanced_grid_engine.log")
+
+EMPTY, OPEN, UNKNOWN = 0, 1, 2
+ORDER_ERRORS = (BinanceAPIException, BinanceOrderException, BinanceRequestException, ValueError)
+TRANSPORT_ERRORS = (requests.RequestException,)
+TERMINAL = ("FILLED", "CANCELED", "EXPIRED", "REJECTED")
+
+class GridEngine:
+    """
+    Runs one grid on one symbol. start() places the plan's active levels; handle_event() is the
+    subscriber callback. Per-level arrays: sides (1 BUY, -1 SELL), state (EMPTY/OPEN/UNKNOWN),
+    order_ids and fills; client_ids maps each live clientOrderId to its level.
+    """
+    def __init__(self, client, symbol: str, plan: GridPlan, filters=None, tag: str = None):
+        f = validate_symbol(symbol, filters)
+        self.client = client
+        self.symbol = symbol
+        self.plan = plan
+        n = len(plan)
+        if f is not None:
+            snapped = [f.snap(q, p) for p, q in zip(plan.prices.tolist(), plan.quantities.tolist())]
+            self._qty = [q for q, _ in snapped]
+            self._price = [p for _, p in snapped]
+        else:
+            self._qty = [format_number(q) for q in plan.quantities.tolist()]
+            self._price = [format_number(p) for p in plan.prices.tolist()]
+        if not np.all(plan.quantities > 0):
+            raise ValueError("every grid level needs a positive quantity")
+        self.sides = plan.sides.copy()
+        self.state = np.zeros(n, dtype=np.int8)
+        self.order_ids = np.zeros(n, dtype=np.int64)
+        self.fills = np.zeros(n, dtype=np.int64)
+        self.level_client_ids = [None] * n
+        self.client_ids = {}
+        self.tag = tag or uuid.uuid4().hex[:8]
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self.rearmed = 0
+        self.errors = 0
+        self.running = False
+
+    def _client_id(self, level: int) -> str:
+        # Binance limits newClientOrderId to 36 characters.
+        return "grid-%s-%d-%d" % (self.tag, level, next(self._seq))
+
+    def _claim(self, level: int, side: int) -> dict:
+        # Caller holds self._lock. Registers the level before the order is sent so a fill
+        # reported while the REST call is in flight still finds it.
+        cid = self._client_id(level)
+        self.sides[level] = side
+        self.state[level] = OPEN
+        self.level_client_ids[level] = cid
+        self.client_ids[cid] = level
+        return {"symbol": self.symbol, "side": "BUY" if side == BUY else "SELL", "type": "LIMIT",
+                "price": self._price[level], "quantity": self._qty[level], "timeInForce": "GTC",
+                "newClientOrderId": cid}
+
+    def _release(self, level: int, cid: str):
+        # Caller holds self._lock.
+        self.client_ids.pop(cid, None)
+        if self.level_client_ids[level] == cid:
+            self.level_client_ids[level] = None
+            self.state[level] = EMPTY
+            self.order_ids[level] = 0
+
+    def _placed(self, level: int, cid: str, res, error=None):
+        with self._lock:
+            if error is not None:
+                self.errors += 1
+                self._release(level, cid)
+            elif self.level_client_ids[level] == cid and isinstance(res, dict):
+                self.state[level] = OPEN
+                self.order_ids[level] = int(res.get("orderId") or 0)
+
+    def _unknown(self, level: int, cid: str):
+        # The level keeps its clientOrderId so a fill event or _reconcile() can still settle it.
+        with self._lock:
+            if self.level_client_ids[level] == cid:
+                self.state[level] = UNKNOWN
+
+    def _reconcile(self):
+        """Settle UNKNOWN levels: open orders become OPEN, terminal ones are replayed, missing ones freed."""
+        with self._lock:
+            pending = [(cid, level) for cid, level in self.client_ids.items() if self.state[level] == UNKNOWN]
+        if not pending:
+            return
+        try:
+            live = {o.get("clientOrderId"): o for o in self.client.futures_get_open_orders(symbol=self.symbol)}
+        except ORDER_ERRORS + TRANSPORT_ERRORS as e:
+            logger.warning("Could not reconcile %d grid levels; retrying on the next resync: %s", len(pending), e)
+            return
+        for cid, level in pending:
+            order = live.get(cid)
+            if order is None:
+                try:
+                    order = self.client.futures_get_order(symbol=self.symbol, origClientOrderId=cid)
+                except ORDER_ERRORS as e:
+                    if getattr(e, "code", None) != -2013:  # anything but "Order does not exist"
+                        logger.warning("Could not reconcile grid order %s: %s", cid, e)
+                        continue
+                    logger.warning("Grid level %d order %s never reached the exchange", level, cid)
+                    self._placed(level, cid, None, str(e))
+                    continue
+                except TRANSPORT_ERRORS as e:
+                    logger.warning("Could not reconcile grid order %s: %s", cid, e)
+                    continue
+            if order.get("status") in TERMINAL:
+                self.on_order_update({"c": cid, "X": order["status"], "i": order.get("orderId")})
+            else:
+                self._placed(level, cid, order)
+
+    def start(self):
+        """Place every active level of the plan through the batch-orders endpoint."""
+        with self._lock:
+            self.running = True
+            levels = np.flatnonzero(self.plan.sides).tolist()
+            orders = [(level, self._claim(level, int(self.plan.sides[level]))) for level in levels]
+        logger.info("Starting grid engine %s on %s with %d orders", self.tag, self.symbol, len(orders))
+        for k in range(0, len(orders), BATCH_ORDER_LIMIT):
+            batch = orders[k:k + BATCH_ORDER_LIMIT]
+            try:
+                responses = self.client.futures_place_batch_order(batchOrders=[o for _, o in batch])
+            except ORDER_ERRORS as e:
+                logger.exception("Grid engine batch failed: %s", e)
+                responses = [{"code": -1, "msg": str(e)}] * len(batch)
+            except TRANSPORT_ERRORS as e:
+                logger.exception("Grid engine batch may or may not have been placed: %s", e)
+                for level, order in batch:
+                    self._unknown(level, order["newClientOrderId"])
+                continue
+            for (level, order), res in zip(batch, responses):
+                rejected = not isinstance(res, dict) or "code" in res
+                if rejected:
+                    logger.error("Grid level %d at %s rejected: %s", level, order["price"], res)
+                self._placed(level, order["newClientOrderId"], res, res if rejected else None)
+        self._reconcile()
+        return self
+
+    def handle_event(self, event: dict):
+        """Subscriber callback for ORDER_TRADE_UPDATE events."""
+        if event.get("e") == "ORDER_TRADE_UPDATE":
+            self.on_order_update(event.get("o", {}))
+
+    def on_order_update(self, order: dict):
+        status = order.get("X")
+        if status not in TERMINAL:
+            return
+        cid = order.get("c")
+        with self._lock:
+            level = self.client_ids.get(cid)
+            if level is None:
+                return
+            side = int(self.sides[level])
+            self._release(level, cid)
+            if status != "FILLED":
+                if self.running:
+                    logger.warning("Grid level %d order %s %s; level left empty", level, cid, status)
+                return
+            self.fills[level] += 1
+            target = level + 1 if side == BUY else level - 1
+            if not self.running or not 0 <= target < len(self.state):
+                return
+            if self.state[target] != EMPTY:
+                logger.warning("Grid level %d filled but level %d is still occupied; not re-arming", level, target)
+                return
+            params = self._claim(target, -side)
+            self.rearmed += 1
+        logger.info("Grid level %d %s filled at %s; re-arming %s at level %d", level,
+                    "BUY" if side == BUY else "SELL", self._price[level], params["side"], target)
+        try:
+            res = REGISTRY.order(self.symbol, "LIMIT").send(self.client.futures_create_order, **params)
+        except ORDER_ERRORS as e:
+            logger.exception("Re-arming grid level %d failed: %s", target, e)
+            self._placed(target, params["newClientOrderId"], None, str(e))
+            return
+        except TRANSPORT_ERRORS as e:
+            logger.exception("Re-arming grid level %d may or may not have been placed: %s", target, e)
+            self._unknown(target, params["newClientOrderId"])
+            self._reconcile()
+            return
+        self._placed(target, params["newClientOrderId"], res)
+
+    def resync(self):
+        """Re-read open levels over REST (after a stream reconnect) and replay missed terminal states."""
+        self._reconcile()
+        with self._lock:
+            live = [cid for cid, level in self.client_ids.items() if self.state[level] == OPEN]
+        for cid in live:
+            try:
+                order = self.client.futures_get_order(symbol=self.symbol, origClientOrderId=cid)
+            except (BinanceAPIException, BinanceRequestException) + TRANSPORT_ERRORS as e:
+                logger.exception("Resync of grid order %s failed: %s", cid, e)
+                continue
+            if order.get("status") in TERMINAL:
+                self.on_order_update({"c": cid, "X": order["status"], "i": order.get("orderId")})
+
+    def attach(self, source):
+        """Subscribe to a UserDataStream or SimulatedFuturesClient and return self."""
+        source.subscribe(self.handle_event, on_resync=self.resync)
+        return self
+
+    def stop(self, cancel_orders: bool = True):
+        """Stop re-arming; optionally cancel every open level."""
+        with self._lock:
+            self.running = False
+            live = list(self.client_ids)
+        if cancel_orders:
+            for cid in live:
+                try:
+                    self.client.futures_cancel_order(symbol=self.symbol, origClientOrderId=cid)
+                except ORDER_ERRORS + TRANSPORT_ERRORS as e:
+                    logger.warning("Could not cancel grid order %s: %s", cid, e)
+        logger.info("Grid engine %s stopped: %d fills, %d re-armed, %d errors",
+                    self.tag, int(self.fills.sum()), self.rearmed, self.errors)
+
+    def open_levels(self) -> list:
+        """(level, side, price) for every live order, lowest level first."""
+        with self._lock:
+            return [(i, "BUY" if self.sides[i] == BUY else "SELL", self._price[i])
+                    for i in np.flatnonzero(self.state == OPEN).tolist()]
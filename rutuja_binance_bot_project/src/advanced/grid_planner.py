@@ -0,0 +1,131 @@
+"""
+advanced/grid_planner.py
+Vectorized grid-level computation with NumPy.
+plan_grid() computes arithmetic or geometric levels, tick-rounded prices, per-level sizes and
+BUY/SELL sides relative to the mark price in one pass. recenter() moves a plan to a new mark
+price and returns the minimal set of orders to cancel and place instead of a full resubmit.
+"""
+
+import numpy as np
+
+BUY, SELL, IDLE = 1, -1, 0
+
+class GridPlan:
+    """
+    Arrays describing one grid: prices (float64, tick-rounded), ticks (int64 price in tick units),
+    sides (int8: 1 BUY, -1 SELL, 0 no order) and quantities (float64). The sizing arguments
+    (quantity or notional, step_size) are kept so recenter() can size new levels the same way.
+    """
+    def __init__(self, prices, ticks, sides, quantities, mark_price, mode, tick_size, lower, upper,
+                 quantity=None, notional=None, step_size=None):
+        self.prices = prices
+        self.ticks = ticks
+        self.sides = sides
+        self.quantities = quantities
+        self.mark_price = mark_price
+        self.mode = mode
+        self.tick_size = tick_size
+        self.lower = lower
+        self.upper = upper
+        self.quantity = quantity
+        self.notional = notional
+        self.step_size = step_size
+
+    def __len__(self):
+        return len(self.prices)
+
+    def keys(self):
+        """One int64 per level identifying (price, side), used to diff plans."""
+        return self.ticks * 4 + (self.sides + 1)
+
+    def orders(self, indices=None):
+        """(index, "BUY"/"SELL", price, quantity) for every active level, or only `indices`."""
+        idx = np.flatnonzero(self.sides) if indices is None else np.asarray(indices)
+        sides = np.where(self.sides[idx] > 0, "BUY", "SELL")
+        return list(zip(idx.tolist(), sides.tolist(), self.prices[idx].tolist(), self.quantities[idx].tolist()))
+
+class GridDiff:
+    """Levels of the old plan to cancel and levels of the new plan to place; the rest stay live."""
+    def __init__(self, cancel, place, keep):
+        self.cancel = cancel
+        self.place = place
+        self.keep = keep
+
+def _levels(lower: float, upper: float, levels: int, mode: str):
+    if lower >= upper:
+        raise ValueError("lower must be less than upper")
+    if levels < 2:
+        raise ValueError("grid_size must be at least 2")
+    if mode == "arithmetic":
+        return np.linspace(lower, upper, levels)
+    if mode == "geometric":
+        if lower <= 0:
+            raise ValueError("geometric grids need a positive lower bound")
+        return np.geomspace(lower, upper, levels)
+    raise ValueError("mode must be 'arithmetic' or 'geometric'")
+
+def plan_grid(lower: float, upper: float, levels: int, mode: str = "arithmetic", mark_price: float = None,
+              quantity: float = None, notional: float = None, tick_size: float = None, step_size: float = None) -> GridPlan:
+    """
+    Build a grid between `lower` and `upper`. Size each level with a fixed `quantity` or a quote
+    `notional` (quantity = notional / price, floored to `step_size`). Levels below the mark are
+    BUY, above are SELL, and a level sitting on the mark (same tick) gets no order. Without a mark
+    price the lower half of the levels is BUY and the upper half SELL.
+    """
+    if (quantity is None) == (notional is None):
+        raise ValueError("give exactly one of quantity or notional")
+    raw = _levels(float(lower), float(upper), int(levels), mode)
+    tick = float(tick_size) if tick_size else None
+    if tick:
+        ticks = np.rint(raw / tick).astype(np.int64)
+        prices = ticks * tick
+    else:
+        prices = raw
+        ticks = np.rint(raw * 1e8).astype(np.int64)
+    if notional is not None:
+        qty = float(notional) / prices
+    else:
+        qty = np.full(len(prices), float(quantity))
+    if step_size:
+        step = float(step_size)
+        qty = np.floor(qty / step + 1e-9) * step
+    if mark_price is None:
+        sides = np.where(np.arange(len(prices)) < len(prices) // 2, BUY, SELL).astype(np.int8)
+    else:
+        mark_ticks = int(round(float(mark_price) / tick)) if tick else int(round(float(mark_price) * 1e8))
+        sides = np.sign(mark_ticks - ticks).astype(np.int8)
+    return GridPlan(prices, ticks, sides, qty, mark_price, mode, tick, float(lower), float(upper),
+                    quantity, notional, step_size)
+
+def diff_plans(old: GridPlan, new: GridPlan) -> GridDiff:
+    """Orders that exist in both plans at the same price and side are kept; everything else changes."""
+    old_keys = np.where(old.sides != 0, old.keys(), -1)
+    new_keys = np.where(new.sides != 0, new.keys(), -2)
+    keep_old = np.isin(old_keys, new_keys)
+    keep_new = np.isin(new_keys, old_keys)
+    cancel = np.flatnonzero((old.sides != 0) & ~keep_old)
+    place = np.flatnonzero((new.sides != 0) & ~keep_new)
+    return GridDiff(cancel, place, np.flatnonzero(keep_new))
+
+def recenter(plan: GridPlan, mark_price: float, shift_bounds: bool = True):
+    """
+    Re-plan around a new mark price. With shift_bounds the range moves by the whole number of
+    grid steps the price has travelled (a constant spacing for arithmetic grids, a constant ratio
+    for geometric ones), so levels that overlap the old range keep the same price; otherwise only
+    sides are reassigned. New levels are sized with the plan's own quantity or notional and
+    step_size. Returns (new_plan, GridDiff against `plan`).
+    """
+    lower, upper = plan.lower, plan.upper
+    if shift_bounds and plan.mark_price is not None:
+        n = len(plan) - 1
+        if plan.mode == "geometric":
+            ratio = (upper / lower) ** (1.0 / n)
+            steps = int(round(np.log(float(mark_price) / float(plan.mark_price)) / np.log(ratio)))
+            lower, upper = lower * ratio ** steps, upper * ratio ** steps
+        else:
+            spacing = (upper - lower) / n
+            steps = int(round((float(mark_price) - float(plan.mark_price)) / spacing))
+            lower, upper = lower + steps * spacing, upper + steps * spacing
+    new = plan_grid(lower, upper, len(plan), plan.mode, mark_price, quantity=plan.quantity, notional=plan.notional,
+                    tick_size=plan.tick_size, step_size=plan.step_size)
+    return new, diff_plans(plan, new)
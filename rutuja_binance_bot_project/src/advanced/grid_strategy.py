@@ -1,32 +1,136 @@
 """
 advanced/grid_strategy.py
 Grid trading strategy: places a series of limit buy and sell orders between a price range.
-This is a basic example — production needs risk checks, position sizing, and concurrency safety.
+Pre-trade limits come from wrapping the client in risk.RiskClient; a refused level counts as a
+failed order (RiskRejected is a ValueError).
+
+create_grid places levels one REST call at a time; create_grid_batch packs them into the
+futures batch-orders endpoint (up to 5 orders per request) and sends the batches concurrently.
+Levels come from advanced/grid_planner.py (arithmetic or geometric spacing); pass mark_price to
+put BUYs below and SELLs above the current price instead of splitting the range by index.
 """
 
 import logging, math
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from utils import setup_logger, validate_symbol
-from binance.exceptions import BinanceAPIException
+from advanced.grid_planner import plan_grid
+from metrics import REGISTRY
+from order_encoding import format_number
+from binance.exceptions import BinanceAPIException, BinanceRequestException
 
 logger = setup_logger("advanced_grid.log")
 
-def create_grid(client, symbol: str, lower: float, upper: float, grid_size: int, quantity: float, test=False):
-    validate_symbol(symbol)
-    if lower >= upper:
-        raise ValueError("lower must be less than upper")
-    if grid_size < 2:
-        raise ValueError("grid_size must be at least 2")
-    step = (upper - lower) / (grid_size - 1)
+# Binance USDT-M futures accepts at most 5 orders per batchOrders request.
+BATCH_ORDER_LIMIT = 5
+
+# -1007: "Timeout waiting for response from backend server. Send status unknown; execution status
+# unknown." The orders may be live, so they are not resubmitted.
+UNKNOWN_STATUS_CODES = (-1007,)
+
+def _grid_levels(lower: float, upper: float, grid_size: int, mode: str = "arithmetic", mark_price: float = None, f=None):
+    plan = plan_grid(lower, upper, grid_size, mode, mark_price, quantity=0.0, tick_size=f.tick_size if f is not None else None)
+    step = (upper - lower) / (grid_size - 1) if mode == "arithmetic" else (upper / lower) ** (1.0 / (grid_size - 1))
+    return step, [(i, price, side) for i, side, price, _ in plan.orders()]
+
+def _snap_levels(levels, quantity, f):
+    """Snap level prices to tickSize and the quantity to stepSize when symbol filters are known."""
+    if f is None:
+        return [(i, format_number(price), side) for i, price, side in levels], quantity
+    snapped = [(i, f.snap(quantity, price)[1], side) for i, price, side in levels]
+    return snapped, f.snap(quantity, snapped[0][1])[0]
+
+def create_grid(client, symbol: str, lower: float, upper: float, grid_size: int, quantity: float, test=False, filters=None,
+                mode: str = "arithmetic", mark_price: float = None):
+    f = validate_symbol(symbol, filters)
+    step, levels = _grid_levels(lower, upper, grid_size, mode, mark_price, f)
+    levels, quantity = _snap_levels(levels, quantity, f)
     orders = []
+    timer = REGISTRY.order(symbol, "LIMIT")
     logger.info("Creating grid for %s between %s and %s steps=%s qty=%s", symbol, lower, upper, step, quantity)
-    for i in range(grid_size):
-        price = lower + step * i
-        side = "BUY" if i < grid_size//2 else "SELL"
+    for i, price, side in levels:
         try:
             logger.info("Placing %s at %s", side, price)
-            res = client.futures_create_order(symbol=symbol, side=side, type="LIMIT", price=str(price), timeInForce="GTC", quantity=quantity) if not test else {"test":"grid_%d"%i, "price":price, "side":side}
+            res = timer.send(client.futures_create_order, symbol=symbol, side=side, type="LIMIT", price=price, timeInForce="GTC", quantity=quantity) if not test else {"test":"grid_%d"%i, "price":price, "side":side}
             orders.append(res)
-        except BinanceAPIException as e:
+        except (BinanceAPIException, ValueError) as e:
             logger.exception("Error placing grid order at %s: %s", price, e)
     logger.info("Grid created with %d orders", len(orders))
     return orders
+
+def _submit_batch(client, symbol: str, batch, quantity: float, test: bool):
+    """Send one batchOrders request and return (index, response, error, retry) for every level in it.
+
+    The exchange answers with a list aligned to the submitted orders, where rejected entries
+    carry ``code``/``msg`` instead of an order; a failure of the whole request marks every level.
+    A transport error (connection drop, timeout) or an UNKNOWN_STATUS_CODES answer leaves it unknown
+    whether the orders reached the exchange, so those levels are reported with retry=False.
+    """
+    if test:
+        return [(i, {"test": "grid_%d" % i, "price": price, "side": side}, None, False) for i, price, side in batch]
+    orders = [{"symbol": symbol, "side": side, "type": "LIMIT", "price": price,
+               "timeInForce": "GTC", "quantity": format_number(quantity)} for _, price, side in batch]
+    try:
+        responses = REGISTRY.order(symbol, "BATCH").send(client.futures_place_batch_order, batchOrders=orders)
+    except (BinanceAPIException, BinanceRequestException) as e:
+        unknown = getattr(e, "code", None) in UNKNOWN_STATUS_CODES
+        logger.exception("Batch of %d grid orders %s: %s", len(batch), "has unknown status" if unknown else "failed", e)
+        return [(i, None, str(e), not unknown) for i, _, _ in batch]
+    except requests.RequestException as e:
+        logger.exception("Batch of %d grid orders may or may not have been placed: %s", len(batch), e)
+        return [(i, None, str(e), False) for i, _, _ in batch]
+    results = []
+    for pos, (i, price, _) in enumerate(batch):
+        res = responses[pos] if pos < len(responses) else None
+        if not isinstance(res, dict) or "code" in res:
+            logger.error("Grid order %d at %s rejected: %s", i, price, res)
+            retry = isinstance(res, dict) and res.get("code") not in UNKNOWN_STATUS_CODES
+            results.append((i, None, res.get("msg") if isinstance(res, dict) else "missing response", retry))
+        else:
+            results.append((i, res, None, False))
+    return results
+
+def create_grid_batch(client, symbol: str, lower: float, upper: float, grid_size: int, quantity: float,
+                      batch_size: int = BATCH_ORDER_LIMIT, max_workers: int = 4, max_retries: int = 2, test=False, filters=None,
+                      mode: str = "arithmetic", mark_price: float = None):
+    """
+    Same grid as create_grid, submitted through client.futures_place_batch_order.
+    Levels are packed into batches of `batch_size` (max 5) and the batches run on a pool of
+    `max_workers` threads. Returns one dict per level, ordered by grid index:
+    {"index", "price", "side", "response", "error", "attempts"}.
+    Only levels that failed are resubmitted, up to `max_retries` extra rounds. Levels whose batch
+    hit a transport error (requests.ConnectionError, Timeout) are reported as failed but never
+    resubmitted, since the exchange may already have placed them; the same goes for -1007 (send
+    status unknown) answers.
+    Prices in the results are the strings sent to the exchange. A level that sits on mark_price
+    gets no order and is left out of the results.
+    """
+    f = validate_symbol(symbol, filters)
+    if not 1 <= batch_size <= BATCH_ORDER_LIMIT:
+        raise ValueError("batch_size must be between 1 and %d" % BATCH_ORDER_LIMIT)
+    step, levels = _grid_levels(lower, upper, grid_size, mode, mark_price, f)
+    levels, quantity = _snap_levels(levels, quantity, f)
+    logger.info("Creating batched grid for %s between %s and %s steps=%s qty=%s batch=%s workers=%s",
+                symbol, lower, upper, step, quantity, batch_size, max_workers)
+    results = {i: {"index": i, "price": price, "side": side, "response": None, "error": None, "attempts": 0}
+               for i, price, side in levels}
+    pending = levels
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for attempt in range(max_retries + 1):
+            if not pending:
+                break
+            if attempt:
+                logger.info("Retrying %d failed grid levels (attempt %d)", len(pending), attempt + 1)
+            batches = [pending[k:k + batch_size] for k in range(0, len(pending), batch_size)]
+            failed = []
+            for batch_results in pool.map(lambda b: _submit_batch(client, symbol, b, quantity, test), batches):
+                for i, res, err, retry in batch_results:
+                    entry = results[i]
+                    entry["attempts"] += 1
+                    entry["response"], entry["error"] = res, err
+                    if retry:
+                        failed.append((i, entry["price"], entry["side"]))
+            pending = failed
+    ordered = [results[i] for i, _, _ in levels]
+    logger.info("Batched grid created: %d/%d levels placed", sum(r["error"] is None for r in ordered), len(ordered))
+    return ordered
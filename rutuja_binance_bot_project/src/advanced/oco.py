@@ -6,26 +6,63 @@ OCO-like pattern for Futures (take-profit + stop-loss). Futures API doesn't supp
 import time, logging
 from binance.exceptions import BinanceAPIException, BinanceOrderException
 
-from utils import setup_logger
+from utils import setup_logger, validate_symbol
+from order_journal import MISSING, client_order_id
+from metrics import REGISTRY
+from order_encoding import format_number
 
 logger = setup_logger("advanced_oco.log")
 
-def place_oco(client, symbol, side, quantity, tp_price, sl_price, test=False):
+def _send_leg(client, journal, run_id, slot, settled, params, test, placeholder):
+    if settled.get(slot, MISSING) != MISSING:
+        logger.info("OCO leg %d of run %s already %s; not resending", slot, run_id, settled[slot])
+        return journal.response(client_order_id(run_id, slot))
+    cid = journal.intent(run_id, slot, params["symbol"], params) if journal is not None else None
+    try:
+        res = REGISTRY.order(params["symbol"], params["type"]).send(client.futures_create_order, **params) if test==False else placeholder
+    except (BinanceAPIException, BinanceOrderException, ValueError) as e:
+        if cid is not None:
+            journal.result(cid, error=str(e))
+        raise
+    if cid is not None:
+        journal.result(cid, res)
+    return res
+
+def place_oco(client, symbol, side, quantity, tp_price, sl_price, test=False, filters=None, journal=None, run_id=None):
+    """
+    With an OrderJournal both legs are journaled (slots 0 = TP, 1 = SL). A run_id already in the
+    journal is reconciled with the exchange first, so calling again with the id of an interrupted run only
+    places the leg that is missing.
+    """
     side = side.upper()
     if side not in ("BUY", "SELL"):
         raise ValueError("side must be BUY or SELL")
+    if filters is not None:
+        f = validate_symbol(symbol, filters)
+        quantity, _ = f.snap(quantity, market=True)
+        tp_price, sl_price = f.format_price(tp_price), f.format_price(sl_price)
+    settled = {}
+    if journal is not None:
+        run_id, created = journal.new_run("oco", {"symbol": symbol, "side": side, "quantity": str(quantity),
+                                                  "tp_price": str(tp_price), "sl_price": str(sl_price)}, run_id)
+        if not created and not test:
+            settled = journal.reconcile(client, run_id, symbol, (0, 1))
     # Primary fill: market/limit entry should be placed before calling this function.
     # Here we place TP and SL orders.
     try:
         # Take Profit (limit) as reduceOnly
         tp_side = "SELL" if side == "BUY" else "BUY"
         logger.info("Placing TP order %s %s @%s", tp_side, quantity, tp_price)
-        tp = client.futures_create_order(symbol=symbol, side=tp_side, type="TAKE_PROFIT_MARKET", stopPrice=str(tp_price), closePosition=False, quantity=quantity) if test==False else {"test":"tp"}
+        tp = _send_leg(client, journal, run_id, 0, settled, {"symbol": symbol, "side": tp_side, "type": "TAKE_PROFIT_MARKET",
+                       "stopPrice": format_number(tp_price), "closePosition": False, "quantity": quantity}, test, {"test":"tp"})
         # Stop Loss (stop-market)
         logger.info("Placing SL order %s %s @%s", tp_side, quantity, sl_price)
-        sl = client.futures_create_order(symbol=symbol, side=tp_side, type="STOP_MARKET", stopPrice=str(sl_price), closePosition=False, quantity=quantity) if test==False else {"test":"sl"}
+        sl = _send_leg(client, journal, run_id, 1, settled, {"symbol": symbol, "side": tp_side, "type": "STOP_MARKET",
+                       "stopPrice": format_number(sl_price), "closePosition": False, "quantity": quantity}, test, {"test":"sl"})
         logger.info("TP response: %s", tp)
         logger.info("SL response: %s", sl)
+        if journal is not None:
+            journal.finish_run(run_id)
         return {"tp":tp, "sl":sl}
     except (BinanceAPIException, BinanceOrderException) as e:
         logger.exception("Error placing OCO pair: %s", e)
@@ -1,69 +1,231 @@
 """
 advanced/oco_listener.py
 Websocket listener to watch orders and automatically cancel the OCO counterpart when one side fills.
-This uses python-binance's websocket; example uses threading and user data stream.
-Note: You must provide API key/secret and keep the listenKey alive (via keepalive endpoint).
+One UserDataStream connection serves every active OCO pair: ORDER_TRADE_UPDATE events are
+dispatched through an orderId -> handler dict, the listenKey is kept alive on a timer, and the
+connection is re-established with exponential backoff. After a reconnect the watched orders are
+re-read over REST so fills that happened while disconnected are not missed.
 """
 
-import time, threading, logging
+import json, time, threading, logging
 from binance.client import Client
-from binance.exceptions import BinanceAPIException
-from binance.streams import ThreadedWebsocketManager
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect as ws_connect
 
 from utils import setup_logger
+from metrics import REGISTRY
 
 logger = setup_logger("advanced_oco_listener.log")
 
-def start_oco_listener(client: Client, symbol: str, tp_order_id: int, sl_order_id: int):
+FUTURES_STREAM_URL = "wss://fstream.binance.com/ws/"
+FUTURES_TESTNET_STREAM_URL = "wss://stream.binancefuture.com/ws/"
+
+# The listenKey expires after 60 minutes without a keepalive.
+KEEPALIVE_SECONDS = 30 * 60
+TERMINAL_STATUSES = ("FILLED", "CANCELED", "REJECTED", "EXPIRED")
+
+class OcoPair:
+    def __init__(self, symbol: str, tp_order_id: int, sl_order_id: int):
+        self.symbol = symbol
+        self.tp_order_id = tp_order_id
+        self.sl_order_id = sl_order_id
+        self.done = threading.Event()
+        self.triggered_by = None
+
+class UserDataStream:
     """
-    Start a websocket listener for order updates. When either tp or sl order is filled (status == 'FILLED' or 'CANCELED' by reduce), cancel the other.
-    This is a lightweight implementation — for production use a resilient reconnection and listenKey keepalive is needed.
+    Shared futures user-data stream. Call watch() to route updates for one orderId to a handler,
+    or add_oco() to register a TP/SL pair. Handlers receive the raw order dict ("o" of the event).
+    `connect` defaults to websockets' sync client and can be replaced by a local stand-in in tests.
     """
-    twm = ThreadedWebsocketManager(api_key=client.API_KEY, api_secret=client.API_SECRET)
-    twm.start()
-    def handle_message(msg):
-        # msg is a dict; check for ORDER_TRADE_UPDATE or ORDER_UPDATE depending on stream
+    def __init__(self, client: Client, stream_url: str = FUTURES_STREAM_URL, connect=ws_connect,
+                 keepalive_seconds: float = KEEPALIVE_SECONDS, backoff_initial: float = 1.0, backoff_max: float = 60.0):
+        self.client = client
+        self.stream_url = stream_url
+        self._connect = connect
+        self.keepalive_seconds = keepalive_seconds
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self._index = {}  # orderId -> (symbol, handler)
+        self._subscribers = []  # (handler, on_resync) receiving every ORDER_TRADE_UPDATE event
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._ws = None
+        self.listen_key = None
+        self.connections = 0
+
+    def watch(self, order_id: int, symbol: str, handler):
+        with self._lock:
+            self._index[int(order_id)] = (symbol, handler)
+
+    def unwatch(self, order_id: int):
+        with self._lock:
+            self._index.pop(int(order_id), None)
+
+    def subscribe(self, handler, on_resync=None):
+        """
+        Call handler(event) for every ORDER_TRADE_UPDATE, whatever the orderId (the same shape
+        SimulatedFuturesClient.subscribe delivers). `on_resync()` runs after each reconnect so
+        the subscriber can re-read its own orders.
+        """
+        with self._lock:
+            self._subscribers.append((handler, on_resync))
+
+    def unsubscribe(self, handler):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[0] is not handler]
+
+    def add_oco(self, symbol: str, tp_order_id: int, sl_order_id: int) -> OcoPair:
+        pair = OcoPair(symbol, int(tp_order_id), int(sl_order_id))
+        def handler(order):
+            self._on_oco_update(pair, order)
+        self.watch(pair.tp_order_id, symbol, handler)
+        self.watch(pair.sl_order_id, symbol, handler)
+        logger.info("Watching OCO pair %s tp=%s sl=%s", symbol, tp_order_id, sl_order_id)
+        return pair
+
+    def _on_oco_update(self, pair: OcoPair, order: dict):
+        order_id = int(order.get("i") or order.get("orderId") or 0)
+        status = order.get("X") or order.get("status")
+        if status not in TERMINAL_STATUSES or pair.done.is_set():
+            return
+        other = pair.sl_order_id if order_id == pair.tp_order_id else pair.tp_order_id
+        pair.triggered_by = order_id
+        self.unwatch(pair.tp_order_id)
+        self.unwatch(pair.sl_order_id)
         try:
-            logger.info("WS message: %s", msg)
-            event_type = msg.get("e") or msg.get("eventType") or msg.get("e", "")
-            # different websocket formats exist; normalize
-            order = None
-            if msg.get("e") == "ORDER_TRADE_UPDATE":
-                order = msg.get("o", {})
-            elif msg.get("e") == "ORDER_UPDATE":
-                order = msg.get("o", {})
-            elif "order" in msg:
-                order = msg.get("order")
-            if not order:
-                return
-            order_id = int(order.get("i") or order.get("orderId") or 0)
-            status = order.get("X") or order.get("status")
-            logger.info("Order update id=%s status=%s", order_id, status)
-            if order_id == tp_order_id and status in ("FILLED", "CANCELED", "REJECTED"):
-                # cancel SL
+            logger.info("Order %s %s — cancelling counterpart %s", order_id, status, other)
+            REGISTRY.order(pair.symbol, "CANCEL").send(self.client.futures_cancel_order, symbol=pair.symbol, orderId=other)
+        except BinanceAPIException as e:
+            logger.exception("Error cancelling OCO counterpart %s: %s", other, e)
+        pair.done.set()
+
+    def _dispatch(self, msg: dict):
+        event = msg.get("e")
+        if event == "ORDER_TRADE_UPDATE":
+            order = msg.get("o", {})
+            if msg.get("E"):
+                REGISTRY.record_since_ms("stream", msg["E"], order.get("s", ""), order.get("o", ""))
+            with self._lock:
+                entry = self._index.get(int(order.get("i") or 0))
+                subscribers = self._subscribers
+            if entry is not None:
+                logger.info("Order update id=%s status=%s", order.get("i"), order.get("X"))
                 try:
-                    logger.info("TP filled/canceled — cancelling SL order %s", sl_order_id)
-                    client.futures_cancel_order(symbol=symbol, orderId=sl_order_id)
-                except BinanceAPIException as e:
-                    logger.exception("Error cancelling SL: %s", e)
-            if order_id == sl_order_id and status in ("FILLED", "CANCELED", "REJECTED"):
-                # cancel TP
+                    entry[1](order)
+                except Exception as e:
+                    logger.exception("Error handling order update: %s", e)
+            for handler, _ in subscribers:
                 try:
-                    logger.info("SL filled/canceled — cancelling TP order %s", tp_order_id)
-                    client.futures_cancel_order(symbol=symbol, orderId=tp_order_id)
-                except BinanceAPIException as e:
-                    logger.exception("Error cancelling TP: %s", e)
-        except Exception as e:
-            logger.exception("Error handling ws message: %s", e)
-
-    # Subscribe to user data stream
-    listen_key = client.futures_get_listen_key().get("listenKey")
-    logger.info("Obtained listenKey: %s", listen_key)
-    twm.start_user_socket(callback=handle_message)
+                    handler(msg)
+                except Exception as e:
+                    logger.exception("Error in order update subscriber: %s", e)
+        elif event == "listenKeyExpired":
+            logger.warning("listenKey expired; reconnecting")
+            self._close_ws()
+
+    def _resync(self):
+        """Re-read every watched order over REST and replay terminal states missed while offline."""
+        with self._lock:
+            watched = list(self._index.items())
+            hooks = [hook for _, hook in self._subscribers if hook is not None]
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.exception("Subscriber resync failed: %s", e)
+        for order_id, (symbol, handler) in watched:
+            try:
+                order = self.client.futures_get_order(symbol=symbol, orderId=order_id)
+            except (BinanceAPIException, BinanceRequestException) as e:
+                logger.exception("Resync of order %s failed: %s", order_id, e)
+                continue
+            if order.get("status") in TERMINAL_STATUSES:
+                self._dispatch({"e": "ORDER_TRADE_UPDATE", "o": {"i": order_id, "s": symbol, "X": order["status"]}})
+
+    def _close_ws(self):
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        backoff = self.backoff_initial
+        while not self._stop.is_set():
+            try:
+                self.listen_key = self.client.futures_stream_get_listen_key()
+                with self._connect(self.stream_url + self.listen_key) as ws:
+                    self._ws = ws
+                    self.connections += 1
+                    logger.info("User data stream connected (connection #%d)", self.connections)
+                    if self.connections > 1:
+                        self._resync()
+                    backoff = self.backoff_initial
+                    last_keepalive = time.monotonic()
+                    while not self._stop.is_set():
+                        if time.monotonic() - last_keepalive >= self.keepalive_seconds:
+                            self.client.futures_stream_keepalive(listenKey=self.listen_key)
+                            last_keepalive = time.monotonic()
+                        try:
+                            raw = ws.recv(timeout=1.0)
+                        except TimeoutError:
+                            continue
+                        self._dispatch(json.loads(raw))
+            except (ConnectionClosed, OSError, BinanceAPIException, BinanceRequestException, ValueError) as e:
+                if self._stop.is_set():
+                    break
+                logger.warning("User data stream dropped (%s); reconnecting in %.1fs", e, backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+            finally:
+                self._ws = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="user-data-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._close_ws()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self.listen_key:
+            try:
+                self.client.futures_stream_close(listenKey=self.listen_key)
+            except (BinanceAPIException, BinanceRequestException) as e:
+                logger.warning("Could not close listenKey: %s", e)
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+def get_user_stream(client: Client, testnet: bool = False) -> UserDataStream:
+    """Return the running shared stream for this API key, starting it on first use."""
+    with _streams_lock:
+        stream = _streams.get(client.API_KEY)
+        if stream is None:
+            stream = UserDataStream(client, FUTURES_TESTNET_STREAM_URL if testnet else FUTURES_STREAM_URL)
+            _streams[client.API_KEY] = stream
+        return stream.start()
+
+def start_oco_listener(client: Client, symbol: str, tp_order_id: int, sl_order_id: int, block: bool = True, testnet: bool = False):
+    """
+    Register a TP/SL pair on the shared user-data stream. When either order reaches a terminal
+    status (FILLED, CANCELED, REJECTED, EXPIRED) the other is cancelled.
+    With block=True this waits until the pair is resolved or KeyboardInterrupt; otherwise the OcoPair is returned.
+    """
+    pair = get_user_stream(client, testnet).add_oco(symbol, tp_order_id, sl_order_id)
+    if not block:
+        return pair
     try:
-        while True:
-            time.sleep(30)
+        while not pair.done.wait(30):
+            pass
     except KeyboardInterrupt:
         logger.info("Shutting down listener")
-    finally:
-        twm.stop()
+    return pair
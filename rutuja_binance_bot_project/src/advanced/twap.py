@@ -1,27 +1,295 @@
 """
 advanced/twap.py
 Simple TWAP: split a large order into n equal parts and place them at intervals.
+
+execute_twap blocks the calling thread for the whole run. TwapScheduler runs any number of
+TWAP executions from one heap-ordered timer thread; slices are sent on a small worker pool
+at absolute due times, so submission latency never pushes later slices off schedule.
 """
 
-import time, logging
+import heapq, itertools, queue, random, threading, time, logging
+from concurrent.futures import ThreadPoolExecutor
 from utils import setup_logger, validate_symbol
+from exchange_info import split_qty
+from order_journal import MISSING, client_order_id
+from metrics import REGISTRY
 from binance.exceptions import BinanceAPIException, BinanceOrderException
 
 logger = setup_logger("advanced_twap.log")
 
-def execute_twap(client, symbol, side, total_qty, slices=10, interval_seconds=30, test=False):
-    validate_symbol(symbol)
+def _slice_quantities(total_qty, slices, f):
+    if f is not None:
+        # Whole step-size units per slice; the remainder goes to the first slices so the total is exact.
+        return [f.snap(q, market=True)[0] for q in split_qty(total_qty, slices, f.market_step_size)]
+    return [float(total_qty) / int(slices)] * int(slices)
+
+def execute_twap(client, symbol, side, total_qty, slices=10, interval_seconds=30, test=False, filters=None,
+                 journal=None, run_id=None):
+    """
+    With an OrderJournal, every slice is journaled under a deterministic clientOrderId. When
+    run_id names a run already in the journal it is first reconciled with the exchange and only
+    slices that never reached it are sent, so an interrupted run is resumed by calling again with its id
+    (journal.unfinished_runs("twap") lists them).
+    """
+    f = validate_symbol(symbol, filters)
     side = side.upper()
-    qty_per_slice = float(total_qty) / int(slices)
+    quantities = _slice_quantities(total_qty, slices, f)
     logger.info("Starting TWAP: %s %s total=%s slices=%s every=%ss", side, symbol, total_qty, slices, interval_seconds)
+    settled = {}
+    if journal is not None:
+        run_id, created = journal.new_run("twap", {"symbol": symbol, "side": side, "total_qty": str(total_qty),
+                                                   "slices": int(slices), "interval_seconds": interval_seconds}, run_id)
+        logger.info("TWAP run id %s%s", run_id, "" if created else " (resuming)")
+        if not created and not test:
+            settled = journal.reconcile(client, run_id, symbol, range(int(slices)))
     results = []
+    sent = 0
+    timer = REGISTRY.order(symbol, "MARKET")
     for i in range(int(slices)):
+        qty_per_slice = quantities[i]
+        if settled.get(i, MISSING) != MISSING:
+            logger.info("Slice %d already %s in run %s; not resending", i+1, settled[i], run_id)
+            res = journal.response(client_order_id(run_id, i))
+            if res is not None:
+                results.append(res)
+            continue
+        if sent:
+            time.sleep(interval_seconds)
+        sent += 1
+        params = {"symbol": symbol, "side": side, "type": "MARKET", "quantity": qty_per_slice}
+        cid = journal.intent(run_id, i, symbol, params) if journal is not None else None
         try:
             logger.info("Placing slice %d: qty %s", i+1, qty_per_slice)
-            res = client.futures_create_order(symbol=symbol, side=side, type="MARKET", quantity=qty_per_slice) if not test else {"test":"twap_slice_%d"% (i+1)}
+            res = timer.send(client.futures_create_order, **params) if not test else {"test":"twap_slice_%d"% (i+1)}
             results.append(res)
-        except (BinanceAPIException, BinanceOrderException) as e:
+            if cid is not None:
+                journal.result(cid, res)
+        except (BinanceAPIException, BinanceOrderException, ValueError) as e:
             logger.exception("Error on TWAP slice %d: %s", i+1, e)
-        time.sleep(interval_seconds)
+            if cid is not None:
+                journal.result(cid, error=str(e))
+    if journal is not None:
+        journal.finish_run(run_id)
     logger.info("TWAP finished. Results count: %d", len(results))
     return results
+
+RUNNING, PAUSED, CANCELLED, DONE = "RUNNING", "PAUSED", "CANCELLED", "DONE"
+
+class TwapExecution:
+    """
+    Handle for one scheduled TWAP. Slice i is due at start + i * interval (+ optional jitter).
+    Progress events are dicts pushed to a queue and read with progress(); the stream ends with
+    a "done" or "cancelled" event.
+    """
+    def __init__(self, scheduler, exec_id: int, symbol: str, side: str, quantities, interval: float, jitter: float, test: bool):
+        self._scheduler = scheduler
+        self.id = exec_id
+        self.symbol = symbol
+        self.side = side
+        self.quantities = quantities
+        self.interval = interval
+        self.jitter = jitter
+        self.test = test
+        self.state = RUNNING
+        self.next_index = 0
+        self.sent = 0
+        self.failed = 0
+        self._inflight = 0
+        self._offsets = [0.0] + [random.uniform(-jitter, jitter) * interval for _ in quantities[1:]]
+        self._start = None
+        self._paused_at = None
+        self._generation = 0
+        self._events = queue.Queue()
+
+    def due_time(self, index: int) -> float:
+        return self._start + index * self.interval + self._offsets[index]
+
+    def pause(self):
+        self._scheduler._pause(self)
+
+    def resume(self):
+        self._scheduler._resume(self)
+
+    def cancel(self):
+        self._scheduler._cancel(self)
+
+    def progress(self, timeout: float = None):
+        """Yield progress events as they happen until the execution finishes or is cancelled."""
+        while True:
+            event = self._events.get(timeout=timeout)
+            yield event
+            if event["type"] in ("done", "cancelled"):
+                return
+
+    def _emit(self, kind: str, **data):
+        data.update(type=kind, execution=self.id, symbol=self.symbol)
+        self._events.put(data)
+
+class TwapScheduler:
+    """
+    Single-threaded timer loop over a heap of (due time, sequence, execution, generation).
+    Order submission happens on `max_workers` threads; the loop fires each slice early by the
+    moving average of recent submission latency so the order reaches the exchange on time.
+    """
+    def __init__(self, client, max_workers: int = 8, clock=time.monotonic):
+        self.client = client
+        self._clock = clock
+        self._heap = []
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="twap")
+        self._thread = None
+        self._running = False
+        self.latency_estimate = 0.0
+        self.active = {}
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        self._thread = threading.Thread(target=self._loop, name="twap-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, wait: bool = True):
+        """Stop the loop and cancel every unfinished execution, so progress() readers get their final event."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None and wait:
+            self._thread.join()
+        self._pool.shutdown(wait=wait)
+        with self._cond:
+            pending = list(self.active.values())
+        if pending:
+            logger.info("TWAP scheduler stopped with %d unfinished executions; cancelling them", len(pending))
+        for execution in pending:
+            self._cancel(execution)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def submit(self, symbol: str, side: str, total_qty, slices: int = 10, interval_seconds: float = 30,
+               jitter: float = 0.0, test: bool = False, filters=None) -> TwapExecution:
+        """Schedule a TWAP; `jitter` randomizes each slice time by up to +/- jitter * interval."""
+        f = validate_symbol(symbol, filters)
+        side = side.upper()
+        if side not in ("BUY", "SELL"):
+            raise ValueError("side must be BUY or SELL")
+        if int(slices) < 1:
+            raise ValueError("slices must be at least 1")
+        if not 0 <= jitter < 0.5:
+            raise ValueError("jitter must be in [0, 0.5) so slices keep their order")
+        quantities = _slice_quantities(total_qty, slices, f)
+        execution = TwapExecution(self, next(self._ids), symbol, side, quantities, float(interval_seconds), jitter, test)
+        logger.info("Scheduling TWAP #%d: %s %s total=%s slices=%s every=%ss jitter=%s",
+                    execution.id, side, symbol, total_qty, slices, interval_seconds, jitter)
+        with self._cond:
+            execution._start = self._clock()
+            self.active[execution.id] = execution
+            self._push(execution)
+        return execution
+
+    def _push(self, execution: TwapExecution):
+        # Caller holds self._cond.
+        due = execution.due_time(execution.next_index)
+        heapq.heappush(self._heap, (due, next(self._seq), execution, execution._generation))
+        self._cond.notify_all()
+
+    def _loop(self):
+        with self._cond:
+            while self._running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, _, execution, generation = self._heap[0]
+                wait = due - self.latency_estimate - self._clock()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                if generation != execution._generation or execution.state != RUNNING:
+                    continue  # stale entry left behind by pause/cancel
+                index = execution.next_index
+                execution.next_index += 1
+                execution._inflight += 1
+                if execution.next_index < len(execution.quantities):
+                    self._push(execution)
+                self._pool.submit(self._send_slice, execution, index, due)
+
+    def _send_slice(self, execution: TwapExecution, index: int, due: float):
+        qty = execution.quantities[index]
+        sent_at = self._clock()
+        res, error = None, None
+        try:
+            logger.info("TWAP #%d placing slice %d: qty %s", execution.id, index + 1, qty)
+            if execution.test:
+                res = {"test": "twap_slice_%d" % (index + 1)}
+            else:
+                res = REGISTRY.order(execution.symbol, "MARKET").send(self.client.futures_create_order, symbol=execution.symbol,
+                                                                      side=execution.side, type="MARKET", quantity=qty)
+        except Exception as e:
+            # Anything raised here would vanish into the pool future and leave the execution
+            # in flight forever, so transport errors (requests.ConnectionError, Timeout) and
+            # everything else count as a failed slice.
+            logger.exception("Error on TWAP #%d slice %d: %s", execution.id, index + 1, e)
+            error = str(e)
+        finished = self._clock()
+        if sent_at >= due:
+            REGISTRY.record("schedule_lag", int((sent_at - due) * 1e9), execution.symbol, "MARKET")
+        with self._cond:
+            self.latency_estimate = 0.8 * self.latency_estimate + 0.2 * (finished - sent_at)
+            execution._inflight -= 1
+            if error is None:
+                execution.sent += 1
+            else:
+                execution.failed += 1
+            execution._emit("slice", index=index, quantity=qty, response=res, error=error,
+                            scheduled_at=due, sent_at=sent_at, lag=sent_at - due)
+            self._maybe_finish(execution)
+
+    def _maybe_finish(self, execution: TwapExecution):
+        # Caller holds self._cond.
+        if execution.state == RUNNING and execution.next_index >= len(execution.quantities) and execution._inflight == 0:
+            execution.state = DONE
+            self.active.pop(execution.id, None)
+            logger.info("TWAP #%d finished: %d sent, %d failed", execution.id, execution.sent, execution.failed)
+            execution._emit("done", sent=execution.sent, failed=execution.failed)
+
+    def _pause(self, execution: TwapExecution):
+        with self._cond:
+            if execution.state != RUNNING:
+                return
+            execution.state = PAUSED
+            execution._paused_at = self._clock()
+            execution._generation += 1
+            execution._emit("paused", next_index=execution.next_index)
+
+    def _resume(self, execution: TwapExecution):
+        with self._cond:
+            if execution.state != PAUSED:
+                return
+            # Shift the remaining schedule by the time spent paused.
+            execution._start += self._clock() - execution._paused_at
+            execution.state = RUNNING
+            execution._emit("resumed", next_index=execution.next_index)
+            if execution.next_index < len(execution.quantities):
+                self._push(execution)
+            else:
+                self._maybe_finish(execution)
+
+    def _cancel(self, execution: TwapExecution):
+        with self._cond:
+            if execution.state in (CANCELLED, DONE):
+                return
+            execution.state = CANCELLED
+            execution._generation += 1
+            self.active.pop(execution.id, None)
+            logger.info("TWAP #%d cancelled after %d slices", execution.id, execution.next_index)
+            execution._emit("cancelled", sent=execution.sent, remaining=len(execution.quantities) - execution.next_index)
+            self._cond.notify_all()
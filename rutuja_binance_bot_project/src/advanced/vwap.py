@@ -0,0 +1,304 @@
+"""
+advanced/vwap.py
+VWAP / POV execution. A VolumeProfile is built from historical klines with vectorized NumPy
+code (average volume per time-of-day bin), and the parent order is spread over the execution
+window in proportion to it instead of in equal TWAP slices. Slice sizes are re-targeted online
+from the traded volume seen on the aggTrade stream, so we trade ahead when the market is busier
+than usual and hold back when it is quiet. An optional participation cap (POV) limits every
+child order to a fraction of the volume traded during the previous slice. Quantities are
+handled in whole step-size units, so rounding never loses quantity and the final slice sends
+exactly what is left.
+Market-data callbacks only accumulate volume; child orders are fired by run() on the caller's
+thread (or by advance() during a replay), never from the websocket reader, and the REST call is
+made without holding the lock the reader takes.
+"""
+
+import threading, time, logging
+from decimal import Decimal
+import numpy as np
+import requests
+from utils import setup_logger, validate_symbol
+from exchange_info import format_decimal
+from metrics import REGISTRY
+from binance.exceptions import BinanceAPIException, BinanceOrderException, BinanceRequestException
+
+logger = setup_logger("advanced_vwap.log")
+
+DAY_MS = 86400000
+ORDER_ERRORS = (BinanceAPIException, BinanceOrderException, BinanceRequestException, ValueError,
+                requests.RequestException)
+
+class VolumeProfile:
+    """Average traded volume per time-of-day bin (UTC), from klines of any interval up to bin size."""
+    def __init__(self, volumes, bin_ms: int):
+        self.volumes = np.asarray(volumes, dtype=np.float64)
+        self.bin_ms = int(bin_ms)
+        if DAY_MS % self.bin_ms or len(self.volumes) != DAY_MS // self.bin_ms:
+            raise ValueError("bins must divide the day evenly")
+        self.edges = np.arange(len(self.volumes) + 1, dtype=np.float64) * self.bin_ms
+        self.cumulative = np.concatenate(([0.0], np.cumsum(self.volumes)))
+        self.daily = float(self.cumulative[-1])
+
+    @classmethod
+    def from_klines(cls, open_time, volume, bin_minutes: int = 5) -> "VolumeProfile":
+        """open_time (ms) and volume may be lists (backtest.load_klines) or arrays (recorder.load)."""
+        open_time = np.asarray(open_time, dtype=np.int64)
+        volume = np.asarray(volume, dtype=np.float64)
+        if not len(open_time):
+            raise ValueError("no klines to build a volume profile from")
+        bin_ms = int(bin_minutes) * 60000
+        bins = (open_time % DAY_MS) // bin_ms
+        days = len(np.unique(open_time // DAY_MS))
+        return cls(np.bincount(bins, weights=volume, minlength=DAY_MS // bin_ms) / days, bin_ms)
+
+    def volume_until(self, times_ms) -> np.ndarray:
+        """Expected cumulative volume from the epoch to each time (piecewise linear within a bin)."""
+        t = np.asarray(times_ms, dtype=np.float64)
+        return (t // DAY_MS) * self.daily + np.interp(t % DAY_MS, self.edges, self.cumulative)
+
+    def expected(self, start_ms, end_ms) -> float:
+        """Expected volume traded between two times."""
+        a, b = self.volume_until([start_ms, end_ms])
+        return float(b - a)
+
+    def weights(self, boundaries_ms) -> np.ndarray:
+        """Fraction of the window's expected volume in each interval between consecutive boundaries."""
+        volume = np.diff(self.volume_until(boundaries_ms))
+        total = volume.sum()
+        if total <= 0:
+            return np.full(len(volume), 1.0 / len(volume))
+        return volume / total
+
+def allocate_units(units: int, weights) -> np.ndarray:
+    """
+    Split `units` whole steps in proportion to `weights` with the largest-remainder method:
+    every entry is within one step of its exact share and the entries sum to exactly `units`.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    raw = weights / weights.sum() * units
+    out = np.floor(raw).astype(np.int64)
+    short = int(units - out.sum())
+    if short:
+        out[np.argsort(-(raw - out), kind="stable")[:short]] += 1
+    return out
+
+class VwapExecution:
+    """
+    One VWAP/POV parent order over [start_ms, start_ms + duration). Event-driven: on_trade()
+    takes market trades (handle_event() the raw aggTrade events) and advance() the current
+    time; child orders go out at every slice boundary, so the same object runs live (run()) and
+    in simulation (backtest_vwap()).
+
+    Slice k targets a cumulative fill of total * observed / (observed + expected remaining),
+    where observed is the market volume seen so far and expected remaining comes from the
+    profile: with volume exactly as forecast this is the planned VWAP curve. With
+    max_participation, a child may not exceed that fraction of the volume of the previous
+    slice (the expected volume for the first). The last slice sends whatever is left.
+    """
+    def __init__(self, client, symbol: str, side: str, total_qty, profile: VolumeProfile, start_ms: int,
+                 duration_seconds: float, slice_seconds: float = 60, max_participation: float = None,
+                 filters=None, test: bool = False):
+        f = validate_symbol(symbol, filters)
+        side = side.upper()
+        if side not in ("BUY", "SELL"):
+            raise ValueError("side must be BUY or SELL")
+        if max_participation is not None and not 0 < max_participation <= 1:
+            raise ValueError("max_participation must be in (0, 1]")
+        slices = max(1, int(round(float(duration_seconds) / float(slice_seconds))))
+        self.client = client
+        self.symbol = symbol
+        self.side = side
+        self.filters = f
+        self.step = f.market_step_size if f is not None else Decimal("0.001")
+        self.units = int(Decimal(str(total_qty)) / self.step)
+        if self.units <= 0:
+            raise ValueError("total_qty %s is below one step of %s" % (total_qty, self.step))
+        self.min_units = int(f.min_qty / self.step) if f is not None and f.min_qty else 1
+        self.max_units = int(f.market_max_qty / self.step) if f is not None and f.market_max_qty else None
+        self.profile = profile
+        self.max_participation = max_participation
+        self.test = test
+        self.boundaries = start_ms + np.arange(slices + 1, dtype=np.int64) * int(float(slice_seconds) * 1000)
+        self.planned = allocate_units(self.units, profile.weights(self.boundaries))
+        self.expected_total = profile.expected(self.boundaries[0], self.boundaries[-1])
+        self.next_slice = 0
+        self.executed = 0          # step units acknowledged by the exchange
+        self.observed = 0.0        # market volume inside the window so far
+        self._slice_volume = 0.0   # market volume since the last child order
+        self.notional = 0.0
+        self.filled_qty = 0.0
+        self.results = []
+        self.errors = 0
+        self.done = False
+        # Guards the volume counters and the slice state: volume arrives on the stream thread.
+        self._lock = threading.Lock()
+        # Serializes advance() callers; held across the REST calls, never taken by the stream thread.
+        self._fire_lock = threading.Lock()
+
+    @property
+    def remaining_units(self) -> int:
+        return self.units - self.executed
+
+    def quantity(self, units: int) -> str:
+        return format_decimal(units * self.step, self.step)
+
+    def record_trade(self, time_ms: int, qty: float):
+        """Count traded volume inside the window; safe to call from any thread."""
+        if self.boundaries[0] <= time_ms < self.boundaries[-1]:
+            with self._lock:
+                self.observed += qty
+                self._slice_volume += qty
+
+    def on_trade(self, time_ms: int, qty: float):
+        """Replay one trade in event time: fire the slices it closes, then count it (backtests)."""
+        self.advance(time_ms)
+        self.record_trade(time_ms, qty)
+
+    def handle_event(self, event: dict):
+        """Subscriber callback for aggTrade/trade events (MarketDataRecorder.subscribe); only records volume."""
+        if event.get("e") in ("aggTrade", "trade") and event.get("s") == self.symbol:
+            self.record_trade(int(event["T"]), float(event["q"]))
+
+    def advance(self, now_ms: int):
+        """Send every child order whose slice boundary has passed."""
+        with self._fire_lock:
+            while True:
+                with self._lock:
+                    if self.done or now_ms < self.boundaries[self.next_slice]:
+                        return
+                    k = self.next_slice
+                    chunks = self._slice(k)
+                # Orders go out without self._lock so record_trade() never waits on the exchange.
+                sent = [(units, self._send(k, units)) for units in chunks]
+                with self._lock:
+                    self._apply(k, sent)
+
+    def _target_units(self, k: int) -> int:
+        last = k == len(self.planned) - 1
+        if last:
+            return self.remaining_units
+        remaining_expected = self.profile.expected(self.boundaries[k], self.boundaries[-1])
+        if k == 0 or self.observed + remaining_expected <= 0:
+            target = int(self.planned[:k + 1].sum())
+        else:
+            # Fill the share of the window's volume that has already traded, then follow the plan.
+            done_share = self.observed / (self.observed + remaining_expected)
+            plan_share = self.planned[k] / self.units
+            target = int(round(self.units * min(1.0, done_share + plan_share)))
+        units = max(0, min(target, self.units) - self.executed)
+        if self.max_participation is not None:
+            volume = self._slice_volume if k else self.profile.expected(self.boundaries[0], self.boundaries[1])
+            units = min(units, int(self.max_participation * volume / float(self.step)))
+        return units
+
+    def _slice(self, k: int) -> list:
+        # Caller holds self._lock. Closes slice k and returns the child order sizes to send.
+        units = self._target_units(k)
+        last = k == len(self.planned) - 1
+        if self.max_participation is not None and last and k:
+            cap = int(self.max_participation * self._slice_volume / float(self.step))
+            if units > cap:
+                logger.warning("VWAP %s final slice sends %s, above the %.0f%% participation cap of %s",
+                               self.symbol, self.quantity(units), self.max_participation * 100, self.quantity(cap))
+        self._slice_volume = 0.0
+        self.next_slice = k + 1
+        chunks = []
+        if units and (units >= self.min_units or last):
+            while units > 0:
+                chunk = min(units, self.max_units) if self.max_units else units
+                units -= chunk
+                chunks.append(chunk)
+        return chunks
+
+    def _apply(self, k: int, sent: list):
+        # Caller holds self._lock. A failed child (res None) is not counted as executed, so later
+        # slices pick its quantity up again.
+        for units, res in sent:
+            if res is None:
+                self.errors += 1
+                continue
+            self.executed += units
+            self.results.append(res)
+            filled = float(res.get("executedQty") or 0.0)
+            if filled:
+                self.filled_qty += filled
+                self.notional += filled * float(res.get("avgPrice") or 0.0)
+        if self.next_slice == len(self.planned):
+            self.done = True
+            logger.info("VWAP %s %s finished: %s of %s filled, %d child orders, %d errors", self.side, self.symbol,
+                        self.quantity(self.executed), self.quantity(self.units), len(self.results), self.errors)
+
+    def _send(self, k: int, units: int):
+        """Place one child order; returns its response, or None when it failed."""
+        qty = self.quantity(units)
+        logger.info("VWAP %s slice %d/%d: %s %s (planned %s)", self.symbol, k + 1, len(self.planned), self.side, qty,
+                    self.quantity(int(self.planned[k])))
+        if self.test:
+            return {"test": "vwap_slice_%d" % (k + 1), "quantity": qty}
+        try:
+            return REGISTRY.order(self.symbol, "MARKET").send(self.client.futures_create_order, symbol=self.symbol,
+                                                              side=self.side, type="MARKET", quantity=qty)
+        except ORDER_ERRORS as e:
+            # Transport errors (requests.ConnectionError, Timeout) count as failed children too.
+            logger.exception("Error on VWAP %s slice %d: %s", self.symbol, k + 1, e)
+            return None
+
+    def average_price(self) -> float:
+        return self.notional / self.filled_qty if self.filled_qty else 0.0
+
+    def run(self, poll_seconds: float = 0.25, clock=time.time):
+        """Block until every slice has been sent, firing children by wall-clock time."""
+        while not self.done:
+            self.advance(int(clock() * 1000))
+            if not self.done:
+                time.sleep(poll_seconds)
+        return self.results
+
+def execute_vwap(client, symbol, side, total_qty, klines, duration_seconds, slice_seconds=60, max_participation=None,
+                 bin_minutes=5, filters=None, stream=None, test=False, testnet=False):
+    """
+    Blocking VWAP over the next `duration_seconds`, with the profile from `klines` (Columns with
+    open_time and volume, e.g. backtest.load_klines or recorder.load). Traded volume comes from
+    `stream` (a started MarketDataRecorder carrying <symbol>@aggTrade), or from one opened here.
+    """
+    profile = VolumeProfile.from_klines(klines.open_time, klines.volume, bin_minutes)
+    execution = VwapExecution(client, symbol, side, total_qty, profile, int(time.time() * 1000), duration_seconds,
+                              slice_seconds, max_participation, filters, test)
+    logger.info("Starting VWAP: %s %s total=%s over %ss in %d slices, planned=%s", side, symbol, total_qty,
+                duration_seconds, len(execution.planned), [execution.quantity(int(u)) for u in execution.planned])
+    own_stream = stream is None
+    if own_stream:
+        from recorder import MarketDataRecorder
+        from order_book import FUTURES_STREAM_BASE, FUTURES_TESTNET_STREAM_BASE
+        stream = MarketDataRecorder(None, [symbol], streams=("aggTrade",),
+                                    stream_base=FUTURES_TESTNET_STREAM_BASE if testnet else FUTURES_STREAM_BASE).start()
+    stream.subscribe(execution.handle_event)
+    try:
+        return execution.run()
+    finally:
+        stream.unsubscribe(execution.handle_event)
+        if own_stream:
+            stream.stop()
+
+def backtest_vwap(client, execution: VwapExecution, trades) -> dict:
+    """
+    Replay trades (Columns with time, price, qty) through a SimulatedFuturesClient while the
+    execution trades against it. Reports the execution's average price against the market VWAP
+    over its window.
+    """
+    process, on_trade, symbol = client.process_trade, execution.on_trade, execution.symbol
+    start, end = int(execution.boundaries[0]), int(execution.boundaries[-1])
+    notional = volume = 0.0
+    for t, p, q in zip(trades.time, trades.price, trades.qty):
+        process(symbol, t, p, q)
+        on_trade(t, q)
+        if start <= t < end:
+            notional += p * q
+            volume += q
+    execution.advance(end)
+    market_vwap = notional / volume if volume else 0.0
+    avg = execution.average_price()
+    sign = 1 if execution.side == "BUY" else -1
+    return {"filled_qty": execution.filled_qty, "executed": execution.quantity(execution.executed),
+            "child_orders": len(execution.results), "avg_price": avg, "market_vwap": market_vwap,
+            "slippage_bps": sign * (avg - market_vwap) / market_vwap * 1e4 if avg and market_vwap else 0.0}
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+async_bot.py
+Asyncio counterpart of BasicBot for Futures (USDT-M Testnet).
+Provides the same methods as coroutines: place_market_order, place_limit_order, place_stop_limit.
+All calls share one pooled keep-alive aiohttp session, so a single event loop can keep
+hundreds of orders in flight; `connection_limit` caps the number of open sockets.
+When an ExchangeInfoCache is given, prices and quantities are snapped to the symbol filters;
+with a RiskEngine, every order is checked against its limits before it is signed.
+"""
+
+import asyncio
+from typing import Optional
+
+import aiohttp
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from .utils import setup_logger, validate_symbol
+from .exchange_info import ExchangeInfoCache
+from .order_encoding import OrderEncoder, format_number
+from .risk import RiskEngine
+
+logger = setup_logger("logs/basic_bot.log")
+
+FUTURES_URL = "https://fapi.binance.com"
+FUTURES_TESTNET_URL = "https://testnet.binancefuture.com"
+
+class AsyncBasicBot:
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = True, base_url: Optional[str] = None,
+                 connection_limit: int = 100, keepalive_timeout: float = 30.0, timeout: float = 10.0,
+                 filters: Optional[ExchangeInfoCache] = None, risk: Optional[RiskEngine] = None):
+        self.api_key = api_key
+        self.api_secret = api_secret.encode("utf-8")
+        # Precomputed HMAC state and single-pass query building; see order_encoding.py.
+        self.encoder = OrderEncoder(self.api_secret)
+        self.base_url = (base_url or (FUTURES_TESTNET_URL if testnet else FUTURES_URL)).rstrip("/")
+        self.connection_limit = connection_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.filters = filters
+        self.risk = risk
+        self._session: Optional[aiohttp.ClientSession] = None
+        logger.info("AsyncBasicBot initialized (base_url=%s, connection_limit=%s)", self.base_url, connection_limit)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """Open the shared session. Called lazily by the first request if not done explicitly."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.connection_limit, keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"X-MBX-APIKEY": self.api_key, "Accept": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _sign(self, params: dict) -> str:
+        return self.encoder.sign(params)
+
+    async def _signed_request(self, method: str, path: str, params: dict):
+        session = await self.start()
+        body = self._sign(params)
+        async with session.request(method, self.base_url + path, data=body,
+                                   headers={"Content-Type": "application/x-www-form-urlencoded"}) as resp:
+            text = await resp.text()
+            if not 200 <= resp.status < 300:
+                raise BinanceAPIException(resp, resp.status, text)
+            try:
+                return await resp.json(content_type=None)
+            except ValueError:
+                raise BinanceRequestException("Invalid Response: %s" % text)
+
+    async def _create_order(self, **params):
+        if self.risk is None:
+            return await self._signed_request("POST", "/fapi/v1/order", params)
+        # Checked and booked before the request; the engine is shared with sync clients safely.
+        cid = self.risk.reserve(params)
+        try:
+            res = await self._signed_request("POST", "/fapi/v1/order", params)
+        except Exception:
+            self.risk.release(cid)
+            raise
+        self.risk.on_response(res, cid)
+        return res
+
+    async def place_market_order(self, symbol: str, side: str, quantity: float, recvWindow: int = 5000):
+        symbol = symbol.upper()
+        side = side.upper()
+        f = validate_symbol(symbol, self.filters)
+        if side not in ("BUY", "SELL"):
+            raise ValueError("side must be BUY or SELL")
+        if f is not None:
+            quantity, _ = f.snap(quantity, market=True)
+        try:
+            logger.info("Placing MARKET order %s %s qty=%s", side, symbol, quantity)
+            res = await self._create_order(symbol=symbol, side=side, type="MARKET", quantity=quantity, recvWindow=recvWindow)
+            logger.info("Market order response: %s", res)
+            return res
+        except (BinanceAPIException, BinanceRequestException) as e:
+            logger.exception("Binance error placing market order: %s", e)
+            raise
+
+    async def place_limit_order(self, symbol: str, side: str, price: float, quantity: float, timeInForce: str = "GTC"):
+        symbol = symbol.upper()
+        side = side.upper()
+        f = validate_symbol(symbol, self.filters)
+        if side not in ("BUY", "SELL"):
+            raise ValueError("side must be BUY or SELL")
+        quantity, price = f.snap(quantity, price) if f is not None else (quantity, format_number(price))
+        try:
+            logger.info("Placing LIMIT order %s %s qty=%s price=%s", side, symbol, quantity, price)
+            res = await self._create_order(symbol=symbol, side=side, type="LIMIT", timeInForce=timeInForce, price=price, quantity=quantity)
+            logger.info("Limit order response: %s", res)
+            return res
+        except (BinanceAPIException, BinanceRequestException) as e:
+            logger.exception("Binance error placing limit order: %s", e)
+            raise
+
+    async def place_stop_limit(self, symbol: str, side: str, stop_price: float, limit_price: float, quantity: float):
+        symbol = symbol.upper()
+        side = side.upper()
+        f = validate_symbol(symbol, self.filters)
+        if f is not None:
+            quantity, limit_price = f.snap(quantity, limit_price)
+            stop_price = f.format_price(stop_price)
+        try:
+            logger.info("Placing STOP-LIMIT order %s %s qty=%s stop=%s limit=%s", side, symbol, quantity, stop_price, limit_price)
+            res = await self._create_order(symbol=symbol, side=side, type="STOP", stopPrice=format_number(stop_price), price=format_number(limit_price), timeInForce="GTC", quantity=quantity)
+            logger.info("Stop-Limit response: %s", res)
+            return res
+        except (BinanceAPIException, BinanceRequestException) as e:
+            logger.exception("Binance error placing stop-limit: %s", e)
+            raise
+
+if __name__ == "__main__":
+    import os
+
+    async def _demo():
+        ak = os.environ.get("BINANCE_API_KEY") or "demo_key"
+        sk = os.environ.get("BINANCE_API_SECRET") or "demo_secret"
+        async with AsyncBasicBot(ak, sk, testnet=True):
+            print("AsyncBasicBot ready (demo).")
+
+    asyncio.run(_demo())
@@ -0,0 +1,136 @@
+"""
+backtest.py
+Replay historical klines or trades through SimulatedFuturesClient and report fills, PnL and slippage.
+Reads Binance public-data CSV files (with or without a header row) and Parquet files (pandas + pyarrow).
+Usage:
+    python src/backtest.py --klines BTCUSDT-1m-2024.csv --symbol BTCUSDT --grid 60000 70000 21 0.001
+"""
+
+import argparse, csv, os, time
+try:
+    from .simulator import SimulatedFuturesClient
+except ImportError:
+    from simulator import SimulatedFuturesClient
+
+# name aliases -> position in headerless Binance public-data files
+KLINE_FIELDS = {
+    "open_time": (("open_time", "timestamp", "time"), 0),
+    "open": (("open",), 1),
+    "high": (("high",), 2),
+    "low": (("low",), 3),
+    "close": (("close",), 4),
+    "volume": (("volume",), 5),
+}
+TRADE_FIELDS = {
+    "time": (("time", "transact_time", "timestamp"), 4),
+    "price": (("price",), 1),
+    "qty": (("qty", "quantity"), 2),
+}
+
+class Columns:
+    """Named columns held as plain Python lists, which iterate faster than arrays in the replay loop."""
+    def __init__(self, **columns):
+        self.names = tuple(columns)
+        for name, values in columns.items():
+            setattr(self, name, values)
+
+    def __len__(self):
+        return len(getattr(self, self.names[0]))
+
+def _load(path: str, fields: dict) -> Columns:
+    if path.endswith(".parquet"):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise ImportError("Reading Parquet files requires pandas and pyarrow (pip install pandas pyarrow)")
+        df = pd.read_parquet(path)
+        out = {}
+        for name, (aliases, _) in fields.items():
+            col = next((a for a in aliases if a in df.columns), None)
+            if col is None:
+                raise ValueError("%s: missing column %s" % (path, name))
+            out[name] = df[col].tolist()
+        return Columns(**out)
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        first = next(reader, None)
+        if first is None:
+            return Columns(**{name: [] for name in fields})
+        try:
+            float(first[0])
+            header, rows = None, [first]
+        except ValueError:
+            header, rows = [h.strip().lower() for h in first], []
+        positions = {}
+        for name, (aliases, default_pos) in fields.items():
+            if header is None:
+                positions[name] = default_pos
+            else:
+                positions[name] = next((header.index(a) for a in aliases if a in header), None)
+                if positions[name] is None:
+                    raise ValueError("%s: missing column %s" % (path, name))
+        out = {name: [] for name in fields}
+        appenders = [(out[name].append, pos, int if name in ("open_time", "time") else float)
+                     for name, pos in positions.items()]
+        for row in rows:
+            for append, pos, conv in appenders:
+                append(conv(row[pos]))
+        for row in reader:
+            for append, pos, conv in appenders:
+                append(conv(row[pos]))
+    return Columns(**out)
+
+def load_klines(path: str) -> Columns:
+    """Columns open_time, open, high, low, close, volume."""
+    return _load(path, KLINE_FIELDS)
+
+def load_trades(path: str) -> Columns:
+    """Columns time, price, qty."""
+    return _load(path, TRADE_FIELDS)
+
+def run_backtest(client: SimulatedFuturesClient, symbol: str, klines: Columns, on_bar=None) -> dict:
+    """
+    Feed every bar to the simulator. `on_bar(client, index, close)` runs after each bar and may
+    place or cancel orders. Returns client.report(symbol) plus bar count and replay time.
+    """
+    start = time.perf_counter()
+    process = client.process_bar
+    for i, (t, o, h, l, c, v) in enumerate(zip(klines.open_time, klines.open, klines.high,
+                                                klines.low, klines.close, klines.volume)):
+        process(symbol, t, o, h, l, c, v)
+        if on_bar is not None:
+            on_bar(client, i, c)
+    report = client.report(symbol)
+    report.update(bars=len(klines), elapsed_seconds=time.perf_counter() - start)
+    return report
+
+def run_trades(client: SimulatedFuturesClient, symbol: str, trades: Columns, on_trade=None) -> dict:
+    start = time.perf_counter()
+    process = client.process_trade
+    for i, (t, p, q) in enumerate(zip(trades.time, trades.price, trades.qty)):
+        process(symbol, t, p, q)
+        if on_trade is not None:
+            on_trade(client, i, p)
+    report = client.report(symbol)
+    report.update(trades=len(trades), elapsed_seconds=time.perf_counter() - start)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay klines through the simulator with a static grid")
+    parser.add_argument("--klines", required=True)
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--grid", nargs=4, metavar=("LOWER", "UPPER", "LEVELS", "QTY"), required=True)
+    parser.add_argument("--participation", type=float, default=None)
+    args = parser.parse_args()
+    from advanced.grid_strategy import create_grid
+    klines = load_klines(args.klines)
+    client = SimulatedFuturesClient(participation=args.participation)
+    client.process_bar(args.symbol, klines.open_time[0], klines.open[0], klines.open[0], klines.open[0], klines.open[0])
+    lower, upper, levels, qty = float(args.grid[0]), float(args.grid[1]), int(args.grid[2]), float(args.grid[3])
+    create_grid(client, args.symbol, lower, upper, levels, qty)
+    report = run_backtest(client, args.symbol, klines)
+    for key, value in report.items():
+        print("%-16s %s" % (key, value))
+
+if __name__ == "__main__":
+    main()
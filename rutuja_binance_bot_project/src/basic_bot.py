@@ -12,30 +12,55 @@ from typing import Optional
 from binance.client import Client
 from binance.exceptions import BinanceAPIException, BinanceOrderException
 from .utils import setup_logger, validate_symbol, get_client
+from .rate_limiter import RequestScheduler, ScheduledClient, default_scheduler
+from .exchange_info import ExchangeInfoCache
+from .metrics import REGISTRY, MetricsRegistry, instrument_signing
+from .order_encoding import install_fast_signing
+from .risk import RiskEngine, RiskClient
 
 logger = setup_logger("logs/basic_bot.log")
 
 class BasicBot:
-    def __init__(self, api_key: str, api_secret: str, testnet: bool = True):
-        self.client = Client(api_key, api_secret)
-        if testnet:
+    def __init__(self, api_key: str, api_secret: str, testnet: bool = True, client: Optional[Client] = None,
+                 scheduler: Optional[RequestScheduler] = None, filters: Optional[ExchangeInfoCache] = None,
+                 metrics: Optional[MetricsRegistry] = None, risk: Optional[RiskEngine] = None):
+        # An already-built client (e.g. one pointed at a local stub) can be injected instead.
+        raw = client if client is not None else Client(api_key, api_secret)
+        if testnet and client is None:
             # Testnet base URL for USDT-M Futures (as required)
             try:
-                self.client.API_URL = "https://testnet.binancefuture.com"
+                raw.API_URL = "https://testnet.binancefuture.com"
             except Exception as e:
                 logger.exception("Failed to set testnet API URL: %s", e)
+        # All order calls share the rate-limit scheduler with every other client in the process.
+        self.client = raw if isinstance(raw, (ScheduledClient, RiskClient)) else ScheduledClient(raw, scheduler or default_scheduler())
+        # Pre-trade limits are checked before an order takes a rate-limit slot; see risk.py.
+        if risk is not None and not isinstance(self.client, RiskClient):
+            self.client = RiskClient(self.client, risk)
+        self.risk = risk if risk is not None else getattr(self.client, "risk", None)
+        # Symbol filters are fetched on first use and then served from the on-disk cache.
+        self.filters = filters if filters is not None else ExchangeInfoCache(self.client)
+        # Per-stage latency histograms (validation, signing, network, exchange, logging); see metrics.py.
+        self.metrics = metrics if metrics is not None else REGISTRY
+        # Precomputed HMAC signing (see order_encoding.py), wrapped by the signing-stage timer.
+        instrument_signing(install_fast_signing(raw))
         logger.info("BasicBot initialized (testnet=%s)", testnet)
 
     def place_market_order(self, symbol: str, side: str, quantity: float, recvWindow: int = 5000):
         symbol = symbol.upper()
-        side = side.upper()
-        validate_symbol(symbol)
-        if side not in ("BUY", "SELL"):
-            raise ValueError("side must be BUY or SELL")
+        t = self.metrics.order(symbol, "MARKET")
+        with t.stage("validation"):
+            side = side.upper()
+            f = validate_symbol(symbol, self.filters)
+            if side not in ("BUY", "SELL"):
+                raise ValueError("side must be BUY or SELL")
+            quantity, _ = f.snap(quantity, market=True)
         try:
-            logger.info("Placing MARKET order %s %s qty=%s", side, symbol, quantity)
-            res = self.client.futures_create_order(symbol=symbol, side=side, type="MARKET", quantity=quantity, recvWindow=recvWindow)
-            logger.info("Market order response: %s", res)
+            with t.stage("logging"):
+                logger.info("Placing MARKET order %s %s qty=%s", side, symbol, quantity)
+            res = t.send(self.client.futures_create_order, symbol=symbol, side=side, type="MARKET", quantity=quantity, recvWindow=recvWindow)
+            with t.stage("logging"):
+                logger.info("Market order response: %s", res)
             return res
         except (BinanceAPIException, BinanceOrderException) as e:
             logger.exception("Binance error placing market order: %s", e)
@@ -43,14 +68,19 @@ class BasicBot:
 
     def place_limit_order(self, symbol: str, side: str, price: float, quantity: float, timeInForce: str = "GTC"):
         symbol = symbol.upper()
-        side = side.upper()
-        validate_symbol(symbol)
-        if side not in ("BUY", "SELL"):
-            raise ValueError("side must be BUY or SELL")
+        t = self.metrics.order(symbol, "LIMIT")
+        with t.stage("validation"):
+            side = side.upper()
+            f = validate_symbol(symbol, self.filters)
+            if side not in ("BUY", "SELL"):
+                raise ValueError("side must be BUY or SELL")
+            quantity, price = f.snap(quantity, price)
         try:
-            logger.info("Placing LIMIT order %s %s qty=%s price=%s", side, symbol, quantity, price)
-            res = self.client.futures_create_order(symbol=symbol, side=side, type="LIMIT", timeInForce=timeInForce, price=str(price), quantity=quantity)
-            logger.info("Limit order response: %s", res)
+            with t.stage("logging"):
+                logger.info("Placing LIMIT order %s %s qty=%s price=%s", side, symbol, quantity, price)
+            res = t.send(self.client.futures_create_order, symbol=symbol, side=side, type="LIMIT", timeInForce=timeInForce, price=price, quantity=quantity)
+            with t.stage("logging"):
+                logger.info("Limit order response: %s", res)
             return res
         except (BinanceAPIException, BinanceOrderException) as e:
             logger.exception("Binance error placing limit order: %s", e)
@@ -58,12 +88,18 @@ class BasicBot:
 
     def place_stop_limit(self, symbol: str, side: str, stop_price: float, limit_price: float, quantity: float):
         symbol = symbol.upper()
-        side = side.upper()
-        validate_symbol(symbol)
+        t = self.metrics.order(symbol, "STOP")
+        with t.stage("validation"):
+            side = side.upper()
+            f = validate_symbol(symbol, self.filters)
+            quantity, limit_price = f.snap(quantity, limit_price)
+            stop_price = f.format_price(stop_price)
         try:
-            logger.info("Placing STOP-LIMIT order %s %s qty=%s stop=%s limit=%s", side, symbol, quantity, stop_price, limit_price)
-            res = self.client.futures_create_order(symbol=symbol, side=side, type="STOP", stopPrice=str(stop_price), price=str(limit_price), timeInForce="GTC", quantity=quantity)
-            logger.info("Stop-Limit response: %s", res)
+            with t.stage("logging"):
+                logger.info("Placing STOP-LIMIT order %s %s qty=%s stop=%s limit=%s", side, symbol, quantity, stop_price, limit_price)
+            res = t.send(self.client.futures_create_order, symbol=symbol, side=side, type="STOP", stopPrice=stop_price, price=limit_price, timeInForce="GTC", quantity=quantity)
+            with t.stage("logging"):
+                logger.info("Stop-Limit response: %s", res)
             return res
         except (BinanceAPIException, BinanceOrderException) as e:
             logger.exception("Binance error placing stop-limit: %s", e)
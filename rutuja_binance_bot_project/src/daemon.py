@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+daemon.py
+Resident bot process: one warm client (keep-alive HTTPS session, rate-limit scheduler), cached
+symbol filters, a TwapScheduler and the shared user-data stream, serving order, TWAP, grid and
+OCO commands as line-delimited JSON over a Unix socket (or TCP "host:port" on localhost).
+The order CLIs become thin clients with --daemon.
+Usage:
+    python src/daemon.py --api-key KEY --api-secret SECRET [--listen /tmp/binance_bot.sock] [--test] [--risk-config risk.json]
+    python src/market_orders.py --symbol BTCUSDT --side BUY --quantity 0.001 --daemon
+"""
+
+import argparse, json, os, signal, socketserver, threading, time, logging
+import requests
+from binance.exceptions import BinanceAPIException, BinanceOrderException, BinanceRequestException
+
+from utils import setup_logger, get_client
+from exchange_info import ExchangeInfoCache
+from daemon_client import DEFAULT_ADDRESS, parse_address
+from market_orders import market_order_params
+from limit_orders import limit_order_params
+from stop_limit_orders import stop_limit_params
+from advanced.twap import TwapScheduler
+from advanced.grid_strategy import create_grid_batch
+from advanced.oco import place_oco
+from advanced.oco_listener import get_user_stream
+from risk import RiskEngine
+from recorder import MarketDataRecorder
+from order_book import FUTURES_STREAM_BASE, FUTURES_TESTNET_STREAM_BASE
+
+logger = setup_logger("daemon.log")
+
+# requests.RequestException covers the connection drops and timeouts common against testnet.
+BINANCE_ERRORS = (BinanceAPIException, BinanceOrderException, BinanceRequestException, requests.RequestException)
+COMMAND_ERRORS = BINANCE_ERRORS + (ValueError, TypeError, KeyError)
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(self.server.bot.dispatch(line))
+
+class _TcpHandler(_Handler):
+    disable_nagle_algorithm = True
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+class _TcpServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class BotDaemon:
+    """
+    Holds the warm state and maps command names to handlers. Every handler takes keyword
+    arguments from the request's "args" and returns something JSON-serializable.
+    """
+    def __init__(self, client, address: str = DEFAULT_ADDRESS, filters=None, testnet: bool = False):
+        self.client = client
+        self.address = address
+        self.filters = filters if filters is not None else ExchangeInfoCache(client)
+        self.testnet = testnet
+        self.twap = TwapScheduler(client).start()
+        self.started = time.time()
+        self.served = 0
+        self.failed = 0
+        self._count_lock = threading.Lock()  # every connection thread updates served/failed
+        self._server = None
+        self.commands = {
+            "ping": self.ping, "status": self.status,
+            "market": self.market, "limit": self.limit, "stop_limit": self.stop_limit,
+            "twap": self.twap_submit, "twap_status": self.twap_status, "twap_pause": self.twap_pause,
+            "twap_resume": self.twap_resume, "twap_cancel": self.twap_cancel,
+            "grid": self.grid, "oco": self.oco, "risk": self.risk_status,
+        }
+
+    # ------------------------------------------------------------------ commands
+    def ping(self):
+        return {"pong": True}
+
+    def status(self):
+        out = {"uptime": time.time() - self.started, "served": self.served, "failed": self.failed,
+               "active_twaps": sorted(self.twap.active)}
+        scheduler = getattr(self.client, "scheduler", None)
+        if scheduler is not None:
+            out["rate_limits"] = scheduler.metrics()
+        risk = getattr(self.client, "risk", None)
+        if risk is not None:
+            out["risk"] = risk.status()
+        return out
+
+    def risk_status(self):
+        risk = getattr(self.client, "risk", None)
+        if risk is None:
+            raise ValueError("daemon was started without --risk-config")
+        return risk.status()
+
+    def _send(self, params: dict):
+        logger.info("Daemon placing %s %s %s qty=%s", params["type"], params["side"], params["symbol"], params["quantity"])
+        res = self.client.futures_create_order(**params)
+        logger.info("Order response: %s", res)
+        return res
+
+    def market(self, symbol, side, quantity):
+        return self._send(market_order_params(symbol, side, quantity, self.filters))
+
+    def limit(self, symbol, side, price, quantity, tif="GTC", post_only=False):
+        return self._send(limit_order_params(symbol, side, price, quantity, tif, self.filters, post_only=post_only))
+
+    def stop_limit(self, symbol, side, stop_price, limit_price, quantity):
+        return self._send(stop_limit_params(symbol, side, stop_price, limit_price, quantity, self.filters))
+
+    def twap_submit(self, symbol, side, total_qty, slices=10, interval_seconds=30, jitter=0.0):
+        execution = self.twap.submit(symbol, side, total_qty, slices, interval_seconds, jitter, filters=self.filters)
+        return {"execution": execution.id, "quantities": execution.quantities}
+
+    def _execution(self, execution):
+        try:
+            return self.twap.active[int(execution)]
+        except KeyError:
+            raise ValueError("no active TWAP #%s" % execution)
+
+    def twap_status(self, execution):
+        e = self._execution(execution)
+        return {"execution": e.id, "state": e.state, "sent": e.sent, "failed": e.failed,
+                "next_index": e.next_index, "slices": len(e.quantities)}
+
+    def twap_pause(self, execution):
+        self._execution(execution).pause()
+        return self.twap_status(execution)
+
+    def twap_resume(self, execution):
+        self._execution(execution).resume()
+        return self.twap_status(execution)
+
+    def twap_cancel(self, execution):
+        e = self._execution(execution)
+        e.cancel()
+        return {"execution": e.id, "state": e.state, "sent": e.sent}
+
+    def grid(self, symbol, lower, upper, grid_size, quantity, mode="arithmetic", mark_price=None):
+        return create_grid_batch(self.client, symbol, lower, upper, grid_size, quantity, filters=self.filters,
+                                 mode=mode, mark_price=mark_price)
+
+    def oco(self, symbol, side, quantity, tp_price, sl_price, listen=True):
+        res = place_oco(self.client, symbol, side, quantity, tp_price, sl_price, filters=self.filters)
+        if listen:
+            get_user_stream(self.client, self.testnet).add_oco(symbol, res["tp"]["orderId"], res["sl"]["orderId"])
+        return res
+
+    # ------------------------------------------------------------------ serving
+    def dispatch(self, line: bytes) -> bytes:
+        """Run one request line and return the reply line."""
+        try:
+            msg = json.loads(line)
+            handler = self.commands.get(msg.get("cmd"))
+            if handler is None:
+                raise ValueError("unknown command %r" % msg.get("cmd"))
+            reply = {"ok": True, "result": handler(**msg.get("args", {}))}
+            with self._count_lock:
+                self.served += 1
+        except COMMAND_ERRORS as e:
+            if isinstance(e, BINANCE_ERRORS):
+                logger.exception("Binance exception in daemon command: %s", e)
+            else:
+                logger.warning("Rejected daemon command: %s", e)
+            with self._count_lock:
+                self.failed += 1
+            reply = {"ok": False, "error": str(e)}
+        return json.dumps(reply, default=str).encode() + b"\n"
+
+    def _bind(self):
+        addr = parse_address(self.address)
+        if isinstance(addr, tuple):
+            if addr[0] not in ("127.0.0.1", "localhost", "::1"):
+                logger.warning("Daemon listening on %s:%d; anyone who can reach it can trade on this account", *addr)
+            server = _TcpServer(addr, _TcpHandler)
+        else:
+            if os.path.exists(addr):
+                os.unlink(addr)  # stale socket from a previous run
+            server = _UnixServer(addr, _Handler)
+            os.chmod(addr, 0o600)
+        server.bot = self
+        return server
+
+    def serve_forever(self):
+        self._server = self._bind()
+        logger.info("Daemon listening on %s", self.address)
+        try:
+            self._server.serve_forever(poll_interval=0.5)
+        finally:
+            self._server.server_close()
+
+    def start(self):
+        """Serve from a background thread (tests, benchmarks, embedding)."""
+        self._server = self._bind()
+        threading.Thread(target=self._server.serve_forever, name="bot-daemon", daemon=True).start()
+        return self
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self.twap.stop(wait=False)
+        addr = parse_address(self.address)
+        if not isinstance(addr, tuple) and os.path.exists(addr):
+            os.unlink(addr)
+
+def mark_stream(risk: RiskEngine, symbols, testnet: bool = False, **kwargs) -> MarketDataRecorder:
+    """
+    aggTrade stream (nothing recorded) that keeps the risk engine's marks current, so the price
+    band and notional checks of a long-running daemon do not use the startup mark. Not started.
+    """
+    stream = MarketDataRecorder(None, symbols, streams=("aggTrade",),
+                                stream_base=FUTURES_TESTNET_STREAM_BASE if testnet else FUTURES_STREAM_BASE, **kwargs)
+    stream.subscribe(risk.handle_market)
+    return stream
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident order daemon for the CLIs' --daemon mode")
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS, help="Unix socket path or host:port")
+    parser.add_argument("--api-key", required=False)
+    parser.add_argument("--api-secret", required=False)
+    parser.add_argument("--test", action="store_true", help="Use testnet")
+    parser.add_argument("--risk-config", help="JSON limits file; every order is checked against it (see risk.py)")
+    parser.add_argument("--mark-symbols", help="Comma-separated symbols to stream marks for with --risk-config "
+                                               "(default: symbols in the limits file or with positions/open orders)")
+    args = parser.parse_args()
+    risk = RiskEngine.from_config(args.risk_config) if args.risk_config else None
+    client = get_client(args.api_key, args.api_secret, test=args.test, risk=risk)
+    marks = None
+    if risk is not None:
+        # Loaded once over REST, then kept current from the user-data stream's fills and, for
+        # prices, from the aggTrade stream of every traded symbol.
+        risk.sync(client)
+        get_user_stream(client, args.test).subscribe(risk.handle_event, lambda: risk.sync(client))
+        symbols = args.mark_symbols.upper().split(",") if args.mark_symbols else risk.tracked_symbols()
+        if symbols:
+            marks = mark_stream(risk, symbols, args.test).start()
+        else:
+            logger.warning("No symbols to stream marks for; pass --mark-symbols, orders without a mark are rejected")
+    filters = ExchangeInfoCache(client)
+    filters.load()
+    bot = BotDaemon(client, args.listen, filters, testnet=args.test)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=bot.shutdown).start())
+    try:
+        bot.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Daemon shutting down")
+        bot.shutdown()
+    finally:
+        if marks is not None:
+            marks.stop()
+
+if __name__ == "__main__":
+    main()
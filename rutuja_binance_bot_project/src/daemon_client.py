@@ -0,0 +1,66 @@
+"""
+daemon_client.py
+Thin client for daemon.py: one JSON request per line over a Unix socket (or TCP "host:port").
+Kept free of binance / strategy imports so the CLIs' --daemon path starts quickly.
+"""
+
+import json, os, socket, tempfile
+
+DEFAULT_ADDRESS = os.environ.get("BINANCE_BOT_DAEMON", os.path.join(tempfile.gettempdir(), "binance_bot.sock"))
+
+class DaemonError(RuntimeError):
+    """The daemon rejected the command or the order failed; the message is the daemon's error."""
+
+def parse_address(address: str):
+    """A filesystem path for a Unix socket, or (host, port) for "host:port"."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return host or "127.0.0.1", int(port)
+    return address
+
+class DaemonClient:
+    """Persistent connection to the daemon; request() may be called any number of times."""
+    def __init__(self, address: str = DEFAULT_ADDRESS, timeout: float = 30.0):
+        addr = parse_address(address)
+        family = socket.AF_INET if isinstance(addr, tuple) else socket.AF_UNIX
+        self._sock = socket.socket(family, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(addr)
+        if family == socket.AF_INET:
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+
+    def request(self, cmd: str, **args):
+        self._sock.sendall(json.dumps({"cmd": cmd, "args": args}).encode() + b"\n")
+        line = self._file.readline()
+        if not line:
+            raise DaemonError("daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise DaemonError(reply.get("error", "unknown error"))
+        return reply.get("result")
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def request(cmd: str, address: str = DEFAULT_ADDRESS, timeout: float = 30.0, **args):
+    with DaemonClient(address, timeout) as client:
+        return client.request(cmd, **args)
+
+def run_via_daemon(address: str, cmd: str, **args) -> int:
+    """CLI helper: send one command, print the result, and return the process exit code."""
+    try:
+        res = request(cmd, address, **args)
+    except (DaemonError, OSError) as e:
+        print("Error placing order:", e)
+        return 1
+    print("Order placed. Response:")
+    print(res)
+    return 0
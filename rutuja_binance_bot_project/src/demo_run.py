@@ -8,7 +8,6 @@ This script does NOT call the real Binance API and is safe to run locally.
 
 import json, os, time
 from src.utils import setup_logger
-from PIL import Image, ImageDraw, ImageFont
 
 logger = setup_logger("logs/demo_run.log")
 
@@ -28,6 +27,7 @@ class DummyClient:
         return resp
 
 def make_screenshot(text, path):
+    from PIL import Image, ImageDraw, ImageFont  # only needed when screenshots are rendered
     # Simple image with text
     img = Image.new("RGB", (1000, 300), color=(255,255,255))
     d = ImageDraw.Draw(img)
@@ -0,0 +1,146 @@
+"""
+exchange_info.py
+Symbol-metadata cache built from the futures exchangeInfo endpoint.
+The raw response is stored on disk with a TTL and only fetched when a symbol is first looked up.
+Filters are indexed by symbol (dict lookup) and used to snap prices to tickSize and quantities
+to stepSize, and to enforce minQty/maxQty/minNotional before an order is sent.
+"""
+
+import json, os, time
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+from typing import Optional
+try:
+    from .order_encoding import SymbolFormat
+except ImportError:
+    from order_encoding import SymbolFormat
+
+DEFAULT_CACHE_PATH = "cache/futures_exchange_info.json"
+DEFAULT_TTL_SECONDS = 6 * 3600
+
+def _dec(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+def format_decimal(value: Decimal, exponent: Decimal) -> str:
+    """Fixed-point string with the precision of `exponent` (never scientific notation)."""
+    return format(value.quantize(exponent.normalize()), "f")
+
+class SymbolFilters:
+    """Trading rules for one symbol, parsed from its exchangeInfo entry."""
+    def __init__(self, info: dict):
+        self.symbol = info["symbol"]
+        self.status = info.get("status", "TRADING")
+        by_type = {f["filterType"]: f for f in info.get("filters", [])}
+        price = by_type.get("PRICE_FILTER", {})
+        lot = by_type.get("LOT_SIZE", {})
+        market_lot = by_type.get("MARKET_LOT_SIZE", lot)
+        self.tick_size = _dec(price.get("tickSize", "0.01"))
+        self.min_price = _dec(price.get("minPrice", "0"))
+        self.max_price = _dec(price.get("maxPrice", "0"))
+        self.step_size = _dec(lot.get("stepSize", "0.001"))
+        self.min_qty = _dec(lot.get("minQty", "0"))
+        self.max_qty = _dec(lot.get("maxQty", "0"))
+        self.market_step_size = _dec(market_lot.get("stepSize", self.step_size))
+        self.market_max_qty = _dec(market_lot.get("maxQty", self.max_qty))
+        notional = by_type.get("MIN_NOTIONAL", {})
+        self.min_notional = _dec(notional.get("notional", notional.get("minNotional", "0")))
+        # Decimal places of tickSize and of the (market) stepSize, worked out once per symbol.
+        self._format = SymbolFormat(self.tick_size, self.step_size)
+        self._market_format = SymbolFormat(self.tick_size, self.market_step_size)
+
+    def round_price(self, price) -> Decimal:
+        """Nearest multiple of tickSize."""
+        return (_dec(price) / self.tick_size).quantize(Decimal(1), rounding=ROUND_HALF_UP) * self.tick_size
+
+    def round_qty(self, qty, market: bool = False) -> Decimal:
+        """Largest multiple of stepSize not above `qty` (never sends more than asked)."""
+        step = self.market_step_size if market else self.step_size
+        return (_dec(qty) / step).quantize(Decimal(1), rounding=ROUND_DOWN) * step
+
+    def validate(self, qty: Decimal, price: Optional[Decimal] = None, market: bool = False):
+        max_qty = self.market_max_qty if market else self.max_qty
+        if qty <= 0 or qty < self.min_qty:
+            raise ValueError("%s quantity %s is below minQty %s" % (self.symbol, qty, self.min_qty))
+        if max_qty and qty > max_qty:
+            raise ValueError("%s quantity %s is above maxQty %s" % (self.symbol, qty, max_qty))
+        if price is not None:
+            if price < self.min_price or (self.max_price and price > self.max_price):
+                raise ValueError("%s price %s is outside [%s, %s]" % (self.symbol, price, self.min_price, self.max_price))
+            if self.min_notional and price * qty < self.min_notional:
+                raise ValueError("%s notional %s is below minNotional %s" % (self.symbol, price * qty, self.min_notional))
+
+    def snap(self, qty, price=None, market: bool = False):
+        """Round and validate an order; returns (quantity, price) as exchange-ready strings (price may be None)."""
+        q = self.round_qty(qty, market)
+        p = self.round_price(price) if price is not None else None
+        self.validate(q, p, market)
+        fmt = self._market_format if market else self._format
+        return fmt.qty(q), (fmt.price(p) if p is not None else None)
+
+    def format_price(self, price) -> str:
+        return self._format.price(self.round_price(price))
+
+def split_qty(total, parts: int, step) -> list:
+    """
+    Split `total` into `parts` multiples of `step` that add up exactly to total rounded down
+    to the step. The leftover steps go one each to the first slices.
+    """
+    step = _dec(step)
+    units = int((_dec(total) / step).to_integral_value(rounding=ROUND_DOWN))
+    base, extra = divmod(units, int(parts))
+    return [(base + (1 if i < extra else 0)) * step for i in range(int(parts))]
+
+class ExchangeInfoCache:
+    """
+    Lazily loaded, disk-backed map of symbol -> SymbolFilters.
+    The exchangeInfo payload is read from `path` if it is younger than `ttl` seconds, otherwise
+    fetched with client.futures_exchange_info() and written back to `path`.
+    """
+    def __init__(self, client=None, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL_SECONDS):
+        self.client = client
+        self.path = path
+        self.ttl = ttl
+        self._symbols = None
+        self._loaded_at = 0.0
+
+    def _read_disk(self):
+        try:
+            if time.time() - os.path.getmtime(self.path) > self.ttl:
+                return None
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, payload: dict):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp, self.path)
+
+    def load(self, force: bool = False):
+        payload = None if force else self._read_disk()
+        if payload is None:
+            if self.client is None:
+                raise RuntimeError("No fresh exchangeInfo at %s and no client to fetch it" % self.path)
+            payload = self.client.futures_exchange_info()
+            self._write_disk(payload)
+        self._symbols = {s["symbol"]: SymbolFilters(s) for s in payload.get("symbols", [])}
+        self._loaded_at = time.time()
+        return self
+
+    def get(self, symbol: str) -> SymbolFilters:
+        if self._symbols is None or time.time() - self._loaded_at > self.ttl:
+            self.load()
+        try:
+            return self._symbols[symbol]
+        except KeyError:
+            raise ValueError("Unknown futures symbol: %s" % symbol)
+
+    def __contains__(self, symbol: str) -> bool:
+        try:
+            self.get(symbol)
+            return True
+        except ValueError:
+            return False
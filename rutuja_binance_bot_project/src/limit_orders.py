@@ -9,25 +9,47 @@ Usage:
 import argparse
 import logging
 import sys
-from binance.client import Client
-from binance.exceptions import BinanceAPIException, BinanceOrderException
 
+import utils
 from utils import setup_logger, validate_symbol, get_client
+from exchange_info import ExchangeInfoCache
+from order_encoding import format_number
+from daemon_client import DEFAULT_ADDRESS, run_via_daemon
 
 logger = setup_logger("limit_orders.log")
 
-def place_limit_order(client, symbol: str, side: str, price: float, quantity: float, tif="GTC", test: bool=False):
+def limit_order_params(symbol: str, side: str, price: float, quantity: float, tif="GTC", filters=None,
+                       book=None, post_only: bool = False) -> dict:
+    """
+    Validate and snap a limit order and return the futures_create_order parameters.
+    post_only sends timeInForce GTX so the order is rejected instead of taking liquidity. With
+    a synced LocalOrderBook as `book`, price=None joins the touch (best bid for BUY, best ask for SELL).
+    """
     side = side.upper()
     if side not in ("BUY", "SELL"):
         raise ValueError("side must be BUY or SELL")
-    validate_symbol(symbol)
+    if price is None:
+        if book is None:
+            raise ValueError("price is required unless an order book is given")
+        price = book.touch(side)
+    if post_only:
+        tif = "GTX"
+    f = validate_symbol(symbol, filters)
+    quantity, price = f.snap(quantity, price) if f is not None else (quantity, format_number(price))
+    return dict(symbol=symbol, side=side, type="LIMIT", timeInForce=tif, quantity=quantity, price=price, reduceOnly=False,
+                newOrderRespType="RESULT", recvWindow=5000)
+
+def place_limit_order(client, symbol: str, side: str, price: float, quantity: float, tif="GTC", test: bool=False, filters=None,
+                      book=None, post_only: bool = False):
+    params = limit_order_params(symbol, side, price, quantity, tif, filters, book, post_only)
     try:
-        logger.info("Placing limit order: %s %s %s @%s", side, quantity, symbol, price)
-        res = client.futures_create_order(symbol=symbol, side=side, type="LIMIT", timeInForce=tif, quantity=quantity, price=str(price), reduceOnly=False, newOrderRespType="RESULT", recvWindow=5000)
+        logger.info("Placing limit order: %s %s %s @%s", params["side"], params["quantity"], symbol, params["price"])
+        res = client.futures_create_order(**params)
         logger.info("Order response: %s", res)
         print("Order placed. Response:")
         print(res)
-    except (BinanceAPIException, BinanceOrderException) as e:
+        return res
+    except (utils.BinanceAPIException, utils.BinanceOrderException) as e:
         logger.exception("Binance exception when placing limit order: %s", e)
         print("Error placing order:", e)
         sys.exit(1)
@@ -46,9 +68,17 @@ def main():
     parser.add_argument("--api-key", required=False)
     parser.add_argument("--api-secret", required=False)
     parser.add_argument("--test", action="store_true", help="Use testnet or test flag")
+    parser.add_argument("--daemon", nargs="?", const=DEFAULT_ADDRESS, metavar="ADDRESS", help="Send the order through a running daemon.py")
     args = parser.parse_args()
+    try:
+        limit_order_params(args.symbol, args.side, args.price, args.quantity, args.time_in_force)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.daemon:
+        sys.exit(run_via_daemon(args.daemon, "limit", symbol=args.symbol, side=args.side, price=args.price,
+                                quantity=args.quantity, tif=args.time_in_force))
     client = get_client(args.api_key, args.api_secret, test=args.test)
-    place_limit_order(client, args.symbol, args.side, args.price, args.quantity, tif=args.time_in_force, test=args.test)
+    place_limit_order(client, args.symbol, args.side, args.price, args.quantity, tif=args.time_in_force, test=args.test, filters=ExchangeInfoCache(client))
 
 if __name__ == "__main__":
     main()
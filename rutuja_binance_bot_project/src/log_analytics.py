@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+log_analytics.py
+Order-lifecycle, latency and error reports from the bot's rotating JSON logs.
+Each log is read together with its rotations, oldest first (name.5 ... name.1, name), plain or
+gzip-compressed, through a chain of generators: files -> lines -> records -> LogAnalyzer. Only
+lines that mention an order or an error code are JSON-decoded, and memory is bounded by the
+number of orders still open (capped by --max-open), not by the size of the logs.
+Reports:
+  - request -> response latency per order kind: a "Placing ..." line to the next
+    "... response: {...}" line on the same thread with a matching symbol and side;
+  - order lifecycles keyed by orderId: acknowledgement, user-stream status updates and the
+    final status, with the time from placement to a terminal status;
+  - errors grouped by Binance error code (APIError(code=...) and rejected batch entries).
+Grid and TWAP placements log the request but not the response; they count as placed with no
+latency sample. Latency needs the millisecond timestamps JsonFormatter writes; older
+second-resolution logs report it in whole seconds.
+Usage:
+    python src/log_analytics.py logs/ advanced_grid.log
+    python src/log_analytics.py logs/basic_bot.log --json --lifecycles lifecycles.jsonl
+"""
+
+import argparse, calendar, gzip, json, os, re
+from collections import deque
+try:
+    from .metrics import Histogram
+except ImportError:
+    from metrics import Histogram
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # orjson is optional; fall back to the stdlib decoder
+    _loads = json.loads
+
+TERMINAL_STATUSES = frozenset(("FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH"))
+MAX_OPEN = 100000                  # orders tracked at once; the oldest open one is dropped beyond it
+MAX_PENDING = 1024                 # unanswered requests kept per (log, thread)
+NS_PER_MS = 1000000
+
+# Cheap byte-level filter: every line the analyzer uses contains one of these.
+_INTERESTING = re.compile(rb"lacing|esponse|code|Order update|rejected")
+_ROTATED = re.compile(r"^(.*?)\.(\d+)$")
+_LOG_NAME = re.compile(r"\.log(\.\d+)?(\.gz)?$")
+
+_UPDATE = re.compile(r"Order update id=(\d+) status=(\w+)")
+_SIDE = re.compile(r"\b(BUY|SELL)\b")
+_SYMBOL = re.compile(r"\b([A-Z0-9]{2,}(?:USDT|USDC|BUSD|FDUSD|BTC|ETH|BNB))\b")
+_FIELD = re.compile(r"'(orderId|status|symbol|side|type|clientOrderId|code|msg)': ('(?:[^'\\]|\\.)*'|\"[^\"]*\"|[-\w.]+)")
+_CODE = re.compile(r"code'?[=:]\s*(-?\d+)")
+_API_MESSAGE = re.compile(r"APIError\(code=-?\d+\): ([^\n]*)|'msg': '((?:[^'\\]|\\.)*)'")
+# Order kind by request wording, first match wins ("Placing BUY at 100" is a grid level).
+_KINDS = ((re.compile(r"STOP-LIMIT|stop-limit"), "STOP_LIMIT"), (re.compile(r"\bMARKET\b|\bmarket\b"), "MARKET"),
+          (re.compile(r"\bLIMIT\b|\blimit\b"), "LIMIT"), (re.compile(r"\bTP\b"), "TAKE_PROFIT"),
+          (re.compile(r"\bSL\b"), "STOP_MARKET"), (re.compile(r"\bslice\b"), "TWAP_SLICE"),
+          (re.compile(r"[Pp]lacing (?:BUY|SELL) at\b"), "GRID"))
+
+def _rotation(path: str):
+    """(base name, rotation number) of a log file; the live file is rotation 0."""
+    name = path[:-3] if path.endswith(".gz") else path
+    m = _ROTATED.match(name)
+    return (m.group(1), int(m.group(2))) if m else (name, 0)
+
+def log_files(paths) -> list:
+    """
+    Every log file under `paths` with its rotations, grouped by base name and ordered oldest
+    first. A file path also picks up its rotations (name.1, name.2.gz, ...); a directory is
+    searched recursively for *.log, *.log.N and their .gz forms.
+    """
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.update(os.path.join(root, f) for f in files if _LOG_NAME.search(f))
+            continue
+        found.add(path)
+        folder, name = os.path.split(path)
+        try:
+            siblings = os.listdir(folder or ".")
+        except OSError:
+            continue
+        found.update(os.path.join(folder, f) for f in siblings
+                     if f.startswith(name + ".") and _rotation(f)[0] == name)
+    return sorted(found, key=lambda p: (_rotation(p)[0], -_rotation(p)[1], p.endswith(".gz")))
+
+def read_lines(path: str):
+    """Raw lines of one log file, decompressing .gz on the fly."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        yield from f
+
+def records(lines, stats: dict = None):
+    """Decoded JSON records from the lines that can matter to the report; the rest are only counted."""
+    search = _INTERESTING.search
+    n = size = 0
+    try:
+        for line in lines:
+            n += 1
+            size += len(line)
+            if search(line) is None:
+                continue
+            try:
+                rec = _loads(line)
+            except ValueError:
+                continue
+            if type(rec) is dict and "message" in rec:
+                yield rec
+    finally:
+        if stats is not None:
+            stats["lines"] = stats.get("lines", 0) + n
+            stats["bytes"] = stats.get("bytes", 0) + size
+
+class _Clock:
+    """ISO-8601 log timestamps to epoch milliseconds, parsing each distinct second once."""
+    __slots__ = ("_seconds",)
+
+    def __init__(self):
+        self._seconds = {}
+
+    def ms(self, ts: str):
+        if not ts or len(ts) < 19:
+            return None
+        has_ms = len(ts) > 23 and ts[19] == "."
+        key = ts[:19] + ts[23:] if has_ms else ts
+        base = self._seconds.get(key)
+        if base is None:
+            try:
+                zone = ts[23:] if has_ms else ts[19:]
+                offset = (int(zone[1:3]) * 3600 + int(zone[3:5]) * 60) * (-1 if zone[:1] == "-" else 1) if zone else 0
+                base = (calendar.timegm((int(ts[:4]), int(ts[5:7]), int(ts[8:10]), int(ts[11:13]), int(ts[14:16]),
+                                         int(ts[17:19]), 0, 0, 0)) - offset) * 1000
+            except ValueError:
+                return None
+            if len(self._seconds) >= 4096:     # logs move forward; old seconds are not coming back
+                self._seconds.clear()
+            self._seconds[key] = base
+        return base + int(ts[20:23]) if has_ms else base
+
+class Lifecycle:
+    """One order as reconstructed from the logs."""
+    __slots__ = ("order_id", "client_order_id", "symbol", "side", "kind", "log", "placed_ms", "acked_ms",
+                 "status", "statuses", "final_ms")
+
+    def __init__(self, order_id, log: str):
+        self.order_id = order_id
+        self.log = log
+        self.client_order_id = self.symbol = self.side = self.kind = None
+        self.placed_ms = self.acked_ms = self.final_ms = None
+        self.status = None
+        self.statuses = []
+
+    def to_dict(self) -> dict:
+        return {"orderId": self.order_id, "clientOrderId": self.client_order_id, "symbol": self.symbol,
+                "side": self.side, "kind": self.kind, "log": self.log, "placed_ms": self.placed_ms,
+                "acked_ms": self.acked_ms, "final_ms": self.final_ms, "status": self.status,
+                "statuses": self.statuses, "latency_ms": _diff(self.acked_ms, self.placed_ms),
+                "lifetime_ms": _diff(self.final_ms, self.placed_ms)}
+
+def _diff(a, b):
+    return a - b if a is not None and b is not None else None
+
+def _fields(payload: str) -> dict:
+    out = {}
+    for key, value in _FIELD.findall(payload):
+        out[key] = value[1:-1] if value[:1] in "'\"" else value
+    return out
+
+class LogAnalyzer:
+    """
+    Folds log records into counters, latency histograms and order lifecycles.
+    feed() takes one decoded record at a time; on_lifecycle, if given, is called with the
+    dict of every order that reaches a terminal status (and of those still open at finish()).
+    """
+    def __init__(self, max_open: int = MAX_OPEN, max_pending: int = MAX_PENDING, on_lifecycle=None):
+        self.max_open = max_open
+        self.max_pending = max_pending
+        self.on_lifecycle = on_lifecycle
+        self.clock = _Clock()
+        self.latency = {}                       # kind -> Histogram of request -> response (ns)
+        self.lifetime = Histogram("lifetime")   # placement -> terminal status (ns)
+        self.errors = {}                        # code -> {"count", "message", "first", "last"}
+        self.open = {}                          # orderId -> Lifecycle, oldest first
+        self.pending = {}                       # (log, thread) -> deque of unanswered requests
+        self.counts = {"requests": 0, "responses": 0, "unmatched_responses": 0, "no_response": 0,
+                       "failed": 0, "updates": 0, "evicted": 0, "open_at_end": 0}
+        self.final = {}
+        self.kinds = {}
+
+    def feed(self, rec: dict, log: str = ""):
+        message = rec["message"]
+        level = rec.get("level")
+        ms = self.clock.ms(rec.get("timestamp"))
+        thread = (log, rec.get("thread"))
+        if level in ("ERROR", "CRITICAL"):
+            self._error(rec, message, ms, thread)
+            return
+        # Plain substring tests first: most records are one of these three and a miss is cheap.
+        i = message.find("esponse: {")
+        if i > 0:
+            self._response(_fields(message[i + 9:]), ms, thread, log)
+        elif "lacing " in message:
+            self._request(message, ms, thread)
+        elif message.startswith("Order update id="):
+            m = _UPDATE.match(message)
+            if m is not None:
+                self._update(m.group(1), m.group(2), ms, log)
+
+    def _request(self, message: str, ms, thread):
+        kind = next((k for pattern, k in _KINDS if pattern.search(message)), "OTHER")
+        side = _SIDE.search(message)
+        symbol = _SYMBOL.search(message)
+        queue = self.pending.get(thread)
+        if queue is None:
+            queue = self.pending[thread] = deque()
+        elif len(queue) >= self.max_pending:
+            queue.popleft()
+            self.counts["no_response"] += 1
+        queue.append((ms, kind, symbol.group(1) if symbol else None, side.group(1) if side else None))
+        self.counts["requests"] += 1
+        self.kinds[kind] = self.kinds.get(kind, 0) + 1
+
+    def _match(self, thread, symbol, side):
+        """Oldest unanswered request on this thread whose symbol and side do not contradict the response."""
+        queue = self.pending.get(thread)
+        if not queue:
+            return None
+        for i, req in enumerate(queue):
+            if (symbol is None or req[2] is None or req[2] == symbol) and (side is None or req[3] is None or req[3] == side):
+                del queue[i]
+                return req
+        return None
+
+    def _response(self, fields: dict, ms, thread, log: str):
+        self.counts["responses"] += 1
+        req = self._match(thread, fields.get("symbol"), fields.get("side"))
+        if req is None:
+            self.counts["unmatched_responses"] += 1
+        elif ms is not None and req[0] is not None:
+            hist = self.latency.get(req[1])
+            if hist is None:
+                hist = self.latency[req[1]] = Histogram("request", order_type=req[1])
+            hist.record(max(0, ms - req[0]) * NS_PER_MS)
+        if "code" in fields and "orderId" not in fields:
+            self.counts["failed"] += 1
+            self._count_error(fields["code"], fields.get("msg"), ms)
+            return
+        order_id = fields.get("orderId")
+        if order_id is None:
+            return
+        lc = self._lifecycle(order_id, log)
+        lc.client_order_id = fields.get("clientOrderId", lc.client_order_id)
+        lc.symbol = fields.get("symbol") or lc.symbol or (req[2] if req else None)
+        lc.side = fields.get("side") or lc.side or (req[3] if req else None)
+        lc.kind = lc.kind or (req[1] if req else fields.get("type"))
+        if req is not None and lc.placed_ms is None:
+            lc.placed_ms = req[0]
+        lc.acked_ms = ms
+        self._status(lc, fields.get("status"), ms)
+
+    def _update(self, order_id: str, status: str, ms, log: str):
+        self.counts["updates"] += 1
+        self._status(self._lifecycle(order_id, log), status, ms)
+
+    def _lifecycle(self, order_id, log: str) -> Lifecycle:
+        lc = self.open.get(order_id)
+        if lc is None:
+            if len(self.open) >= self.max_open:
+                del self.open[next(iter(self.open))]
+                self.counts["evicted"] += 1
+            lc = self.open[order_id] = Lifecycle(order_id, log)
+        return lc
+
+    def _status(self, lc: Lifecycle, status, ms):
+        if status is None:
+            return
+        if not lc.statuses or lc.statuses[-1] != status:
+            lc.statuses.append(status)
+        lc.status = status
+        if status in TERMINAL_STATUSES:
+            lc.final_ms = ms
+            del self.open[lc.order_id]
+            self._finish(lc)
+
+    def _finish(self, lc: Lifecycle):
+        status = lc.status if lc.status in TERMINAL_STATUSES else "OPEN"
+        self.final[status] = self.final.get(status, 0) + 1
+        if lc.final_ms is not None and lc.placed_ms is not None:
+            self.lifetime.record(max(0, lc.final_ms - lc.placed_ms) * NS_PER_MS)
+        if self.on_lifecycle is not None:
+            self.on_lifecycle(lc.to_dict())
+
+    def _error(self, rec: dict, message: str, ms, thread):
+        text = message
+        m = _CODE.search(message)
+        if m is None and rec.get("exc_info"):
+            text = rec["exc_info"]
+            m = _CODE.search(text)
+        api = _API_MESSAGE.search(text)
+        detail = (api.group(1) or api.group(2)) if api else message.split("\n", 1)[0][:200]
+        self._count_error(m.group(1) if m else None, detail, ms)
+        # A failed placement answers the request it belongs to.
+        if "lacing" in message or "rejected" in message or "slice" in message:
+            queue = self.pending.get(thread)
+            if queue:
+                queue.popleft()
+            self.counts["failed"] += 1
+
+    def _count_error(self, code, message, ms):
+        key = int(code) if code is not None else "unknown"
+        entry = self.errors.get(key)
+        if entry is None:
+            entry = self.errors[key] = {"count": 0, "message": message, "first_ms": ms, "last_ms": ms}
+        entry["count"] += 1
+        entry["last_ms"] = ms
+
+    def finish(self):
+        """Close the books: requests never answered and orders never seen terminal."""
+        for queue in self.pending.values():
+            self.counts["no_response"] += len(queue)
+        self.pending.clear()
+        self.counts["open_at_end"] = len(self.open)
+        for lc in list(self.open.values()):
+            self._finish(lc)
+        self.open.clear()
+
+    def report(self) -> dict:
+        latency = {kind: _summary_ms(h) for kind, h in sorted(self.latency.items())}
+        errors = {str(code): entry for code, entry in
+                  sorted(self.errors.items(), key=lambda kv: -kv[1]["count"])}
+        return {"orders": dict(self.counts, by_kind=self.kinds, by_final_status=self.final),
+                "latency_ms": latency, "lifetime_ms": _summary_ms(self.lifetime), "errors": errors}
+
+def _summary_ms(hist: Histogram) -> dict:
+    s = hist.summary()
+    return {"count": s["count"], "mean": s["mean_us"] / 1e3, "p50": s["p50_us"] / 1e3,
+            "p90": s["p90_us"] / 1e3, "p99": s["p99_us"] / 1e3, "max": s["max_us"] / 1e3}
+
+def analyze(paths, on_lifecycle=None, max_open: int = MAX_OPEN) -> dict:
+    """Stream every log under `paths` through a LogAnalyzer and return its report."""
+    analyzer = LogAnalyzer(max_open=max_open, on_lifecycle=on_lifecycle)
+    stats = {}
+    files = log_files(paths)
+    for path in files:
+        log = _rotation(path)[0]
+        for rec in records(read_lines(path), stats):
+            analyzer.feed(rec, log)
+    analyzer.finish()
+    report = analyzer.report()
+    report["files"] = files
+    report["lines"] = stats.get("lines", 0)
+    report["bytes"] = stats.get("bytes", 0)
+    return report
+
+def format_report(report: dict) -> str:
+    o = report["orders"]
+    lines = ["%d files, %d lines, %.1f MB" % (len(report["files"]), report["lines"], report["bytes"] / 1e6),
+             "requests %d, responses %d (unmatched %d), no response %d, failed %d, status updates %d"
+             % (o["requests"], o["responses"], o["unmatched_responses"], o["no_response"], o["failed"], o["updates"]),
+             "by kind: " + (", ".join("%s %d" % kv for kv in sorted(o["by_kind"].items())) or "-"),
+             "final status: " + (", ".join("%s %d" % kv for kv in sorted(o["by_final_status"].items())) or "-"),
+             "", "%-12s %8s %9s %9s %9s %9s %9s" % ("latency ms", "count", "mean", "p50", "p90", "p99", "max")]
+    rows = list(report["latency_ms"].items()) + [("lifetime", report["lifetime_ms"])]
+    for kind, s in rows:
+        lines.append("%-12s %8d %9.1f %9.1f %9.1f %9.1f %9.1f" % (kind, s["count"], s["mean"], s["p50"], s["p90"], s["p99"], s["max"]))
+    lines += ["", "%-8s %8s  %s" % ("code", "count", "message")]
+    for code, e in report["errors"].items():
+        lines.append("%-8s %8d  %s" % (code, e["count"], e["message"]))
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Order lifecycles, latency and error codes from the bot's JSON logs")
+    parser.add_argument("paths", nargs="+", help="log files (rotations are picked up) or directories")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--lifecycles", help="write every reconstructed order to this JSONL file")
+    parser.add_argument("--max-open", type=int, default=MAX_OPEN, help="orders tracked at once before the oldest is dropped")
+    args = parser.parse_args()
+    out = open(args.lifecycles, "w") if args.lifecycles else None
+    try:
+        report = analyze(args.paths, (lambda lc: out.write(json.dumps(lc) + "\n")) if out else None, args.max_open)
+    finally:
+        if out is not None:
+            out.close()
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+if __name__ == "__main__":
+    main()
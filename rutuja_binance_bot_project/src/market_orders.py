@@ -9,29 +9,46 @@ Usage:
 import argparse
 import logging
 import sys
-from binance.client import Client
-from binance.exceptions import BinanceAPIException, BinanceOrderException
 
+import utils
 from utils import setup_logger, validate_symbol, get_client
+from exchange_info import ExchangeInfoCache
+from daemon_client import DEFAULT_ADDRESS, run_via_daemon
 
 logger = setup_logger("market_orders.log")
 
-def place_market_order(client, symbol: str, side: str, quantity: float, test: bool=False):
+def market_order_params(symbol: str, side: str, quantity: float, filters=None, book=None, max_slippage_bps: float = None) -> dict:
+    """
+    Validate and snap a market order and return the futures_create_order parameters.
+    With a synced LocalOrderBook as `book` and `max_slippage_bps`, the order is priced against
+    the local book first and refused (ValueError) if it would walk further than allowed or the
+    visible depth cannot fill it.
+    """
     side = side.upper()
     if side not in ("BUY", "SELL"):
         raise ValueError("side must be BUY or SELL")
-    validate_symbol(symbol)
+    f = validate_symbol(symbol, filters)
+    if f is not None:
+        quantity, _ = f.snap(quantity, market=True)
+    if book is not None and max_slippage_bps is not None:
+        est = book.estimate_market(side, float(quantity))
+        if est["filled"] < float(quantity) or est["slippage_bps"] > max_slippage_bps:
+            raise ValueError("%s %s %s would slip %.1f bps (filled %s of %s in the visible book), limit is %s bps"
+                             % (side, quantity, symbol, est["slippage_bps"], est["filled"], quantity, max_slippage_bps))
+        logger.info("Estimated slippage for %s %s %s: %.2f bps", side, quantity, symbol, est["slippage_bps"])
+    return dict(symbol=symbol, side=side, type="MARKET", quantity=quantity, newOrderRespType="RESULT", recvWindow=5000)
+
+def place_market_order(client, symbol: str, side: str, quantity: float, test: bool=False, filters=None,
+                       book=None, max_slippage_bps: float = None):
+    params = market_order_params(symbol, side, quantity, filters, book, max_slippage_bps)
     try:
-        if test:
-            logger.info("Placing test market order: %s %s %s", side, quantity, symbol)
-            res = client.futures_create_order(symbol=symbol, side=side, type="MARKET", quantity=quantity, newOrderRespType="RESULT", recvWindow=5000)
-        else:
-            logger.info("Placing market order: %s %s %s", side, quantity, symbol)
-            res = client.futures_create_order(symbol=symbol, side=side, type="MARKET", quantity=quantity, newOrderRespType="RESULT", recvWindow=5000)
+        logger.info("Placing %smarket order: %s %s %s", "test " if test else "", params["side"], params["quantity"], symbol)
+        res = client.futures_create_order(**params)
         logger.info("Order response: %s", res)
         print("Order placed. Response:")
         print(res)
-    except (BinanceAPIException, BinanceOrderException) as e:
+        return res
+    except (utils.BinanceAPIException, utils.BinanceOrderException) as e:
         logger.exception("Binance exception when placing market order: %s", e)
         print("Error placing order:", e)
         sys.exit(1)
@@ -48,9 +65,16 @@ def main():
     parser.add_argument("--api-key", required=False)
     parser.add_argument("--api-secret", required=False)
     parser.add_argument("--test", action="store_true", help="Use testnet or test flag")
+    parser.add_argument("--daemon", nargs="?", const=DEFAULT_ADDRESS, metavar="ADDRESS", help="Send the order through a running daemon.py")
     args = parser.parse_args()
+    try:
+        market_order_params(args.symbol, args.side, args.quantity)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.daemon:
+        sys.exit(run_via_daemon(args.daemon, "market", symbol=args.symbol, side=args.side, quantity=args.quantity))
     client = get_client(args.api_key, args.api_secret, test=args.test)
-    place_market_order(client, args.symbol, args.side, args.quantity, test=args.test)
+    place_market_order(client, args.symbol, args.side, args.quantity, test=args.test, filters=ExchangeInfoCache(client))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,314 @@
+"""
+metrics.py
+In-process latency instrumentation for the order paths. Samples go into HDR-style histograms
+(log-linear buckets: 64 linear sub-buckets per power of two, so every recorded nanosecond value
+is kept to within ~1.6%) keyed by (stage, symbol, order type). Recording appends the raw sample
+to a buffer; buffers are bucketed with NumPy in batches, which keeps a timed block under 1 µs.
+Stages recorded by BasicBot, TWAP, grid and OCO code: validation, signing, network, exchange,
+logging, plus schedule_lag (TwapScheduler) and stream (event time to receipt on the user stream). Custom strategies use timer()/timed() or OrderTimer. serve_metrics() exposes every
+histogram in the Prometheus text format.
+Usage:
+    from metrics import REGISTRY, serve_metrics
+    with REGISTRY.timer("signal", symbol="BTCUSDT"):
+        ...
+    serve_metrics(9108)            # curl localhost:9108/metrics
+"""
+
+import sys, threading, time
+import numpy as np
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUB_BITS = 6
+SUB = 1 << SUB_BITS
+MAX_SHIFT = 40                                 # top bucket starts at 2**46 ns (~19 hours)
+N_BUCKETS = (MAX_SHIFT + 2) * SUB
+FOLD_EVERY = 4096                              # raw samples buffered before they are bucketed
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+_now = time.perf_counter_ns
+
+def bucket_index(ns: int) -> int:
+    if ns < 2 * SUB:
+        return ns if ns > 0 else 0
+    shift = ns.bit_length() - SUB_BITS - 1
+    if shift > MAX_SHIFT:
+        return N_BUCKETS - 1
+    return (shift + 1) * SUB + (ns >> shift) - SUB
+
+def bucket_indices(ns: np.ndarray) -> np.ndarray:
+    """Vectorized bucket_index for an int64 array."""
+    ns = np.maximum(ns, 0)
+    _, exp = np.frexp(ns.astype(np.float64))   # exp == bit_length for values below 2**53
+    shift = np.maximum(exp.astype(np.int64) - SUB_BITS - 1, 0)
+    idx = np.where(ns < 2 * SUB, ns, (shift + 1) * SUB + np.right_shift(ns, shift) - SUB)
+    return np.minimum(idx, N_BUCKETS - 1)
+
+def bucket_value(index: int) -> int:
+    """Lowest value (ns) that falls in bucket `index`."""
+    if index < 2 * SUB:
+        return index
+    shift = index // SUB - 1
+    return (index % SUB + SUB) << shift
+
+class Histogram:
+    """
+    Nanosecond latency histogram. record() only appends to a buffer (list.append is atomic
+    under the GIL, so no lock); every FOLD_EVERY samples, and before any read, the buffer is
+    bucketed in one vectorized pass.
+    """
+    __slots__ = ("stage", "symbol", "order_type", "counts", "count", "total", "max", "_pending", "_lock")
+
+    def __init__(self, stage: str, symbol: str = "", order_type: str = ""):
+        self.stage = stage
+        self.symbol = symbol
+        self.order_type = order_type
+        self.counts = np.zeros(N_BUCKETS, dtype=np.int64)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def record(self, ns: int):
+        pending = self._pending
+        pending.append(ns)
+        if len(pending) >= FOLD_EVERY:
+            self.fold()
+
+    def fold(self):
+        """Bucket the buffered samples. Samples appended meanwhile stay queued for the next fold."""
+        with self._lock:
+            pending = self._pending
+            n = len(pending)
+            if not n:
+                return
+            values = np.array(pending[:n], dtype=np.int64)
+            del pending[:n]
+            self.counts += np.bincount(bucket_indices(values), minlength=N_BUCKETS)
+            self.count += n
+            self.total += int(values.sum())
+            self.max = max(self.max, int(values.max()))
+
+    def quantile(self, q: float) -> int:
+        """Value (ns) at quantile q: the lower edge of the bucket holding that rank."""
+        self.fold()
+        if not self.count:
+            return 0
+        rank = max(1, int(q * self.count + 0.5))
+        i = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(bucket_value(i), self.max)
+
+    def merge(self, other: "Histogram"):
+        other.fold()
+        self.fold()
+        with self._lock:
+            self.counts += other.counts
+            self.count += other.count
+            self.total += other.total
+            self.max = max(self.max, other.max)
+
+    def summary(self) -> dict:
+        """count, mean, max and QUANTILES in microseconds."""
+        self.fold()
+        out = {"stage": self.stage, "symbol": self.symbol, "type": self.order_type, "count": self.count,
+               "mean_us": self.total / self.count / 1e3 if self.count else 0.0, "max_us": self.max / 1e3}
+        for q in QUANTILES:
+            out["p%s_us" % ("%g" % (q * 100)).replace(".", "")] = self.quantile(q) / 1e3
+        return out
+
+class _Timer:
+    __slots__ = ("record", "start")
+
+    def __init__(self, hist: Histogram):
+        self.record = hist.record
+
+    def __enter__(self):
+        self.start = _now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record(_now() - self.start)
+        return False
+
+class _SigningTime(threading.local):
+    ns = 0
+
+# Time spent inside the client's request signing on this thread; instrument_signing() adds to it
+# so OrderTimer.send() can split a REST call into signing and network.
+_signing = _SigningTime()
+
+def instrument_signing(client):
+    """
+    Wrap a python-binance Client's _generate_signature (on the instance) so signing time is
+    attributed to the "signing" stage. Accepts a ScheduledClient and unwraps it. Idempotent.
+    """
+    raw = getattr(client, "_client", client)
+    sign = getattr(raw, "_generate_signature", None)
+    if sign is None or getattr(sign, "_timed", False):
+        return client
+
+    @wraps(sign)
+    def timed_sign(*args, **kwargs):
+        start = _now()
+        try:
+            return sign(*args, **kwargs)
+        finally:
+            _signing.ns += _now() - start
+    timed_sign._timed = True
+    raw._generate_signature = timed_sign
+    return client
+
+class OrderTimer:
+    """
+    Per-order stage recorder for one (symbol, order type):
+        t = REGISTRY.order("BTCUSDT", "LIMIT")
+        with t.stage("validation"): ...
+        res = t.send(client.futures_create_order, **params)
+    send() records "signing" (if instrument_signing() was applied), "network" (the rest of the
+    call, including any rate-limit queueing) and "exchange": the response's updateTime minus the
+    local send time, i.e. one-way latency plus matching. "exchange" relies on the local clock
+    agreeing with the server's (set REGISTRY.clock_offset_ms from futures_time()) and is
+    skipped when the difference falls outside the round trip.
+    """
+    __slots__ = ("registry", "symbol", "order_type", "_network")
+
+    def __init__(self, registry: "MetricsRegistry", symbol: str, order_type: str):
+        self.registry = registry
+        self.symbol = symbol
+        self.order_type = order_type
+        self._network = registry.histogram("network", symbol, order_type).record
+
+    def stage(self, name: str) -> _Timer:
+        return _Timer(self.registry.histogram(name, self.symbol, self.order_type))
+
+    def send(self, fn, *args, **kwargs):
+        signed_before = _signing.ns
+        sent_ms = time.time() * 1e3
+        start = _now()
+        try:
+            res = fn(*args, **kwargs)
+        finally:
+            elapsed = _now() - start
+            signing = _signing.ns - signed_before
+            if signing:
+                self.registry.histogram("signing", self.symbol, self.order_type).record(signing)
+            self._network(elapsed - signing)
+        if isinstance(res, dict) and res.get("updateTime"):
+            exchange = int((res["updateTime"] - sent_ms - self.registry.clock_offset_ms) * 1e6)
+            if 0 <= exchange <= elapsed:
+                self.registry.histogram("exchange", self.symbol, self.order_type).record(exchange)
+        return res
+
+class MetricsRegistry:
+    def __init__(self):
+        self._hists = {}
+        self._lock = threading.Lock()
+        self.clock_offset_ms = 0.0  # server time - local time, used by the "exchange" stage
+
+    def histogram(self, stage: str, symbol: str = "", order_type: str = "") -> Histogram:
+        key = (stage, symbol, order_type)
+        hist = self._hists.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._hists.setdefault(key, Histogram(stage, symbol, order_type))
+        return hist
+
+    def record(self, stage: str, ns: int, symbol: str = "", order_type: str = ""):
+        self.histogram(stage, symbol, order_type).record(ns)
+
+    def record_since_ms(self, stage: str, timestamp_ms: float, symbol: str = "", order_type: str = ""):
+        """Record the time since an exchange timestamp (ms, server clock); skipped if it looks negative."""
+        ns = int((time.time() * 1e3 + self.clock_offset_ms - timestamp_ms) * 1e6)
+        if ns >= 0:
+            self.histogram(stage, symbol, order_type).record(ns)
+
+    def timer(self, stage: str, symbol: str = "", order_type: str = "") -> _Timer:
+        """Context manager that records the time spent in its block. A timer may be created once
+        and re-entered any number of times from one thread, which halves the overhead."""
+        hist = self._hists.get((stage, symbol, order_type))
+        return _Timer(hist if hist is not None else self.histogram(stage, symbol, order_type))
+
+    def timed(self, stage: str, symbol: str = "", order_type: str = ""):
+        """Decorator form of timer()."""
+        def decorate(fn):
+            hist = self.histogram(stage, symbol, order_type)
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = _now()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    hist.record(_now() - start)
+            return wrapper
+        return decorate
+
+    def order(self, symbol: str, order_type: str) -> OrderTimer:
+        return OrderTimer(self, symbol, order_type)
+
+    def histograms(self) -> list:
+        with self._lock:
+            return list(self._hists.values())
+
+    def snapshot(self) -> list:
+        """summary() of every histogram with samples, sorted by stage, symbol and type."""
+        return sorted((s for s in (h.summary() for h in self.histograms()) if s["count"]),
+                      key=lambda s: (s["stage"], s["symbol"], s["type"]))
+
+    def reset(self):
+        with self._lock:
+            self._hists = {}
+
+    def render_prometheus(self, name: str = "binance_bot_latency_seconds") -> str:
+        """Every histogram as a Prometheus summary (quantiles, _sum, _count) in seconds."""
+        lines = ["# HELP %s Order path latency by stage." % name, "# TYPE %s summary" % name]
+        for h in sorted(self.histograms(), key=lambda h: (h.stage, h.symbol, h.order_type)):
+            h.fold()
+            if not h.count:
+                continue
+            labels = 'stage="%s",symbol="%s",type="%s"' % (_escape(h.stage), _escape(h.symbol), _escape(h.order_type))
+            for q in QUANTILES:
+                lines.append('%s{%s,quantile="%g"} %.9f' % (name, labels, q, h.quantile(q) / 1e9))
+            lines.append("%s_sum{%s} %.9f" % (name, labels, h.total / 1e9))
+            lines.append("%s_count{%s} %d" % (name, labels, h.count))
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _shared_registry() -> MetricsRegistry:
+    # This file is imported both as "metrics" (script-style, src/advanced) and "src.metrics"
+    # (BasicBot); both copies must feed one registry or a scrape would see only half the samples.
+    for name in ("metrics", "src.metrics"):
+        registry = getattr(sys.modules.get(name), "REGISTRY", None)
+        if registry is not None:
+            return registry
+    return MetricsRegistry()
+
+REGISTRY = _shared_registry()
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.server.registry.render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve_metrics(port: int = 9108, host: str = "127.0.0.1", registry: MetricsRegistry = None) -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread; returns the server (call shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry or REGISTRY
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
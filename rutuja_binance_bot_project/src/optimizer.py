@@ -0,0 +1,361 @@
+"""
+optimizer.py
+Parallel parameter sweeps for grid and TWAP strategies over historical klines. Every combination
+is replayed through SimulatedFuturesClient on a process pool using all cores. The klines, plus
+VWAP prefix sums computed once, sit in one shared-memory block that workers map instead of
+unpickling per task. Finished combinations are cached on disk, keyed by strategy, parameters,
+simulator settings and a fingerprint of the data, so widening a sweep only runs the new points.
+The ranked report carries net PnL, fill rate and slippage per combination.
+Usage:
+    python src/optimizer.py grid --klines BTCUSDT-1m-2024.csv --lower 58000 60000 --upper 70000 72000 \\
+        --grid-size 11 21 41 --quantity 0.001 --rearm 0 1
+    python src/optimizer.py twap --klines BTCUSDT-1m-2024.csv --side BUY --total-qty 2 \\
+        --slices 5 10 20 40 --interval-seconds 60 300 900 --windows 50
+"""
+
+import argparse, csv, hashlib, itertools, json, math, os, time, logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+from utils import setup_logger
+from simulator import SimulatedFuturesClient
+from backtest import load_klines
+from advanced.grid_strategy import create_grid
+from advanced.grid_planner import plan_grid
+from advanced.grid_engine import GridEngine
+
+logger = setup_logger("optimizer.log")
+
+SYMBOL = "BTCUSDT"
+COLUMNS = ("open_time", "open", "high", "low", "close", "volume")
+CHUNK_ROWS = 65536
+DEFAULT_CACHE = os.path.join("data", "optimizer_cache.jsonl")
+
+class SharedKlines:
+    """
+    Kline columns and cumulative (typical price * volume, volume) sums in one SharedMemory block:
+    a (6, n) float64 array followed by a (2, n + 1) one. create() copies the data in once;
+    attach(name, rows) maps the same pages in a worker without copying.
+    """
+    def __init__(self, shm: shared_memory.SharedMemory, rows: int, owner: bool):
+        self.shm = shm
+        self.rows = rows
+        self.owner = owner
+        data_bytes = len(COLUMNS) * rows * 8
+        self.data = np.ndarray((len(COLUMNS), rows), dtype=np.float64, buffer=shm.buf)
+        self.prefix = np.ndarray((2, rows + 1), dtype=np.float64, buffer=shm.buf, offset=data_bytes)
+        for i, name in enumerate(COLUMNS):
+            setattr(self, name, self.data[i])
+        self.bar_ms = max(int(np.median(np.diff(self.open_time[:1000]))), 1)
+
+    @classmethod
+    def create(cls, klines) -> "SharedKlines":
+        rows = len(klines)
+        if rows < 2:
+            raise ValueError("need at least two klines to sweep over")
+        shm = shared_memory.SharedMemory(create=True, size=(len(COLUMNS) * rows + 2 * (rows + 1)) * 8)
+        out = cls(shm, rows, owner=True)
+        for i, name in enumerate(COLUMNS):
+            out.data[i] = np.asarray(getattr(klines, name), dtype=np.float64)
+        typical = (out.high + out.low + out.close) / 3.0
+        out.prefix[:, 0] = 0.0
+        np.cumsum(typical * out.volume, out=out.prefix[0, 1:])
+        np.cumsum(out.volume, out=out.prefix[1, 1:])
+        out.bar_ms = max(int(np.median(np.diff(out.open_time[:1000]))), 1)
+        return out
+
+    @classmethod
+    def attach(cls, name: str, rows: int) -> "SharedKlines":
+        return cls(shared_memory.SharedMemory(name=name), rows, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def fingerprint(self) -> str:
+        return hashlib.blake2b(self.data.tobytes(), digest_size=16).hexdigest()
+
+    def vwap(self, start: int, end: int) -> float:
+        """Volume-weighted typical price of bars [start, end), O(1) from the prefix sums."""
+        volume = self.prefix[1, end] - self.prefix[1, start]
+        return float((self.prefix[0, end] - self.prefix[0, start]) / volume) if volume > 0 else float(self.close[end - 1])
+
+    def bars(self, start: int = 0, end: int = None):
+        """Yield (open_time, open, high, low, close, volume) as Python scalars, converted chunk by chunk."""
+        end = self.rows if end is None else end
+        for lo in range(start, end, CHUNK_ROWS):
+            hi = min(lo + CHUNK_ROWS, end)
+            yield from zip(self.open_time[lo:hi].astype(np.int64).tolist(), *(self.data[i, lo:hi].tolist()
+                                                                              for i in range(1, len(COLUMNS))))
+
+    def release(self):
+        # Not close(): that name is the close-price column. Views into the buffer must be gone
+        # before SharedMemory.close() can unmap it.
+        self.data = self.prefix = None
+        for name in COLUMNS:
+            setattr(self, name, None)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+# ---------------------------------------------------------------------- strategies
+def _seed(client, data: SharedKlines, index: int):
+    o = float(data.open[index])
+    client.process_bar(SYMBOL, int(data.open_time[index]), o, o, o, o)
+    return o
+
+def run_grid(data: SharedKlines, params: dict, sim: dict) -> dict:
+    """
+    params: lower, upper, grid_size, quantity, optional mode and rearm. Without rearm the grid is
+    create_grid's static one; with rearm a GridEngine places the opposite order on every fill.
+    """
+    client = SimulatedFuturesClient(**sim)
+    mark = _seed(client, data, 0)
+    lower, upper, size, qty = float(params["lower"]), float(params["upper"]), int(params["grid_size"]), float(params["quantity"])
+    mode = params.get("mode", "arithmetic")
+    engine = None
+    if params.get("rearm"):
+        engine = GridEngine(client, SYMBOL, plan_grid(lower, upper, size, mode, mark, quantity=qty)).attach(client).start()
+        placed = len(engine.client_ids)
+    else:
+        placed = sum(1 for res in create_grid(client, SYMBOL, lower, upper, size, qty, mode=mode, mark_price=mark)
+                     if isinstance(res, dict) and "code" not in res)
+    process = client.process_bar
+    for bar in data.bars():
+        process(SYMBOL, *bar)
+    if engine is not None:
+        placed += engine.rearmed
+    report = client.report(SYMBOL)
+    return {"net_pnl": report["net_pnl"], "realized_pnl": report["realized_pnl"], "unrealized_pnl": report["unrealized_pnl"],
+            "fees": report["fees"], "fills": report["fills"], "fill_rate": report["fills"] / placed if placed else 0.0,
+            "slippage_bps": report["slippage_bps"], "position": report["position"].get(SYMBOL, 0.0),
+            "open_orders": report["open_orders"]}
+
+def run_twap(data: SharedKlines, params: dict, sim: dict) -> dict:
+    """
+    params: slices, interval_seconds, side, total_qty and windows. The schedule is started at
+    `windows` evenly spaced bars; slice i is sent as a market order at the close of the bar
+    holding start + i * interval (slices closer together than one bar share that bar). Reports
+    the mean over windows of implementation shortfall against the arrival price (net_pnl, in
+    quote, fees included), slippage against the market VWAP of the window, and the fill rate.
+    """
+    slices, interval_ms = int(params["slices"]), int(float(params["interval_seconds"]) * 1000)
+    side, total = str(params.get("side", "BUY")).upper(), float(params.get("total_qty", 1.0))
+    if slices < 1 or interval_ms < 0:
+        raise ValueError("slices must be >= 1 and interval_seconds >= 0")
+    sign = 1 if side == "BUY" else -1
+    span = (slices - 1) * interval_ms // data.bar_ms + 1
+    if span >= data.rows:
+        raise ValueError("a %d x %ss schedule does not fit in the data" % (slices, params["interval_seconds"]))
+    windows = max(1, min(int(params.get("windows", 20)), data.rows - span))
+    starts = np.linspace(0, data.rows - span - 1, windows).astype(np.int64).tolist()
+    qty = total / slices
+    offsets = [i * interval_ms // data.bar_ms for i in range(slices)]
+    pnl, shortfall, vs_vwap, fill_rate, fees = [], [], [], [], []
+    for start in starts:
+        client = SimulatedFuturesClient(**sim)
+        arrival = _seed(client, data, start)
+        due = iter(offsets)
+        next_bar = next(due)
+        for k, bar in enumerate(data.bars(start, start + span)):
+            client.process_bar(SYMBOL, *bar)
+            while next_bar == k:
+                client.futures_create_order(symbol=SYMBOL, side=side, type="MARKET", quantity=qty)
+                next_bar = next(due, None)
+        report = client.report(SYMBOL)
+        filled = report["filled_qty"]
+        avg = report["notional"] / filled if filled else arrival
+        market = data.vwap(start, start + span)
+        pnl.append(sign * (arrival - avg) * filled - report["fees"])
+        shortfall.append(sign * (avg - arrival) / arrival * 1e4)
+        vs_vwap.append(sign * (avg - market) / market * 1e4)
+        fill_rate.append(filled / total)
+        fees.append(report["fees"])
+    return {"net_pnl": float(np.mean(pnl)), "shortfall_bps": float(np.mean(shortfall)),
+            "shortfall_std_bps": float(np.std(shortfall)), "slippage_bps": float(np.mean(vs_vwap)),
+            "fill_rate": float(np.mean(fill_rate)), "fees": float(np.mean(fees)), "windows": len(starts),
+            "duration_seconds": (slices - 1) * interval_ms / 1000.0}
+
+STRATEGIES = {"grid": run_grid, "twap": run_twap}
+
+# ---------------------------------------------------------------------- worker side
+_DATA = None
+
+def _attach(name: str, rows: int):
+    """Pool initializer: map the shared klines once per worker and keep the log quiet."""
+    global _DATA
+    _DATA = SharedKlines.attach(name, rows)
+    logging.getLogger("binance_bot").setLevel(logging.WARNING)
+
+def _evaluate(task) -> dict:
+    strategy, params, sim = task
+    try:
+        return STRATEGIES[strategy](_DATA, params, sim)
+    except ValueError as e:
+        # An impossible combination (e.g. lower >= upper) is a result, not a reason to stop the sweep.
+        return {"error": str(e)}
+
+# ---------------------------------------------------------------------- sweep
+def expand(space: dict) -> list:
+    """{"a": [1, 2], "b": 3} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}]"""
+    keys = list(space)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in space.values()]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+class ResultCache:
+    """Append-only JSON-lines file of {"key", "result"}; the whole file is read once on open."""
+    def __init__(self, path: str = DEFAULT_CACHE):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.results[entry["key"]] = entry["result"]
+        self.hits = 0
+
+    @staticmethod
+    def key(strategy: str, params: dict, sim: dict, fingerprint: str) -> str:
+        payload = json.dumps([strategy, params, sim, fingerprint], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def get(self, key: str):
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+        return result
+
+    def put_many(self, entries: list):
+        if not entries:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a") as f:
+            for key, result in entries:
+                self.results[key] = result
+                f.write(json.dumps({"key": key, "result": result}, default=str) + "\n")
+
+def sweep(strategy: str, klines, space: dict, sim: dict = None, workers: int = None, cache: ResultCache = None,
+          rank_by: str = "net_pnl", descending: bool = True) -> list:
+    """
+    Evaluate every combination of `space` and return rows (parameters merged with results)
+    ranked by `rank_by`; combinations that failed carry "error" and sort last. `workers=1`
+    runs in this process, which is easier to debug and profile.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError("strategy must be one of %s" % ", ".join(STRATEGIES))
+    sim = dict(sim or {})
+    combos = expand(space)
+    workers = workers or os.cpu_count() or 1
+    data = SharedKlines.create(klines)
+    started = time.perf_counter()
+    try:
+        fingerprint = data.fingerprint()
+        keys = [ResultCache.key(strategy, c, sim, fingerprint) for c in combos]
+        results = [cache.get(k) if cache is not None else None for k in keys]
+        todo = [i for i, r in enumerate(results) if r is None]
+        tasks = [(strategy, combos[i], sim) for i in todo]
+        logger.info("Sweeping %d %s combination(s) on %d bars: %d cached, %d to run on %d worker(s)",
+                    len(combos), strategy, data.rows, len(combos) - len(todo), len(todo), workers)
+        if tasks and workers == 1:
+            global _DATA
+            _DATA = data
+            log = logging.getLogger("binance_bot")
+            level = log.level
+            log.setLevel(logging.WARNING)
+            try:
+                computed = [_evaluate(t) for t in tasks]
+            finally:
+                _DATA = None
+                log.setLevel(level)
+        elif tasks:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(data.name, data.rows)) as pool:
+                computed = list(pool.map(_evaluate, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+        else:
+            computed = []
+        for i, result in zip(todo, computed):
+            results[i] = result
+        if cache is not None:
+            cache.put_many([(keys[i], r) for i, r in zip(todo, computed) if "error" not in r])
+    finally:
+        data.release()
+    logger.info("Sweep finished in %.2fs", time.perf_counter() - started)
+    return rank([dict(c, **r) for c, r in zip(combos, results)], rank_by, descending)
+
+def rank(rows: list, by: str = "net_pnl", descending: bool = True) -> list:
+    ok = [r for r in rows if "error" not in r]
+    failed = [r for r in rows if "error" in r]
+    ok.sort(key=lambda r: r.get(by, -math.inf if descending else math.inf), reverse=descending)
+    return ok + failed
+
+def write_report(rows: list, path: str):
+    """CSV for *.csv paths, JSON otherwise."""
+    if path.endswith(".csv"):
+        fields = list(dict.fromkeys(k for r in rows for k in r))
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fields)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w") as f:
+            json.dump(rows, f, indent=2, default=str)
+
+def format_report(rows: list, top: int = 20) -> str:
+    shown = rows[:top]
+    if not shown:
+        return "(no results)"
+    fields = list(dict.fromkeys(k for r in shown for k in r))
+    cell = lambda v: "%.4f" % v if isinstance(v, float) else str(v)
+    table = [fields] + [[cell(r.get(k, "")) for k in fields] for r in shown]
+    widths = [max(len(row[i]) for row in table) for i in range(len(fields))]
+    return "\n".join("  ".join(v.rjust(w) for v, w in zip(row, widths)) for row in table)
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep for grid and TWAP strategies")
+    parser.add_argument("strategy", choices=sorted(STRATEGIES))
+    parser.add_argument("--klines", required=True, help="CSV/Parquet klines (backtest.load_klines format)")
+    parser.add_argument("--lower", type=float, nargs="+")
+    parser.add_argument("--upper", type=float, nargs="+")
+    parser.add_argument("--grid-size", type=int, nargs="+")
+    parser.add_argument("--quantity", type=float, nargs="+")
+    parser.add_argument("--mode", nargs="+", default=["arithmetic"])
+    parser.add_argument("--rearm", type=int, nargs="+", default=[0])
+    parser.add_argument("--slices", type=int, nargs="+")
+    parser.add_argument("--interval-seconds", type=float, nargs="+")
+    parser.add_argument("--side", default="BUY")
+    parser.add_argument("--total-qty", type=float, default=1.0)
+    parser.add_argument("--windows", type=int, default=20)
+    parser.add_argument("--maker-fee", type=float, default=0.0002)
+    parser.add_argument("--taker-fee", type=float, default=0.0005)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument("--participation", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache", default=DEFAULT_CACHE, help="result cache file ('' to disable)")
+    parser.add_argument("--rank-by", default="net_pnl")
+    parser.add_argument("--ascending", action="store_true")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="write the full ranked report (.csv or .json)")
+    args = parser.parse_args()
+    if args.strategy == "grid":
+        if not (args.lower and args.upper and args.grid_size and args.quantity):
+            parser.error("grid needs --lower, --upper, --grid-size and --quantity")
+        space = {"lower": args.lower, "upper": args.upper, "grid_size": args.grid_size, "quantity": args.quantity,
+                 "mode": args.mode, "rearm": [bool(r) for r in args.rearm]}
+    else:
+        if not (args.slices and args.interval_seconds):
+            parser.error("twap needs --slices and --interval-seconds")
+        space = {"slices": args.slices, "interval_seconds": args.interval_seconds, "side": args.side.upper(),
+                 "total_qty": args.total_qty, "windows": args.windows}
+    sim = {"maker_fee": args.maker_fee, "taker_fee": args.taker_fee, "slippage_bps": args.slippage_bps,
+           "participation": args.participation}
+    cache = ResultCache(args.cache) if args.cache else None
+    rows = sweep(args.strategy, load_klines(args.klines), space, sim, args.workers, cache, args.rank_by, not args.ascending)
+    print(format_report(rows, args.top))
+    if cache is not None:
+        print("\n%d combination(s), %d from cache" % (len(rows), cache.hits))
+    if args.out:
+        write_report(rows, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+order_book.py
+Local L2 order book mirrored from a REST depth snapshot plus the futures diff-depth stream.
+Each side keeps a sorted price list (best price first) next to a price -> quantity dict, so the
+touch is O(1), depth at a price is O(1) and insert/remove is a bisect. Update ids are checked on
+every diff (U/u/pu); a gap marks the book unsynced and a fresh snapshot is loaded.
+Updates (the websocket thread) and queries (order helpers on other threads) share a per-book lock.
+DepthStream keeps one combined websocket for any number of symbols.
+"""
+
+import json, threading, time, logging
+from bisect import bisect_left, bisect_right
+from binance.exceptions import BinanceAPIException, BinanceRequestException
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import connect as ws_connect
+
+from utils import setup_logger
+
+logger = setup_logger("order_book.log")
+
+FUTURES_STREAM_BASE = "wss://fstream.binance.com/stream?streams="
+FUTURES_TESTNET_STREAM_BASE = "wss://stream.binancefuture.com/stream?streams="
+
+class OrderBookGap(ValueError):
+    """A diff does not continue the book's update-id sequence; the book needs a new snapshot."""
+
+class _Side:
+    def __init__(self, sign: int):
+        self.sign = sign  # 1 for asks (ascending prices), -1 for bids (descending prices)
+        self.keys = []    # sign * price, ascending, so keys[0] is always the best level
+        self.qty = {}
+
+    def clear(self):
+        self.keys = []
+        self.qty = {}
+
+    def set(self, price: float, qty: float):
+        if qty == 0.0:
+            if self.qty.pop(price, None) is not None:
+                del self.keys[bisect_left(self.keys, self.sign * price)]
+        else:
+            if price not in self.qty:
+                key = self.sign * price
+                self.keys.insert(bisect_left(self.keys, key), key)
+            self.qty[price] = qty
+
+    def best(self):
+        if not self.keys:
+            return None
+        price = self.sign * self.keys[0]
+        return price, self.qty[price]
+
+    def levels(self, n: int = None):
+        keys = self.keys if n is None else self.keys[:n]
+        return [(self.sign * k, self.qty[self.sign * k]) for k in keys]
+
+    def cumulative(self, price: float) -> float:
+        """Quantity resting at `price` or better."""
+        end = bisect_right(self.keys, self.sign * price)
+        sign, qty = self.sign, self.qty
+        return sum(qty[sign * k] for k in self.keys[:end])
+
+class LocalOrderBook:
+    """
+    L2 book for one symbol. load_snapshot() takes a futures_order_book response; apply_diff()
+    takes a depthUpdate event and raises OrderBookGap when the sequence breaks.
+    """
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = _Side(-1)
+        self.asks = _Side(1)
+        self.last_update_id = None
+        self.synced = False
+        self.event_time = None
+        self.updates = 0
+        self._first = True
+        self._lock = threading.RLock()
+
+    def reset(self):
+        with self._lock:
+            self.bids.clear()
+            self.asks.clear()
+            self.last_update_id = None
+            self.synced = False
+            self._first = True
+
+    def load_snapshot(self, snapshot: dict):
+        with self._lock:
+            self.reset()
+            for price, qty in snapshot["bids"]:
+                self.bids.set(float(price), float(qty))
+            for price, qty in snapshot["asks"]:
+                self.asks.set(float(price), float(qty))
+            self.last_update_id = int(snapshot["lastUpdateId"])
+            self.synced = True
+
+    def apply_diff(self, event: dict) -> bool:
+        """
+        Apply one depthUpdate. Returns False for events older than the snapshot (dropped).
+        The first applied event must straddle the snapshot id (U <= lastUpdateId <= u); after
+        that every event's pu must equal the previous u.
+        """
+        with self._lock:
+            return self._apply_diff(event)
+
+    def _apply_diff(self, event: dict) -> bool:
+        if self.last_update_id is None:
+            raise OrderBookGap("%s: no snapshot loaded" % self.symbol)
+        first_id, final_id = event["U"], event["u"]
+        if final_id < self.last_update_id:
+            return False
+        if self._first:
+            if first_id > self.last_update_id:
+                self.synced = False
+                raise OrderBookGap("%s: snapshot %d is older than diff %d" % (self.symbol, self.last_update_id, first_id))
+        elif event.get("pu") != self.last_update_id:
+            self.synced = False
+            raise OrderBookGap("%s: expected pu=%d, got %s" % (self.symbol, self.last_update_id, event.get("pu")))
+        bids, asks = self.bids.set, self.asks.set
+        for price, qty in event["b"]:
+            bids(float(price), float(qty))
+        for price, qty in event["a"]:
+            asks(float(price), float(qty))
+        self.last_update_id = final_id
+        self.event_time = event.get("E")
+        self.updates += 1
+        self._first = False
+        return True
+
+    def _require_synced(self):
+        if not self.synced:
+            raise ValueError("order book for %s is not synced" % self.symbol)
+
+    def best_bid(self):
+        """(price, qty) or None."""
+        with self._lock:
+            self._require_synced()
+            return self.bids.best()
+
+    def best_ask(self):
+        with self._lock:
+            self._require_synced()
+            return self.asks.best()
+
+    def mid(self) -> float:
+        with self._lock:
+            bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            raise ValueError("order book for %s has an empty side" % self.symbol)
+        return (bid[0] + ask[0]) / 2
+
+    def depth_at(self, side: str, price: float) -> float:
+        """Quantity resting at exactly `price` on the bid ("BUY") or ask ("SELL") side."""
+        with self._lock:
+            self._require_synced()
+            return self._side(side).qty.get(float(price), 0.0)
+
+    def depth(self, side: str, levels: int = 10):
+        """Best `levels` (price, qty) pairs of one side, best first."""
+        with self._lock:
+            self._require_synced()
+            return self._side(side).levels(levels)
+
+    def cumulative_depth(self, side: str, price: float) -> float:
+        """Quantity resting at `price` or better on one side."""
+        with self._lock:
+            self._require_synced()
+            return self._side(side).cumulative(float(price))
+
+    def touch(self, side: str) -> float:
+        """Price a post-only order joins: best bid for BUY, best ask for SELL."""
+        level = (self.best_bid() if side.upper() == "BUY" else self.best_ask())
+        if level is None:
+            raise ValueError("order book for %s has no %s side" % (self.symbol, "bid" if side.upper() == "BUY" else "ask"))
+        return level[0]
+
+    def estimate_market(self, side: str, qty: float) -> dict:
+        """
+        Walk the opposite side for a market order of `qty`. Returns average and worst fill price,
+        the filled quantity (less than qty when the book is too thin) and slippage in bps vs the touch.
+        """
+        book = self.asks if side.upper() == "BUY" else self.bids
+        remaining, cost, worst = float(qty), 0.0, None
+        with self._lock:
+            self._require_synced()
+            for key in book.keys:
+                price = book.sign * key
+                take = min(remaining, book.qty[price])
+                cost += take * price
+                remaining -= take
+                worst = price
+                if remaining <= 0:
+                    break
+            touch = book.sign * book.keys[0] if book.keys else None
+        filled = float(qty) - max(remaining, 0.0)
+        if not filled:
+            raise ValueError("order book for %s has no liquidity on the %s side" % (self.symbol, "ask" if book is self.asks else "bid"))
+        avg = cost / filled
+        return {"avg_price": avg, "worst_price": worst, "filled": filled, "touch": touch,
+                "slippage_bps": abs(avg - touch) / touch * 1e4}
+
+    def _side(self, side: str) -> _Side:
+        side = side.upper()
+        if side not in ("BUY", "SELL"):
+            raise ValueError("side must be BUY or SELL")
+        return self.bids if side == "BUY" else self.asks
+
+class DepthStream:
+    """
+    Mirrors the order books of `symbols` from one combined diff-depth websocket. A symbol's
+    snapshot is fetched when its first diff arrives (so the socket has already buffered newer
+    events) and again after any gap or reconnect.
+    """
+    def __init__(self, client, symbols, stream_base: str = FUTURES_STREAM_BASE, speed: str = "100ms",
+                 snapshot_limit: int = 1000, connect=ws_connect, backoff_initial: float = 1.0, backoff_max: float = 60.0):
+        self.client = client
+        self.books = {s.upper(): LocalOrderBook(s.upper()) for s in symbols}
+        self.url = stream_base + "/".join("%s@depth@%s" % (s.lower(), speed) for s in self.books)
+        self.snapshot_limit = snapshot_limit
+        self._connect = connect
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self._stop = threading.Event()
+        self._thread = None
+        self._ws = None
+        self.resyncs = 0
+
+    def __getitem__(self, symbol: str) -> LocalOrderBook:
+        return self.books[symbol.upper()]
+
+    def _snapshot(self, book: LocalOrderBook):
+        self.resyncs += 1
+        logger.info("Loading depth snapshot for %s", book.symbol)
+        book.load_snapshot(self.client.futures_order_book(symbol=book.symbol, limit=self.snapshot_limit))
+
+    def on_message(self, msg: dict):
+        data = msg.get("data", msg)
+        if data.get("e") != "depthUpdate":
+            return
+        book = self.books.get(data.get("s"))
+        if book is None:
+            return
+        if book.last_update_id is None:
+            self._snapshot(book)
+        try:
+            book.apply_diff(data)
+        except OrderBookGap as e:
+            logger.warning("%s; resyncing", e)
+            book.reset()
+
+    def _run(self):
+        backoff = self.backoff_initial
+        while not self._stop.is_set():
+            try:
+                with self._connect(self.url) as ws:
+                    self._ws = ws
+                    for book in self.books.values():
+                        book.reset()
+                    logger.info("Depth stream connected for %s", ", ".join(self.books))
+                    backoff = self.backoff_initial
+                    while not self._stop.is_set():
+                        try:
+                            raw = ws.recv(timeout=1.0)
+                        except TimeoutError:
+                            continue
+                        self.on_message(json.loads(raw))
+            except (ConnectionClosed, OSError, BinanceAPIException, BinanceRequestException, ValueError) as e:
+                if self._stop.is_set():
+                    break
+                logger.warning("Depth stream dropped (%s); reconnecting in %.1fs", e, backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.backoff_max)
+            finally:
+                self._ws = None
+                for book in self.books.values():
+                    book.synced = False
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="depth-stream", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_synced(self, timeout: float = 10.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while not all(b.synced for b in self.books.values()):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
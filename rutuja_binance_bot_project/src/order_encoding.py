@@ -0,0 +1,171 @@
+"""
+order_encoding.py
+Fast path for building and signing order payloads.
+HmacSha256 hashes the key's inner and outer pads once and copies those two SHA-256 states for
+every signature instead of re-deriving them in hmac.new. format_number() turns order values into
+canonical exchange strings: never "1e-05", never a 17-digit float tail, lowercase booleans.
+SymbolFormat formats prices and quantities at the fixed precision of one symbol's tickSize and
+stepSize; SymbolFilters.snap/format_price (exchange_info.py) write their output through it.
+OrderEncoder builds the signed query string in a single join over the params, and
+install_fast_signing() gives a python-binance Client the same treatment in place.
+Usage:
+    enc = OrderEncoder(api_secret)
+    body = enc.sign({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "price": 30000.1, "quantity": 0.001})
+"""
+
+import hashlib, math, re, time
+from decimal import Decimal
+from urllib.parse import quote
+
+# Binance futures accepts at most 8 decimals; floats that would need more are rounded to 8
+# (and refused if that leaves zero).
+MAX_DECIMALS = 8
+
+# Characters that can go into a query string value without percent-encoding.
+_UNSAFE = re.compile(r"[^A-Za-z0-9._~\-]")
+
+# A number in scientific notation ("1E-7", "-2.5e+3"); other strings containing "e" are not touched.
+_SCIENTIFIC = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)[eE][+-]?\d+")
+
+class HmacSha256:
+    """HMAC-SHA256 with the key schedule precomputed; hexdigest(msg) equals hmac.new(key, msg, sha256).hexdigest()."""
+    __slots__ = ("_inner", "_outer")
+
+    def __init__(self, key):
+        key = key.encode("utf-8") if isinstance(key, str) else bytes(key)
+        if len(key) > 64:
+            key = hashlib.sha256(key).digest()
+        key = key.ljust(64, b"\0")
+        self._inner = hashlib.sha256(bytes(b ^ 0x36 for b in key))
+        self._outer = hashlib.sha256(bytes(b ^ 0x5C for b in key))
+
+    def hexdigest(self, message: bytes) -> str:
+        inner = self._inner.copy()
+        inner.update(message)
+        outer = self._outer.copy()
+        outer.update(inner.digest())
+        return outer.hexdigest()
+
+def format_number(value) -> str:
+    """
+    Canonical string for an order parameter. Strings pass through unless they are numbers in
+    scientific notation; floats use their shortest repr unless it has an exponent or more than
+    MAX_DECIMALS decimals; Decimals are written in fixed point; bools become "true"/"false". A
+    non-zero float that rounds to zero at MAX_DECIMALS raises ValueError instead of being sent
+    as "0.0".
+    """
+    t = type(value)
+    if t is str:
+        return format(Decimal(value), "f") if _SCIENTIFIC.fullmatch(value) else value
+    if t is int:
+        return str(value)
+    if t is bool:
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError("%r is not a finite number" % value)
+        s = repr(float(value))
+        if "e" in s or len(s) - s.index(".") > MAX_DECIMALS + 1:
+            s = ("%.*f" % (MAX_DECIMALS, value)).rstrip("0")
+            if s.endswith("."):
+                if value and float(s) == 0.0:
+                    raise ValueError("%r rounds to zero at %d decimals" % (value, MAX_DECIMALS))
+                s += "0"
+        return s
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    return str(value)
+
+def _decimals(size) -> int:
+    exponent = Decimal(str(size)).normalize().as_tuple().exponent
+    return max(0, -exponent)
+
+class SymbolFormat:
+    """
+    Fixed-precision price/quantity strings for one symbol: prices get as many decimals as
+    tickSize, quantities as many as stepSize. Values are rounded half-even, not snapped to the
+    tick (that is SymbolFilters.snap's job).
+    """
+    __slots__ = ("price_decimals", "qty_decimals", "_price_quantum", "_qty_quantum")
+
+    def __init__(self, tick_size, step_size):
+        self.price_decimals = _decimals(tick_size)
+        self.qty_decimals = _decimals(step_size)
+        self._price_quantum = Decimal(1).scaleb(-self.price_decimals)
+        self._qty_quantum = Decimal(1).scaleb(-self.qty_decimals)
+
+    def price(self, value) -> str:
+        return self._format(value, self.price_decimals, self._price_quantum)
+
+    def qty(self, value) -> str:
+        return self._format(value, self.qty_decimals, self._qty_quantum)
+
+    @staticmethod
+    def _format(value, decimals: int, quantum: Decimal) -> str:
+        if type(value) is float or type(value) is int:
+            # printf rounds the exact binary value half-even, the same as Decimal(value).quantize().
+            return "%.*f" % (decimals, value)
+        value = value if isinstance(value, Decimal) else Decimal(str(value))
+        return format(value.quantize(quantum), "f")
+
+class OrderEncoder:
+    """
+    Builds canonical, signed request bodies for the futures REST API.
+    Params are encoded in the order given (Binance verifies the signature over the string as
+    sent, not over a sorted form); None values are skipped and every value goes through
+    format_number(). Values are percent-encoded only when they contain unsafe characters.
+    """
+    def __init__(self, api_secret, time_offset_ms: int = 0):
+        self.signer = HmacSha256(api_secret)
+        self.time_offset_ms = time_offset_ms
+
+    def query(self, params: dict) -> str:
+        parts = []
+        for key, value in params.items():
+            if value is None:
+                continue
+            value = value if type(value) is str else format_number(value)
+            if _UNSAFE.search(value):
+                value = quote(value, safe="")
+            parts.append(key + "=" + value)
+        return "&".join(parts)
+
+    def sign(self, params: dict, timestamp: int = None) -> str:
+        """query(params) plus timestamp and signature, ready to send as the request body."""
+        if timestamp is None:
+            timestamp = int(time.time() * 1000) + self.time_offset_ms
+        query = self.query(params)
+        query = (query + "&timestamp=%d" % timestamp) if query else "timestamp=%d" % timestamp
+        return query + "&signature=" + self.signer.hexdigest(query.encode("utf-8"))
+
+def _order_params(data: dict) -> list:
+    """python-binance's Client._order_params with canonical value formatting: sorted by key, None dropped, signature last."""
+    params = [(k, v if type(v) is str else format_number(v)) for k, v in data.items() if v is not None and k != "signature"]
+    params.sort()
+    signature = data.get("signature")
+    if signature is not None:
+        params.append(("signature", signature))
+    return params
+
+def install_fast_signing(client):
+    """
+    Replace a python-binance Client's _order_params and _generate_signature (on the instance)
+    with the precomputed-HMAC versions above. Accepts wrapped clients (ScheduledClient,
+    RiskClient) and unwraps them; a no-op for clients that do not sign (the simulator) and when
+    already installed. Apply before metrics.instrument_signing() so signing stays timed.
+    """
+    raw = client
+    while "_client" in getattr(raw, "__dict__", {}):
+        raw = raw.__dict__["_client"]
+    sign = getattr(raw, "_generate_signature", None)
+    secret = getattr(raw, "API_SECRET", None)
+    if sign is None or not secret or getattr(sign, "_fast", False) or getattr(sign, "_timed", False):
+        return client
+    signer = HmacSha256(secret)
+
+    def generate_signature(data: dict) -> str:
+        return signer.hexdigest("&".join([k + "=" + v for k, v in _order_params(data)]).encode("utf-8"))
+    generate_signature._fast = True
+    raw._order_params = _order_params
+    raw._generate_signature = generate_signature
+    return client
@@ -0,0 +1,239 @@
+"""
+order_journal.py
+Embedded order journal (SQLite, WAL mode) so TWAP and OCO runs can be resumed after a crash.
+Every order gets a deterministic newClientOrderId (run id + slot). The intent row is written
+before submission and the exchange response or error after it. Writes are queued and committed
+by one background thread in batches, so journaling costs the order thread microseconds. On
+restart, reconcile() asks the exchange about every slot the journal cannot prove finished.
+"""
+
+import atexit, hashlib, json, os, queue, sqlite3, threading, time, logging
+from binance.exceptions import BinanceAPIException
+
+try:
+    from .utils import setup_logger
+except ImportError:
+    from utils import setup_logger
+
+logger = setup_logger("order_journal.log")
+
+DEFAULT_JOURNAL_PATH = "state/orders.sqlite3"
+
+# MISSING: the exchange has never seen the id, so the slot may be sent again with it.
+INTENT, ACKED, REJECTED, MISSING = "INTENT", "ACKED", "REJECTED", "MISSING"
+UNKNOWN_ORDER_CODE = -2013  # "Order does not exist."
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY, kind TEXT, params TEXT, status TEXT, created REAL, updated REAL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    client_order_id TEXT PRIMARY KEY, run_id TEXT, slot INTEGER, symbol TEXT, params TEXT,
+    status TEXT, order_id INTEGER, exchange_status TEXT, response TEXT, error TEXT,
+    created REAL, updated REAL
+);
+CREATE INDEX IF NOT EXISTS orders_run ON orders (run_id, slot);
+"""
+
+def client_order_id(run_id: str, slot: int) -> str:
+    """Deterministic newClientOrderId for one slot of a run (Binance allows 36 characters)."""
+    cid = "%s-%d" % (run_id, slot)
+    if len(cid) > 36:
+        raise ValueError("client order id %r is longer than 36 characters" % cid)
+    return cid
+
+def make_run_id(kind: str, params: dict) -> str:
+    """Short id for a new run: a prefix of the strategy kind plus a hash of params and start time."""
+    digest = hashlib.sha1(("%s|%s|%r" % (kind, json.dumps(params, sort_keys=True, default=str), time.time())).encode()).hexdigest()
+    return "%s%s" % (kind[:4], digest[:12])
+
+_FLUSH, _STOP = object(), object()  # writer-queue markers
+
+class OrderJournal:
+    """
+    Thread-safe journal. intent()/result()/finish_run() only enqueue; a writer thread commits
+    queued rows every `flush_interval` seconds or `batch_size` rows, whichever comes first.
+    Reads call flush() first so they always see earlier writes.
+    """
+    def __init__(self, path: str = DEFAULT_JOURNAL_PATH, flush_interval: float = 0.05, batch_size: int = 500):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="order-journal", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------ writes
+    def new_run(self, kind: str, params: dict, run_id: str = None):
+        """
+        Register a run and return (run_id, created). created is False when `run_id` is already in
+        the journal, i.e. the call resumes an earlier run and its slots need reconcile(); a new
+        run, named or not, has nothing at the exchange to look up. Committed synchronously.
+        """
+        run_id = run_id or make_run_id(kind, params)
+        now = time.time()
+        self.flush()
+        with self._db_lock:
+            cur = self._db.execute("INSERT OR IGNORE INTO runs VALUES (?, ?, ?, 'RUNNING', ?, ?)",
+                                   (run_id, kind, json.dumps(params, default=str), now, now))
+        return run_id, cur.rowcount == 1
+
+    def finish_run(self, run_id: str, status: str = "DONE"):
+        self._queue.put(("UPDATE runs SET status = ?, updated = ? WHERE run_id = ?", (status, time.time(), run_id)))
+
+    def intent(self, run_id: str, slot: int, symbol: str, params: dict) -> str:
+        """Record an order about to be sent; returns its clientOrderId (also set in params)."""
+        cid = client_order_id(run_id, slot)
+        params["newClientOrderId"] = cid
+        now = time.time()
+        self._queue.put(("INSERT INTO orders (client_order_id, run_id, slot, symbol, params, status, created, updated) "
+                         "VALUES (?, ?, ?, ?, ?, 'INTENT', ?, ?) "
+                         "ON CONFLICT(client_order_id) DO UPDATE SET status = 'INTENT', params = excluded.params, "
+                         "error = NULL, updated = excluded.updated",
+                         (cid, run_id, slot, symbol, json.dumps(params, default=str), now, now)))
+        return cid
+
+    def result(self, cid: str, response: dict = None, error: str = None):
+        """Record the exchange response (ACKED) or the error (REJECTED) for an order."""
+        if error is not None:
+            row = (REJECTED, None, None, None, str(error), time.time(), cid)
+        else:
+            row = (ACKED, response.get("orderId"), response.get("status"), json.dumps(response, default=str),
+                   None, time.time(), cid)
+        self._queue.put(("UPDATE orders SET status = ?, order_id = ?, exchange_status = ?, response = ?, error = ?, "
+                         "updated = ? WHERE client_order_id = ?", row))
+
+    def _write_loop(self):
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            taken, batch = 1, []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                if item is _FLUSH:
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                taken += 1
+            try:
+                if batch:
+                    with self._db_lock:
+                        self._db.execute("BEGIN")
+                        for sql, args in batch:
+                            self._db.execute(sql, args)
+                        self._db.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.exception("Order journal write of %d rows failed: %s", len(batch), e)
+                with self._db_lock:
+                    if self._db.in_transaction:
+                        self._db.execute("ROLLBACK")
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued write is committed; the pending batch is committed right away."""
+        if not self._closed:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout=5)
+        with self._db_lock:
+            self._db.close()
+
+    # ------------------------------------------------------------------ reads
+    def _rows(self, sql: str, args=()):
+        self.flush()
+        with self._db_lock:
+            cur = self._db.execute(sql, args)
+            names = [c[0] for c in cur.description]
+            return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def get(self, cid: str):
+        rows = self._rows("SELECT * FROM orders WHERE client_order_id = ?", (cid,))
+        return rows[0] if rows else None
+
+    def orders(self, run_id: str) -> list:
+        return self._rows("SELECT * FROM orders WHERE run_id = ? ORDER BY slot", (run_id,))
+
+    def response(self, cid: str):
+        """The recorded exchange response for an order, or None."""
+        row = self.get(cid)
+        return json.loads(row["response"]) if row and row["response"] else None
+
+    def run(self, run_id: str):
+        rows = self._rows("SELECT * FROM runs WHERE run_id = ?", (run_id,))
+        if rows:
+            rows[0]["params"] = json.loads(rows[0]["params"])
+        return rows[0] if rows else None
+
+    def unfinished_runs(self, kind: str = None) -> list:
+        if kind is None:
+            rows = self._rows("SELECT * FROM runs WHERE status = 'RUNNING' ORDER BY created")
+        else:
+            rows = self._rows("SELECT * FROM runs WHERE status = 'RUNNING' AND kind = ? ORDER BY created", (kind,))
+        for row in rows:
+            row["params"] = json.loads(row["params"])
+        return rows
+
+    # ------------------------------------------------------------------ recovery
+    def reconcile(self, client, run_id: str, symbol: str, slots) -> dict:
+        """
+        Settle `slots` of a run against the exchange. Slots with a recorded response or error are
+        left alone; every other slot (INTENT, or no row at all because the crash came before the
+        batch was committed) is looked up by origClientOrderId. Found orders become ACKED with the
+        exchange's state; unknown ones become MISSING and are safe to submit again.
+        Returns {slot: status}.
+        """
+        known = {row["slot"]: row for row in self.orders(run_id)}
+        out = {}
+        for slot in slots:
+            row = known.get(slot)
+            if row is not None and row["status"] not in (INTENT, MISSING):
+                out[slot] = row["status"]
+                continue
+            cid = client_order_id(run_id, slot)
+            try:
+                order = client.futures_get_order(symbol=symbol, origClientOrderId=cid)
+            except (BinanceAPIException, ValueError) as e:
+                # ValueError covers SimulatedFuturesClient, which raises SimulationError with the same codes.
+                if getattr(e, "code", None) != UNKNOWN_ORDER_CODE:
+                    raise
+                order = None
+            if row is None:
+                self.intent(run_id, slot, symbol, {"symbol": symbol})
+            if order is None:
+                self._queue.put(("UPDATE orders SET status = ?, updated = ? WHERE client_order_id = ?", (MISSING, time.time(), cid)))
+                out[slot] = MISSING
+            else:
+                self.result(cid, order)
+                out[slot] = ACKED
+            logger.info("Reconciled %s: %s", cid, out[slot])
+        self.flush()
+        return out
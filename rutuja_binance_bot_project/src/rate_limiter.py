@@ -0,0 +1,256 @@
+"""
+rate_limiter.py
+Client-side request scheduler for Binance USDT-M Futures rate limits.
+Tracks request weight and order count per limit window with token buckets, re-syncs them from
+the X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* response headers, and queues calls before they
+would trigger a 429/418. Cancels and reduce-only orders are released ahead of new entries.
+"""
+
+import heapq, itertools, sys, threading, time
+
+PRIORITY_CANCEL = 0
+PRIORITY_REDUCE = 1
+PRIORITY_NEW = 2
+
+# (kind, window seconds) -> limit; defaults of the USDT-M futures API.
+DEFAULT_LIMITS = {
+    ("weight", 60): 2400,
+    ("orders", 10): 300,
+    ("orders", 60): 1200,
+}
+
+_INTERVAL_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Headers of the last response received on this thread, set by a requests session hook.
+_response = threading.local()
+
+def _capture_headers(response, *args, **kwargs):
+    _response.headers = response.headers
+    return response
+
+class TokenBucket:
+    """Capacity `limit` tokens refilled continuously over `window` seconds."""
+    def __init__(self, limit: int, window: float, now: float):
+        self.limit = limit
+        self.window = window
+        self.rate = limit / window
+        self.tokens = float(limit)
+        self.updated = now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: int, now: float) -> float:
+        self._refill(now)
+        cost = min(cost, self.limit)
+        if cost <= self.tokens:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def consume(self, cost: int, now: float):
+        self._refill(now)
+        self.tokens -= cost
+
+    def sync_used(self, used: int, now: float):
+        # The exchange count is authoritative; only ever lower our estimate from it.
+        self._refill(now)
+        self.tokens = min(self.tokens, self.limit - used)
+
+class RequestScheduler:
+    """
+    Thread-safe scheduler shared by every order call. `acquire()` blocks the caller until its
+    request fits in all buckets and no higher-priority call is waiting, then runs it.
+    `safety_margin` keeps a fraction of each limit in reserve for calls made outside the scheduler.
+    """
+    def __init__(self, limits: dict = None, safety_margin: float = 0.9, clock=time.monotonic):
+        self._clock = clock
+        now = clock()
+        self._buckets = {key: TokenBucket(max(1, int(limit * safety_margin)), key[1], now)
+                         for key, limit in (limits or DEFAULT_LIMITS).items()}
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._calls = 0
+        self._throttled = 0
+        self._bans = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._max_depth = 0
+
+    def _wait_time(self, weight: int, orders: int, now: float) -> float:
+        wait = self._paused_until - now
+        for (kind, _), bucket in self._buckets.items():
+            cost = weight if kind == "weight" else orders
+            if cost:
+                wait = max(wait, bucket.wait_time(cost, now))
+        return wait
+
+    def acquire(self, weight: int = 1, orders: int = 0, priority: int = PRIORITY_NEW) -> float:
+        """Block until the request may be sent; returns the time spent waiting."""
+        ticket = (priority, next(self._seq))
+        start = self._clock()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            self._max_depth = max(self._max_depth, len(self._queue))
+            self._cond.notify_all()
+            while True:
+                if self._queue[0] == ticket:
+                    now = self._clock()
+                    wait = self._wait_time(weight, orders, now)
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            heapq.heappop(self._queue)
+            now = self._clock()
+            for (kind, _), bucket in self._buckets.items():
+                cost = weight if kind == "weight" else orders
+                if cost:
+                    bucket.consume(cost, now)
+            waited = now - start
+            self._calls += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            if waited > 0.001:
+                self._throttled += 1
+            self._cond.notify_all()
+        return waited
+
+    def observe_headers(self, headers):
+        """Re-sync buckets from X-MBX-USED-WEIGHT-<n><unit> / X-MBX-ORDER-COUNT-<n><unit> headers."""
+        if not headers:
+            return
+        now = self._clock()
+        with self._cond:
+            for name, value in headers.items():
+                name = name.lower()
+                if name.startswith("x-mbx-used-weight-"):
+                    kind, interval = "weight", name[len("x-mbx-used-weight-"):]
+                elif name.startswith("x-mbx-order-count-"):
+                    kind, interval = "orders", name[len("x-mbx-order-count-"):]
+                else:
+                    continue
+                try:
+                    window = int(interval[:-1]) * _INTERVAL_SECONDS[interval[-1]]
+                    used = int(value)
+                except (ValueError, KeyError, IndexError):
+                    continue
+                bucket = self._buckets.get((kind, window))
+                if bucket is not None:
+                    bucket.sync_used(used, now)
+
+    def observe_ban(self, retry_after: float):
+        """Hold every queued call after a 429/418 until the exchange's Retry-After has passed."""
+        with self._cond:
+            self._bans += 1
+            self._paused_until = max(self._paused_until, self._clock() + retry_after)
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_depth,
+                "calls": self._calls,
+                "throttled_calls": self._throttled,
+                "bans": self._bans,
+                "total_wait_seconds": self._total_wait,
+                "avg_wait_seconds": self._total_wait / self._calls if self._calls else 0.0,
+                "max_wait_seconds": self._max_wait,
+            }
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+def default_scheduler() -> RequestScheduler:
+    """Process-wide scheduler shared by get_client() and BasicBot."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
+
+class ScheduledClient:
+    """
+    Wraps a python-binance Client so order calls go through a RequestScheduler.
+    Every other attribute is forwarded to the wrapped client unchanged.
+    """
+    # method -> (request weight, orders counted)
+    WEIGHTS = {
+        "futures_create_order": (1, 1),
+        "futures_place_batch_order": (5, 5),
+        "futures_cancel_order": (1, 0),
+        "futures_cancel_orders": (1, 0),
+        "futures_cancel_all_open_orders": (1, 0),
+        "futures_get_order": (1, 0),
+        "futures_get_open_orders": (1, 0),
+        "futures_order_book": (20, 0),  # limit=1000 snapshot
+    }
+
+    def __init__(self, client, scheduler: RequestScheduler = None):
+        self._client = client
+        self.scheduler = scheduler or default_scheduler()
+        # python-binance keeps the last response on client.response, which every thread sharing the
+        # client overwrites; a session hook hands each request's headers to the thread that sent it.
+        hooks = getattr(getattr(client, "session", None), "hooks", None)
+        self._hooked = isinstance(hooks, dict)
+        if self._hooked and _capture_headers not in hooks.setdefault("response", []):
+            hooks["response"].append(_capture_headers)
+
+    def _response_headers(self):
+        if self._hooked:
+            headers, _response.headers = getattr(_response, "headers", None), None
+            return headers
+        # Clients without a requests session (the simulator, stubs) are read after the call.
+        return getattr(getattr(self._client, "response", None), "headers", None)
+
+    @staticmethod
+    def _priority(name: str, kwargs: dict) -> int:
+        if "cancel" in name:
+            return PRIORITY_CANCEL
+        orders = kwargs.get("batchOrders") or [kwargs]
+        if all(str(o.get("reduceOnly")).lower() == "true" or str(o.get("closePosition")).lower() == "true" for o in orders):
+            return PRIORITY_REDUCE
+        return PRIORITY_NEW
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name not in self.WEIGHTS or not callable(attr):
+            return attr
+        weight, orders = self.WEIGHTS[name]
+
+        def scheduled(*args, **kwargs):
+            self.scheduler.acquire(weight, orders, self._priority(name, kwargs))
+            _response.headers = None
+            try:
+                return attr(*args, **kwargs)
+            except Exception as e:
+                # BinanceAPIException carries the HTTP status; matched by attribute so this module
+                # does not have to import python-binance.
+                if getattr(e, "status_code", None) in (418, 429):
+                    headers = getattr(e.response, "headers", None) or {}
+                    self.scheduler.observe_ban(float(headers.get("Retry-After", 60)))
+                raise
+            finally:
+                self.scheduler.observe_headers(self._response_headers())
+        return scheduled
+
+def _shared(name: str, value):
+    # This file is imported both as "rate_limiter" (script-style, src/advanced) and
+    # "src.rate_limiter" (BasicBot). The second copy reuses the first one's scheduler singleton and
+    # classes, so there is one process-wide scheduler and isinstance(client, ScheduledClient) holds
+    # whichever path built the client.
+    for module in ("rate_limiter", "src.rate_limiter"):
+        if module != __name__:
+            existing = getattr(sys.modules.get(module), name, None)
+            if existing is not None:
+                return existing
+    return value
+
+TokenBucket = _shared("TokenBucket", TokenBucket)
+RequestScheduler = _shared("RequestScheduler", RequestScheduler)
+ScheduledClient = _shared("ScheduledClient", ScheduledClient)
+default_scheduler = _shared("default_scheduler", default_scheduler)
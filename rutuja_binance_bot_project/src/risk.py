@@ -0,0 +1,401 @@
+"""
+risk.py
+Pre-trade risk layer. RiskEngine keeps position, open-order notional and exposure per symbol in
+memory and updates it incrementally from order responses and user-data fills, so a check is a few
+dict lookups and comparisons (O(1), about a microsecond) rather than a REST call for positions.
+RiskClient wraps a client the same way ScheduledClient does, so every order path that calls
+futures_create_order / futures_place_batch_order is checked without being changed.
+Limits file (JSON); every limit is optional:
+    {"default": {"max_position": 0.5, "max_order_notional": 20000, "max_price_deviation": 0.05},
+     "symbols": {"ETHUSDT": {"max_position": 5}},
+     "account": {"max_gross_exposure": 100000, "max_leverage": 5, "max_open_orders": 200, "equity": 10000}}
+Usage:
+    risk = RiskEngine.from_config("risk.json")
+    client = get_client(key, secret, risk=risk); risk.sync(client)
+    get_user_stream(client).subscribe(risk.handle_event, lambda: risk.sync(client))
+    MarketDataRecorder(None, risk.tracked_symbols(), streams=("aggTrade",)).subscribe(risk.handle_market)
+"""
+
+import itertools, json, threading, time, logging
+from collections import OrderedDict
+try:
+    from .utils import setup_logger
+except ImportError:
+    from utils import setup_logger
+
+logger = setup_logger("risk.log")
+
+# Binance's NEW_ORDER_REJECTED; used for batch entries refused locally so callers that already
+# read per-entry {"code", "msg"} rejections need no extra handling.
+REJECT_CODE = -2010
+TERMINAL_STATUSES = ("FILLED", "CANCELED", "REJECTED", "EXPIRED", "EXPIRED_IN_MATCH")
+# Client order ids of finished orders remembered so a late websocket event for an order whose
+# REST response already settled it is not counted twice.
+FINISHED_MEMORY = 10000
+EPS = 1e-9
+_TRUE = (True, "true", "TRUE", "True")
+
+class RiskRejected(ValueError):
+    """An order refused before it was sent; `reason` names the limit that would be breached."""
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+class RiskLimits:
+    """
+    Per-symbol limits; None disables a check. Quantities are in the base asset, notionals in USDT.
+    max_position: |position| if this order and every open order on the same side filled.
+    max_order_qty / max_order_notional: a single order.
+    max_open_notional: open orders on the symbol, both sides, including this one.
+    max_price_deviation: distance of the order price from the last mark, as a fraction.
+    """
+    FIELDS = ("max_position", "max_order_qty", "max_order_notional", "max_open_notional", "max_price_deviation")
+    __slots__ = FIELDS
+
+    def __init__(self, max_position: float = None, max_order_qty: float = None, max_order_notional: float = None,
+                 max_open_notional: float = None, max_price_deviation: float = None):
+        self.max_position = max_position
+        self.max_order_qty = max_order_qty
+        self.max_order_notional = max_order_notional
+        self.max_open_notional = max_open_notional
+        self.max_price_deviation = max_price_deviation
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RiskLimits":
+        unknown = set(d) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError("unknown risk limit(s): %s" % ", ".join(sorted(unknown)))
+        return cls(**{k: float(v) for k, v in d.items() if v is not None})
+
+class _SymbolState:
+    __slots__ = ("symbol", "limits", "position", "open_buy", "open_sell", "open_notional", "mark", "exposure")
+
+    def __init__(self, symbol: str, limits: RiskLimits):
+        self.symbol = symbol
+        self.limits = limits
+        self.position = 0.0       # signed, base asset
+        self.open_buy = 0.0       # unfilled quantity of open BUY orders
+        self.open_sell = 0.0
+        self.open_notional = 0.0  # unfilled quantity * price over open orders
+        self.mark = None
+        self.exposure = 0.0       # |position| * mark, this symbol's share of the account total
+
+class _Order:
+    __slots__ = ("state", "sign", "qty", "price", "filled", "counted")
+
+    def __init__(self, state: _SymbolState, sign: int, qty: float, price: float, counted: bool):
+        self.state = state
+        self.sign = sign
+        self.qty = qty
+        self.price = price
+        self.filled = 0.0
+        self.counted = counted    # reduce-only / closePosition orders add no exposure
+
+class RiskEngine:
+    """
+    reserve(params) checks an order and books it as open; on_response() and handle_event() apply
+    fills (idempotently, from cumulative executed quantity) and release what is no longer open.
+    Orders that are not reserved (placed elsewhere) still move the position through their fills.
+    Account limits: gross exposure is sum(|position| * mark) plus open-order notional; leverage
+    is that divided by `equity`.
+    """
+    def __init__(self, default: RiskLimits = None, symbols: dict = None, max_gross_exposure: float = None,
+                 max_leverage: float = None, max_open_orders: int = None, equity: float = None):
+        self.default = default or RiskLimits()
+        self.symbol_limits = dict(symbols or {})
+        self.max_gross_exposure = max_gross_exposure
+        self.max_leverage = max_leverage
+        self.max_open_orders = max_open_orders
+        self.equity = equity
+        self.position_exposure = 0.0
+        self.open_notional = 0.0
+        self.accepted = 0
+        self.rejections = {}
+        self._states = {}
+        self._orders = {}                 # clientOrderId -> _Order
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._prefix = "rk%x-" % (int(time.time() * 1000) & 0xffffffff)
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "RiskEngine":
+        account = dict(config.get("account", {}))
+        unknown = set(account) - {"max_gross_exposure", "max_leverage", "max_open_orders", "equity"}
+        if unknown:
+            raise ValueError("unknown account limit(s): %s" % ", ".join(sorted(unknown)))
+        if account.get("max_open_orders") is not None:
+            account["max_open_orders"] = int(account["max_open_orders"])
+        return cls(RiskLimits.from_dict(config.get("default", {})),
+                   {s.upper(): RiskLimits.from_dict(d) for s, d in config.get("symbols", {}).items()}, **account)
+
+    @classmethod
+    def from_config(cls, path: str) -> "RiskEngine":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    # ------------------------------------------------------------------ state
+    def _state(self, symbol: str) -> _SymbolState:
+        s = self._states.get(symbol)
+        if s is None:
+            s = self._states[symbol] = _SymbolState(symbol, self.symbol_limits.get(symbol, self.default))
+        return s
+
+    def _set(self, s: _SymbolState, position: float = None, mark: float = None):
+        # Caller holds the lock. Keeps the account's position exposure in step with one symbol's.
+        if position is not None:
+            s.position = position
+        if mark:
+            s.mark = mark
+        exposure = abs(s.position) * (s.mark or 0.0)
+        self.position_exposure += exposure - s.exposure
+        s.exposure = exposure
+
+    def _open(self, order: _Order, qty: float):
+        # Caller holds the lock. Adds (qty > 0) or releases (qty < 0) open quantity of one order.
+        if not order.counted or not qty:
+            return
+        s = order.state
+        if order.sign > 0:
+            s.open_buy += qty
+        else:
+            s.open_sell += qty
+        s.open_notional += qty * order.price
+        self.open_notional += qty * order.price
+
+    def set_mark(self, symbol: str, price: float):
+        """Latest price for `symbol`, used for market-order notional, exposure and the price band."""
+        with self._lock:
+            self._set(self._state(symbol), mark=float(price))
+
+    def set_position(self, symbol: str, position: float):
+        with self._lock:
+            self._set(self._state(symbol), position=float(position))
+
+    # ------------------------------------------------------------------ checks
+    def _reject(self, reason: str, message: str, *args):
+        self.rejections[reason] = self.rejections.get(reason, 0) + 1
+        raise RiskRejected(reason, message % args)
+
+    def _check(self, s: _SymbolState, sign: int, qty: float, price: float, counted: bool) -> float:
+        # Caller holds the lock. Returns the reference price the order is booked at.
+        ref = price or s.mark
+        if not counted:
+            return ref or 0.0  # reduce-only orders can only shrink the position
+        lim = s.limits
+        if lim.max_order_qty is not None and qty > lim.max_order_qty + EPS:
+            self._reject("order_qty", "%s order qty %s exceeds max_order_qty %s", s.symbol, qty, lim.max_order_qty)
+        if lim.max_position is not None:
+            worst = s.position + s.open_buy + qty if sign > 0 else s.position - s.open_sell - qty
+            if abs(worst) > lim.max_position + EPS:
+                self._reject("position", "%s position would reach %s (limit %s)", s.symbol, worst, lim.max_position)
+        if self.max_open_orders is not None and len(self._orders) >= self.max_open_orders:
+            self._reject("open_orders", "%d open orders (limit %d)", len(self._orders), self.max_open_orders)
+        needs_price = (lim.max_order_notional, lim.max_open_notional, self.max_gross_exposure, self.max_leverage)
+        if not ref:
+            if any(v is not None for v in needs_price):
+                self._reject("no_price", "no price for %s to check notional limits; set_mark() or sync() first", s.symbol)
+            return 0.0
+        if price and s.mark and lim.max_price_deviation is not None and abs(price - s.mark) > lim.max_price_deviation * s.mark:
+            self._reject("price_band", "%s price %s is more than %s from mark %s", s.symbol, price,
+                         lim.max_price_deviation, s.mark)
+        notional = qty * ref
+        if lim.max_order_notional is not None and notional > lim.max_order_notional + EPS:
+            self._reject("order_notional", "%s order notional %.2f exceeds %s", s.symbol, notional, lim.max_order_notional)
+        if lim.max_open_notional is not None and s.open_notional + notional > lim.max_open_notional + EPS:
+            self._reject("open_notional", "%s open notional would reach %.2f (limit %s)", s.symbol,
+                         s.open_notional + notional, lim.max_open_notional)
+        gross = self.position_exposure + self.open_notional + notional
+        if self.max_gross_exposure is not None and gross > self.max_gross_exposure + EPS:
+            self._reject("gross_exposure", "gross exposure would reach %.2f (limit %s)", gross, self.max_gross_exposure)
+        if self.max_leverage is not None and self.equity and gross > self.max_leverage * self.equity + EPS:
+            self._reject("leverage", "leverage would reach %.2fx (limit %sx)", gross / self.equity, self.max_leverage)
+        return ref
+
+    def reserve(self, params: dict) -> str:
+        """
+        Check one futures_create_order parameter dict and book it as an open order. Sets
+        newClientOrderId when missing (fills are matched on it) and returns it. Raises RiskRejected.
+        """
+        get = params.get
+        symbol = params["symbol"].upper()
+        side = params["side"].upper()
+        if side not in ("BUY", "SELL"):
+            raise ValueError("side must be BUY or SELL")
+        sign = 1 if side == "BUY" else -1
+        qty = float(get("quantity") or 0.0)
+        price = float(get("price") or get("stopPrice") or 0.0)
+        counted = get("reduceOnly") not in _TRUE and get("closePosition") not in _TRUE
+        cid = get("newClientOrderId")
+        with self._lock:
+            if cid is None:
+                cid = params["newClientOrderId"] = self._prefix + str(next(self._ids))
+            elif cid in self._orders:
+                self._reject("duplicate_id", "client order id %s is already open", cid)
+            s = self._state(symbol)
+            order = _Order(s, sign, qty, self._check(s, sign, qty, price, counted), counted)
+            self._orders[cid] = order
+            self._open(order, qty)
+            self.accepted += 1
+        return cid
+
+    def release(self, cid: str):
+        """Forget an order that never reached the exchange (the send raised)."""
+        with self._lock:
+            order = self._orders.pop(cid, None)
+            if order is not None:
+                self._open(order, -max(order.qty - order.filled, 0.0))
+
+    # ------------------------------------------------------------------ fills
+    def _apply(self, cid: str, order: _Order, executed: float, price: float, status: str):
+        # Caller holds the lock. `executed` is cumulative, so replays and REST/websocket overlap are harmless.
+        delta = executed - order.filled
+        if delta > EPS:
+            order.filled = executed
+            self._open(order, -min(delta, max(order.qty - executed + delta, 0.0)))
+            s = order.state
+            self._set(s, s.position + order.sign * delta, price)
+        if status in TERMINAL_STATUSES:
+            self._open(order, -max(order.qty - order.filled, 0.0))
+            del self._orders[cid]
+            self._finished[cid] = None
+            if len(self._finished) > FINISHED_MEMORY:
+                self._finished.popitem(last=False)
+
+    def on_response(self, res, cid: str = None):
+        """Apply an order (or cancel) response; batch entries carrying "code" release the reservation."""
+        if not isinstance(res, dict):
+            return
+        cid = res.get("clientOrderId") or cid
+        with self._lock:
+            order = self._orders.get(cid)
+            if order is None:
+                return
+            if "code" in res:
+                self._open(order, -max(order.qty - order.filled, 0.0))
+                del self._orders[cid]
+                return
+            self._apply(cid, order, float(res.get("executedQty") or 0.0), float(res.get("avgPrice") or 0.0),
+                        res.get("status"))
+
+    def on_order_update(self, o: dict):
+        """Apply the "o" payload of an ORDER_TRADE_UPDATE."""
+        cid = o.get("c")
+        with self._lock:
+            order = self._orders.get(cid)
+            if order is not None:
+                self._apply(cid, order, float(o.get("z") or 0.0), float(o.get("L") or 0.0), o.get("X"))
+            elif cid not in self._finished and o.get("x") == "TRADE":
+                # Not placed through this engine (another process, the web UI): only the fill matters.
+                s = self._state(o["s"])
+                sign = 1 if o.get("S") == "BUY" else -1
+                self._set(s, s.position + sign * float(o.get("l") or 0.0), float(o.get("L") or 0.0))
+
+    def handle_event(self, event: dict):
+        """Subscriber callback for UserDataStream / SimulatedFuturesClient events."""
+        if event.get("e") == "ORDER_TRADE_UPDATE":
+            self.on_order_update(event.get("o", {}))
+
+    def handle_market(self, data: dict):
+        """MarketDataRecorder subscriber: aggTrade prices (or the bookTicker mid) keep marks current."""
+        kind = data.get("e")
+        if kind == "aggTrade":
+            self.set_mark(data["s"], float(data["p"]))
+        elif kind == "bookTicker":
+            self.set_mark(data["s"], (float(data["b"]) + float(data["a"])) / 2)
+
+    def tracked_symbols(self) -> list:
+        """Symbols with their own limits or with state (positions, open orders, marks); the ones that need live marks."""
+        with self._lock:
+            return sorted(set(self.symbol_limits) | set(self._states))
+
+    def sync(self, client) -> "RiskEngine":
+        """
+        Rebuild positions, marks and open orders from REST (startup, and after a user-stream
+        reconnect). Equity is read from futures_account when the client has it.
+        """
+        positions = client.futures_position_information()
+        open_orders = client.futures_get_open_orders()
+        account = client.futures_account() if hasattr(client, "futures_account") else None
+        with self._lock:
+            self._states.clear()
+            self._orders.clear()
+            self.position_exposure = self.open_notional = 0.0
+            for p in positions:
+                self._set(self._state(p["symbol"]), float(p.get("positionAmt") or 0.0), float(p.get("markPrice") or 0.0))
+            for o in open_orders:
+                s = self._state(o["symbol"])
+                counted = not o.get("reduceOnly") and not o.get("closePosition")
+                order = _Order(s, 1 if o["side"] == "BUY" else -1, float(o["origQty"]),
+                               float(o.get("price") or 0.0) or float(o.get("stopPrice") or 0.0) or (s.mark or 0.0), counted)
+                order.filled = float(o.get("executedQty") or 0.0)
+                self._orders[o["clientOrderId"]] = order
+                self._open(order, max(order.qty - order.filled, 0.0))
+            if account is not None and account.get("totalMarginBalance") is not None:
+                self.equity = float(account["totalMarginBalance"])
+        logger.info("Risk state synced: %d position(s), %d open order(s), equity=%s",
+                    sum(1 for s in self._states.values() if s.position), len(self._orders), self.equity)
+        return self
+
+    def status(self) -> dict:
+        with self._lock:
+            gross = self.position_exposure + self.open_notional
+            return {
+                "accepted": self.accepted, "rejections": dict(self.rejections), "open_orders": len(self._orders),
+                "gross_exposure": gross, "open_notional": self.open_notional, "equity": self.equity,
+                "leverage": gross / self.equity if self.equity else None,
+                "symbols": {s.symbol: {"position": s.position, "open_buy": s.open_buy, "open_sell": s.open_sell,
+                                       "open_notional": s.open_notional, "mark": s.mark}
+                            for s in self._states.values()},
+            }
+
+class RiskClient:
+    """
+    Wraps a client (plain, ScheduledClient or SimulatedFuturesClient) so new orders are checked by
+    a RiskEngine before they are sent. A rejected single order raises RiskRejected; rejected batch
+    entries come back as {"code": REJECT_CODE, "msg": ...} and only the others are sent.
+    Every other attribute is forwarded to the wrapped client unchanged.
+    """
+    def __init__(self, client, engine: RiskEngine):
+        self._client = client
+        self.risk = engine
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def futures_create_order(self, **params):
+        cid = self.risk.reserve(params)
+        try:
+            res = self._client.futures_create_order(**params)
+        except Exception:
+            self.risk.release(cid)
+            raise
+        self.risk.on_response(res, cid)
+        return res
+
+    def futures_place_batch_order(self, batchOrders):
+        out = [None] * len(batchOrders)
+        accepted = []
+        for i, params in enumerate(batchOrders):
+            params = dict(params)
+            try:
+                accepted.append((i, self.risk.reserve(params), params))
+            except RiskRejected as e:
+                logger.warning("Risk rejected batch entry %d: %s", i, e)
+                out[i] = {"code": REJECT_CODE, "msg": str(e)}
+        if accepted:
+            try:
+                responses = self._client.futures_place_batch_order(batchOrders=[p for _, _, p in accepted])
+            except Exception:
+                for _, cid, _ in accepted:
+                    self.risk.release(cid)
+                raise
+            for (i, cid, _), res in zip(accepted, responses):
+                self.risk.on_response(res, cid)
+                out[i] = res
+        return out
+
+    def futures_cancel_order(self, **params):
+        res = self._client.futures_cancel_order(**params)
+        self.risk.on_response(res, params.get("origClientOrderId"))
+        return res
@@ -0,0 +1,385 @@
+"""
+simulator.py
+Drop-in simulated USDT-M futures client for offline runs of the order modules and strategies.
+Orders rest in an in-memory book per symbol (bid/ask heaps with price-time priority, plus
+trigger heaps for STOP / TAKE_PROFIT types) and are matched against replayed market prices:
+kline bars (open -> nearer extreme -> other extreme -> close) or individual trades.
+Supports MARKET, LIMIT, STOP, STOP_MARKET, TAKE_PROFIT and TAKE_PROFIT_MARKET orders,
+reduceOnly / closePosition, one-way positions, fees, and ORDER_TRADE_UPDATE-style fill events.
+"""
+
+import heapq, itertools
+
+TRIGGER_TYPES = ("STOP", "STOP_MARKET", "TAKE_PROFIT", "TAKE_PROFIT_MARKET")
+OPEN_STATUSES = ("NEW", "PARTIALLY_FILLED")
+
+class SimulationError(ValueError):
+    """Raised for orders the exchange would reject (bad params, unknown order, reduce-only violations)."""
+    def __init__(self, message: str, code: int = -1102):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+class _Book:
+    """Resting and pending-trigger orders for one symbol, plus its position and fill stats."""
+    __slots__ = ("symbol", "bids", "asks", "buy_triggers", "sell_triggers", "last", "position", "entry_price",
+                 "realized_pnl", "fees", "fills", "filled_qty", "notional", "slippage_cost", "taker_notional")
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.bids = []            # (-price, seq, order)
+        self.asks = []            # (price, seq, order)
+        self.buy_triggers = []    # (stop, seq, order): fire when price >= stop
+        self.sell_triggers = []   # (-stop, seq, order): fire when price <= stop
+        self.last = None
+        self.position = 0.0
+        self.entry_price = 0.0
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+        self.fills = 0
+        self.filled_qty = 0.0
+        self.notional = 0.0
+        self.slippage_cost = 0.0
+        self.taker_notional = 0.0
+
+def _top(heap):
+    """Peek the best live entry, discarding cancelled/filled ones lazily."""
+    while heap and heap[0][2]["status"] not in OPEN_STATUSES:
+        heapq.heappop(heap)
+    return heap[0] if heap else None
+
+class SimulatedFuturesClient:
+    """
+    Implements the subset of python-binance's Client used by this project:
+    futures_create_order, futures_place_batch_order, futures_cancel_order, futures_get_order,
+    futures_get_open_orders, futures_position_information and futures_symbol_ticker.
+    Market data is pushed with process_bar() / process_trade() (see backtest.py for replay).
+    `participation` caps the share of each bar's / trade's volume our resting orders may fill.
+    """
+    API_KEY = "simulated"
+    API_SECRET = "simulated"
+
+    def __init__(self, maker_fee: float = 0.0002, taker_fee: float = 0.0005, slippage_bps: float = 0.0,
+                 participation: float = None):
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.slippage_bps = slippage_bps
+        self.participation = participation
+        self.time = 0
+        self._books = {}
+        self._orders = {}
+        self._by_client_id = {}
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._subscribers = []
+        self._pending_events = []
+        self._liquidity = None
+
+    # ------------------------------------------------------------------ client API
+    def _book(self, symbol: str) -> _Book:
+        book = self._books.get(symbol)
+        if book is None:
+            book = self._books[symbol] = _Book(symbol)
+        return book
+
+    def futures_create_order(self, **params):
+        symbol = params.get("symbol")
+        side = str(params.get("side", "")).upper()
+        otype = str(params.get("type", "")).upper()
+        if not symbol or side not in ("BUY", "SELL"):
+            raise SimulationError("symbol and side BUY/SELL are required")
+        close_position = str(params.get("closePosition", "false")).lower() == "true"
+        qty = float(params["quantity"]) if params.get("quantity") not in (None, "") else 0.0
+        if qty <= 0 and not close_position:
+            raise SimulationError("quantity must be positive")
+        price = float(params["price"]) if params.get("price") not in (None, "") else None
+        stop = float(params["stopPrice"]) if params.get("stopPrice") not in (None, "") else None
+        if otype in ("LIMIT", "STOP", "TAKE_PROFIT") and price is None:
+            raise SimulationError("%s order requires price" % otype)
+        if otype in TRIGGER_TYPES and stop is None:
+            raise SimulationError("%s order requires stopPrice" % otype)
+        if otype not in ("MARKET", "LIMIT") + TRIGGER_TYPES:
+            raise SimulationError("Unsupported order type %s" % otype)
+        book = self._book(symbol)
+        order_id = next(self._ids)
+        order = {
+            "orderId": order_id, "symbol": symbol, "side": side, "type": otype, "origType": otype,
+            "clientOrderId": params.get("newClientOrderId") or "sim-%d" % order_id,
+            "price": price or 0.0, "stopPrice": stop or 0.0, "origQty": qty, "executedQty": 0.0,
+            "cumQuote": 0.0, "avgPrice": 0.0, "status": "NEW", "timeInForce": params.get("timeInForce", "GTC"),
+            "reduceOnly": str(params.get("reduceOnly", "false")).lower() == "true", "closePosition": close_position,
+            "updateTime": self.time, "_seq": next(self._seq),
+        }
+        self._orders[order_id] = order
+        self._by_client_id[order["clientOrderId"]] = order
+        if otype == "MARKET":
+            self._fill_market(book, order, book.last)
+        elif otype == "LIMIT":
+            self._rest_limit(book, order)
+        else:
+            self._add_trigger(book, order)
+        self._flush_events()
+        return self._public(order)
+
+    def futures_place_batch_order(self, batchOrders):
+        out = []
+        for params in batchOrders:
+            try:
+                out.append(self.futures_create_order(**params))
+            except SimulationError as e:
+                out.append({"code": e.code, "msg": str(e)})
+        return out
+
+    def _lookup(self, orderId=None, origClientOrderId=None):
+        order = self._orders.get(int(orderId)) if orderId is not None else self._by_client_id.get(origClientOrderId)
+        if order is None:
+            raise SimulationError("Order does not exist.", code=-2013)
+        return order
+
+    def futures_cancel_order(self, symbol=None, orderId=None, origClientOrderId=None, **_):
+        order = self._lookup(orderId, origClientOrderId)
+        if order["status"] not in OPEN_STATUSES:
+            raise SimulationError("Unknown order sent.", code=-2011)
+        order["status"] = "CANCELED"
+        order["updateTime"] = self.time
+        self._emit(order, "CANCELED", 0.0, 0.0)
+        self._flush_events()
+        return self._public(order)
+
+    def futures_get_order(self, symbol=None, orderId=None, origClientOrderId=None, **_):
+        return self._public(self._lookup(orderId, origClientOrderId))
+
+    def futures_get_open_orders(self, symbol=None, **_):
+        return [self._public(o) for o in self._orders.values()
+                if o["status"] in OPEN_STATUSES and (symbol is None or o["symbol"] == symbol)]
+
+    def futures_position_information(self, symbol=None, **_):
+        books = [self._book(symbol)] if symbol else list(self._books.values())
+        return [{"symbol": b.symbol, "positionAmt": str(b.position), "entryPrice": str(b.entry_price),
+                 "markPrice": str(b.last or 0.0), "unRealizedProfit": str(self._unrealized(b))}
+                for b in books]
+
+    def futures_symbol_ticker(self, symbol=None, **_):
+        return {"symbol": symbol, "price": str(self._book(symbol).last), "time": self.time}
+
+    def subscribe(self, handler, on_resync=None):
+        """
+        Call handler(event) for every order update, shaped like a user-data ORDER_TRADE_UPDATE.
+        `on_resync` matches UserDataStream.subscribe and is never called: the simulator does not disconnect.
+        """
+        self._subscribers.append(handler)
+
+    @staticmethod
+    def _public(order: dict) -> dict:
+        return {k: (str(v) if isinstance(v, float) else v) for k, v in order.items() if not k.startswith("_")}
+
+    # ------------------------------------------------------------------ matching
+    def _rest_limit(self, book: _Book, order: dict):
+        price = order["price"]
+        last = book.last
+        if last is not None and ((order["side"] == "BUY" and price >= last) or (order["side"] == "SELL" and price <= last)):
+            # Marketable on arrival: take liquidity at the current price.
+            self._fill(book, order, order["origQty"] - order["executedQty"], last, taker=True)
+            return
+        if order["side"] == "BUY":
+            heapq.heappush(book.bids, (-price, order["_seq"], order))
+        else:
+            heapq.heappush(book.asks, (price, order["_seq"], order))
+
+    def _add_trigger(self, book: _Book, order: dict):
+        stop = order["stopPrice"]
+        fires_above = (order["side"] == "BUY") == order["type"].startswith("STOP")
+        if book.last is not None and ((fires_above and book.last >= stop) or (not fires_above and book.last <= stop)):
+            order["status"] = "REJECTED"
+            raise SimulationError("Order would immediately trigger.")
+        if fires_above:
+            heapq.heappush(book.buy_triggers, (stop, order["_seq"], order))
+        else:
+            heapq.heappush(book.sell_triggers, (-stop, order["_seq"], order))
+
+    def _fill_market(self, book: _Book, order: dict, price: float):
+        if price is None:
+            order["status"] = "EXPIRED"
+            raise SimulationError("No market price for %s yet; replay data before sending MARKET orders" % book.symbol)
+        slip = price * self.slippage_bps / 10000.0
+        fill_price = price + slip if order["side"] == "BUY" else price - slip
+        self._fill(book, order, order["origQty"] - order["executedQty"], fill_price, taker=True, reference=price)
+
+    def _fill(self, book: _Book, order: dict, qty: float, price: float, taker: bool, reference: float = None):
+        signed_pos = book.position
+        if order["closePosition"]:
+            qty = abs(signed_pos)
+            order["origQty"] = order["executedQty"] + qty
+        if order["reduceOnly"] or order["closePosition"]:
+            reducing = (order["side"] == "SELL" and signed_pos > 0) or (order["side"] == "BUY" and signed_pos < 0)
+            qty = min(qty, abs(signed_pos)) if reducing else 0.0
+            if qty <= 0:
+                order["status"] = "EXPIRED"
+                order["updateTime"] = self.time
+                self._emit(order, "EXPIRED", 0.0, 0.0)
+                return
+        signed = qty if order["side"] == "BUY" else -qty
+        # Position and realized PnL (one-way mode, average entry price).
+        if signed_pos == 0 or (signed_pos > 0) == (signed > 0):
+            new_pos = signed_pos + signed
+            book.entry_price = (book.entry_price * abs(signed_pos) + price * qty) / abs(new_pos)
+        else:
+            closed = min(qty, abs(signed_pos))
+            direction = 1.0 if signed_pos > 0 else -1.0
+            book.realized_pnl += (price - book.entry_price) * closed * direction
+            new_pos = signed_pos + signed
+            if abs(new_pos) < 1e-12:
+                new_pos, book.entry_price = 0.0, 0.0
+            elif (new_pos > 0) != (signed_pos > 0):
+                book.entry_price = price
+        book.position = new_pos
+        notional = qty * price
+        book.fees += notional * (self.taker_fee if taker else self.maker_fee)
+        book.fills += 1
+        book.filled_qty += qty
+        book.notional += notional
+        if taker and reference:
+            book.taker_notional += notional
+            book.slippage_cost += (price - reference) * qty if order["side"] == "BUY" else (reference - price) * qty
+        order["executedQty"] += qty
+        order["cumQuote"] += notional
+        order["avgPrice"] = order["cumQuote"] / order["executedQty"]
+        order["status"] = "FILLED" if order["executedQty"] >= order["origQty"] - 1e-12 else "PARTIALLY_FILLED"
+        order["updateTime"] = self.time
+        self._emit(order, "TRADE", qty, price)
+
+    def _match_resting(self, book: _Book, price: float):
+        while True:
+            top = _top(book.bids)
+            if top is None or -top[0] < price:
+                break
+            if not self._consume(book, book.bids, top[2], top[2]["price"]):
+                return
+        while True:
+            top = _top(book.asks)
+            if top is None or top[0] > price:
+                break
+            if not self._consume(book, book.asks, top[2], top[2]["price"]):
+                return
+
+    def _consume(self, book: _Book, heap, order: dict, price: float) -> bool:
+        """Fill the best resting order from the available liquidity; False once liquidity runs out."""
+        remaining = order["origQty"] - order["executedQty"]
+        if self._liquidity is not None:
+            if self._liquidity <= 0:
+                return False
+            take = min(remaining, self._liquidity)
+            self._liquidity -= take
+        else:
+            take = remaining
+        self._fill(book, order, take, price, taker=False)
+        if order["status"] not in OPEN_STATUSES:
+            heapq.heappop(heap)
+        return order["status"] not in OPEN_STATUSES
+
+    def _fire_triggers(self, book: _Book, price: float, continuous: bool):
+        fired = []
+        while True:
+            top = _top(book.buy_triggers)
+            if top is None or price < top[0]:
+                break
+            fired.append(heapq.heappop(book.buy_triggers)[2])
+        while True:
+            top = _top(book.sell_triggers)
+            if top is None or price > -top[0]:
+                break
+            fired.append(heapq.heappop(book.sell_triggers)[2])
+        fired.sort(key=lambda o: o["_seq"])
+        for order in fired:
+            # Along a continuous path the trigger traded exactly at the stop; after a gap at `price`.
+            at = order["stopPrice"] if continuous else price
+            if order["type"].endswith("_MARKET"):
+                self._fill_market(book, order, at)
+            else:
+                order["type"] = "LIMIT"
+                self._rest_limit(book, order)
+
+    def _move(self, book: _Book, price: float, continuous: bool):
+        bid = _top(book.bids)
+        ask = _top(book.asks)
+        buy_t = _top(book.buy_triggers)
+        sell_t = _top(book.sell_triggers)
+        if ((buy_t is not None and price >= buy_t[0]) or (sell_t is not None and price <= -sell_t[0])):
+            book.last = price
+            self._fire_triggers(book, price, continuous)
+        if (bid is not None and -bid[0] >= price) or (ask is not None and ask[0] <= price):
+            self._match_resting(book, price)
+        book.last = price
+
+    # ------------------------------------------------------------------ market data
+    def process_bar(self, symbol: str, time_ms: int, open_: float, high: float, low: float, close: float, volume: float = None):
+        """Advance one OHLC bar. The intrabar path visits the extreme nearer the open first."""
+        book = self._book(symbol)
+        self.time = time_ms
+        self._liquidity = volume * self.participation if (self.participation is not None and volume is not None) else None
+        self._move(book, open_, continuous=False)
+        if high - open_ <= open_ - low:
+            self._move(book, high, True)
+            self._move(book, low, True)
+        else:
+            self._move(book, low, True)
+            self._move(book, high, True)
+        self._move(book, close, True)
+        self._liquidity = None
+        self._flush_events()
+
+    def process_trade(self, symbol: str, time_ms: int, price: float, qty: float = None):
+        book = self._book(symbol)
+        self.time = time_ms
+        self._liquidity = qty * self.participation if (self.participation is not None and qty is not None) else None
+        self._move(book, price, continuous=False)
+        self._liquidity = None
+        self._flush_events()
+
+    # ------------------------------------------------------------------ events & reporting
+    def _emit(self, order: dict, exec_type: str, last_qty: float, last_price: float):
+        if not self._subscribers:
+            return
+        self._pending_events.append({
+            "e": "ORDER_TRADE_UPDATE", "E": self.time, "T": self.time,
+            "o": {"s": order["symbol"], "c": order["clientOrderId"], "S": order["side"], "o": order["type"],
+                  "ot": order["origType"], "q": str(order["origQty"]), "p": str(order["price"]),
+                  "sp": str(order["stopPrice"]), "ap": str(order["avgPrice"]), "x": exec_type, "X": order["status"],
+                  "i": order["orderId"], "l": str(last_qty), "z": str(order["executedQty"]), "L": str(last_price),
+                  "T": self.time, "R": order["reduceOnly"]},
+        })
+
+    def _flush_events(self):
+        # Delivered after matching so handlers may place or cancel orders safely.
+        while self._pending_events:
+            events, self._pending_events = self._pending_events, []
+            for event in events:
+                for handler in self._subscribers:
+                    handler(event)
+
+    def _unrealized(self, book: _Book) -> float:
+        if not book.position or book.last is None:
+            return 0.0
+        return (book.last - book.entry_price) * book.position
+
+    def report(self, symbol: str = None) -> dict:
+        """Fills, traded volume, realized/unrealized PnL, fees and taker slippage (bps vs. reference price)."""
+        books = [self._book(symbol)] if symbol else list(self._books.values())
+        realized = sum(b.realized_pnl for b in books)
+        unrealized = sum(self._unrealized(b) for b in books)
+        fees = sum(b.fees for b in books)
+        taker_notional = sum(b.taker_notional for b in books)
+        return {
+            "fills": sum(b.fills for b in books),
+            "filled_qty": sum(b.filled_qty for b in books),
+            "notional": sum(b.notional for b in books),
+            "position": {b.symbol: b.position for b in books},
+            "realized_pnl": realized,
+            "unrealized_pnl": unrealized,
+            "fees": fees,
+            "net_pnl": realized + unrealized - fees,
+            "slippage_cost": sum(b.slippage_cost for b in books),
+            "slippage_bps": (sum(b.slippage_cost for b in books) / taker_notional * 10000.0) if taker_notional else 0.0,
+            "open_orders": sum(1 for o in self._orders.values() if o["status"] in OPEN_STATUSES
+                               and (symbol is None or o["symbol"] == symbol)),
+        }
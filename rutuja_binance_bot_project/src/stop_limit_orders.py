@@ -7,29 +7,40 @@ Usage:
 """
 
 import argparse, sys
-from binance.exceptions import BinanceAPIException, BinanceOrderException
+import utils
 from utils import setup_logger, validate_symbol, get_client
+from exchange_info import ExchangeInfoCache
+from order_encoding import format_number
+from daemon_client import DEFAULT_ADDRESS, run_via_daemon
 
 logger = setup_logger("logs/stop_limit_orders.log")
 
-def place_stop_limit(client, symbol: str, side: str, stop_price: float, limit_price: float, quantity: float, test: bool=False):
+def stop_limit_params(symbol: str, side: str, stop_price: float, limit_price: float, quantity: float, filters=None) -> dict:
+    """Validate and snap a stop-limit order and return the futures_create_order parameters."""
     side = side.upper()
     if side not in ("BUY", "SELL"):
         raise ValueError("side must be BUY or SELL")
-    validate_symbol(symbol)
+    f = validate_symbol(symbol, filters)
     if side == "BUY" and limit_price >= stop_price:
         raise ValueError("For BUY stop-limit, limit_price should be less than stop_price (trigger).")
     if side == "SELL" and limit_price <= stop_price:
         raise ValueError("For SELL stop-limit, limit_price should be greater than stop_price (trigger).")
+    if f is not None:
+        quantity, limit_price = f.snap(quantity, limit_price)
+        stop_price = f.format_price(stop_price)
+    return dict(symbol=symbol, side=side, type="STOP", stopPrice=format_number(stop_price), price=format_number(limit_price),
+                timeInForce="GTC", quantity=quantity, reduceOnly=False)
+
+def place_stop_limit(client, symbol: str, side: str, stop_price: float, limit_price: float, quantity: float, test: bool=False, filters=None):
+    params = stop_limit_params(symbol, side, stop_price, limit_price, quantity, filters)
     try:
-        logger.info("Placing stop-limit: %s %s qty=%s stop=%s limit=%s", side, symbol, quantity, stop_price, limit_price)
-        res = client.futures_create_order(
-            symbol=symbol, side=side, type="STOP", stopPrice=str(stop_price),
-            price=str(limit_price), timeInForce="GTC", quantity=quantity, reduceOnly=False
-        ) if not test else {"test":"stop_limit"}
+        logger.info("Placing stop-limit: %s %s qty=%s stop=%s limit=%s", params["side"], symbol, params["quantity"],
+                    params["stopPrice"], params["price"])
+        res = client.futures_create_order(**params) if not test else {"test":"stop_limit"}
         logger.info("Stop-Limit response: %s", res)
         print("Response:", res)
-    except (BinanceAPIException, BinanceOrderException) as e:
+        return res
+    except (utils.BinanceAPIException, utils.BinanceOrderException) as e:
         logger.exception("Binance exception when placing stop-limit order: %s", e)
         sys.exit(1)
     except Exception as e:
@@ -46,9 +57,17 @@ def main():
     parser.add_argument("--api-key", required=False)
     parser.add_argument("--api-secret", required=False)
     parser.add_argument("--test", action="store_true")
+    parser.add_argument("--daemon", nargs="?", const=DEFAULT_ADDRESS, metavar="ADDRESS", help="Send the order through a running daemon.py")
     args = parser.parse_args()
+    try:
+        stop_limit_params(args.symbol, args.side, args.stop_price, args.limit_price, args.quantity)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.daemon:
+        sys.exit(run_via_daemon(args.daemon, "stop_limit", symbol=args.symbol, side=args.side, stop_price=args.stop_price,
+                                limit_price=args.limit_price, quantity=args.quantity))
     client = get_client(args.api_key, args.api_secret, test=args.test)
-    place_stop_limit(client, args.symbol, args.side, args.stop_price, args.limit_price, args.quantity, test=args.test)
+    place_stop_limit(client, args.symbol, args.side, args.stop_price, args.limit_price, args.quantity, test=args.test, filters=ExchangeInfoCache(client))
 
 if __name__ == "__main__":
     main()
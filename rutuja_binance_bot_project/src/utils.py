@@ -3,29 +3,60 @@ utils.py
 Shared utilities: JSON logger setup with rotation, client factory, and validations.
 """
 
-import logging, os, sys, json
+import logging, os, sys, json, queue, atexit, threading
 from logging import Logger
-from logging.handlers import RotatingFileHandler
-from binance.client import Client
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+try:
+    from .rate_limiter import ScheduledClient, RequestScheduler, default_scheduler
+    from .order_encoding import install_fast_signing
+except ImportError:
+    from rate_limiter import ScheduledClient, RequestScheduler, default_scheduler
+    from order_encoding import install_fast_signing
+
+try:
+    import orjson
+    def _dumps(payload) -> str:
+        return orjson.dumps(payload, default=str).decode()
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+    def _dumps(payload) -> str:
+        return json.dumps(payload, default=str)
 
 class JsonFormatter(logging.Formatter):
+    _ts_second = None
+    _ts_text = None
+    _ts_zone = None
+
     def format(self, record):
+        # strftime only needs to run once per second; milliseconds are appended per record so
+        # log_analytics.py can measure request/response latency, and "thread" pairs them up.
+        second = int(record.created)
+        if second != self._ts_second:
+            self._ts_text, self._ts_zone = self.formatTime(record, "%Y-%m-%dT%H:%M:%S|%z").split("|")
+            self._ts_second = second
         payload = {
-            "timestamp": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "timestamp": "%s.%03d%s" % (self._ts_text, record.msecs, self._ts_zone),
             "level": record.levelname,
             "logger": record.name,
+            "thread": record.thread,
             "message": record.getMessage()
         }
         if record.exc_info:
             payload["exc_info"] = self.formatException(record.exc_info)
-        return json.dumps(payload)
+        return _dumps(payload)
+
+class _LazyRotatingFileHandler(RotatingFileHandler):
+    """Creates the log directory and opens the file on the first record, not at setup."""
+    def _open(self):
+        if os.path.dirname(self.baseFilename):
+            os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
 
 def setup_logger(filename: str = "logs/bot.log") -> Logger:
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
     logger = logging.getLogger("binance_bot")
     logger.setLevel(logging.DEBUG)
     if not logger.handlers:
-        fh = RotatingFileHandler(filename, maxBytes=5*1024*1024, backupCount=5)
+        fh = _LazyRotatingFileHandler(filename, maxBytes=5*1024*1024, backupCount=5, delay=True)
         fh.setLevel(logging.DEBUG)
         fh.setFormatter(JsonFormatter())
         logger.addHandler(fh)
@@ -35,21 +66,132 @@ def setup_logger(filename: str = "logs/bot.log") -> Logger:
         logger.addHandler(sh)
     return logger
 
-def validate_symbol(symbol: str):
+class BoundedQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue without formatting them; the listener thread does the
+    formatting and I/O. Under backpressure DEBUG records are sampled (1 in `debug_sample_rate`
+    once the queue is half full) and dropped when it is full; INFO and above wait for space.
+    """
+    def __init__(self, q: queue.Queue, debug_sample_rate: int = 10):
+        super().__init__(q)
+        self.debug_sample_rate = max(1, debug_sample_rate)
+        self.dropped = 0
+        self._debug_seen = 0
+        self._high_water = max(1, q.maxsize // 2) if q.maxsize else None
+
+    def prepare(self, record):
+        # Same-process queue: keep msg/args/exc_info as-is so formatting happens on the listener.
+        return record
+
+    def enqueue(self, record):
+        if record.levelno <= logging.DEBUG and self._high_water is not None:
+            if self.queue.qsize() >= self._high_water:
+                self._debug_seen += 1
+                if self._debug_seen % self.debug_sample_rate:
+                    self.dropped += 1
+                    return
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+            return
+        self.queue.put(record)
+
+_queue_listener = None
+_queue_lock = threading.Lock()
+
+def enable_queued_logging(queue_size: int = 10000, debug_sample_rate: int = 10) -> QueueListener:
+    """
+    Move the bot logger's handlers behind a background QueueListener so order threads only pay
+    for an enqueue. Safe to call more than once; the listener is flushed at interpreter exit.
+    """
+    global _queue_listener
+    with _queue_lock:
+        if _queue_listener is not None:
+            return _queue_listener
+        logger = logging.getLogger("binance_bot")
+        handlers = list(logger.handlers)
+        q = queue.Queue(maxsize=queue_size)
+        _queue_listener = QueueListener(q, *handlers, respect_handler_level=True)
+        for h in handlers:
+            logger.removeHandler(h)
+        logger.addHandler(BoundedQueueHandler(q, debug_sample_rate))
+        _queue_listener.start()
+        atexit.register(disable_queued_logging)
+        return _queue_listener
+
+def disable_queued_logging():
+    """Drain the queue and put the original handlers back on the logger."""
+    global _queue_listener
+    with _queue_lock:
+        if _queue_listener is None:
+            return
+        logger = logging.getLogger("binance_bot")
+        for h in list(logger.handlers):
+            if isinstance(h, BoundedQueueHandler):
+                logger.removeHandler(h)
+        _queue_listener.stop()
+        for h in _queue_listener.handlers:
+            logger.addHandler(h)
+        _queue_listener = None
+
+def validate_symbol(symbol: str, filters=None):
+    """
+    With an exchange_info.ExchangeInfoCache the symbol must be listed and TRADING, and its
+    SymbolFilters are returned; without one only a string heuristic is applied.
+    """
+    if filters is not None:
+        info = filters.get(symbol)
+        if info.status != "TRADING":
+            raise ValueError("Symbol %s is not trading (status=%s)" % (symbol, info.status))
+        return info
     if not isinstance(symbol, str) or len(symbol) < 6 or not symbol.endswith("USDT"):
         raise ValueError("Symbol looks invalid. Example valid symbol: BTCUSDT")
 
-def get_client(api_key: str = None, api_secret: str = None, test: bool=False):
+def get_client(api_key: str = None, api_secret: str = None, test: bool=False, scheduler: RequestScheduler = None, rate_limited: bool = True,
+               risk=None):
     """
     Returns a configured Client. If api_key/secret are None, it will expect environment variables BINANCE_API_KEY and BINANCE_API_SECRET.
     For test=True you should configure the client to point at Binance futures testnet (see README).
+    Unless rate_limited=False, order calls are routed through `scheduler` (default: the shared process-wide one).
+    With a risk.RiskEngine, new orders are checked by it before they are scheduled.
+    Requests are signed with order_encoding's precomputed HMAC state and canonical number formatting.
     """
     ak = api_key or os.environ.get("BINANCE_API_KEY")
     sk = api_secret or os.environ.get("BINANCE_API_SECRET")
     if not ak or not sk:
         raise EnvironmentError("API key and secret must be provided either via args or environment variables.")
+    from binance.client import Client
     client = Client(ak, sk)
     if test:
         # To use testnet, users should configure the base URL as described in the README.
         client.API_URL = "https://testnet.binancefuture.com"
+    install_fast_signing(client)
+    if rate_limited:
+        client = ScheduledClient(client, scheduler or default_scheduler())
+    if risk is not None:
+        try:
+            from .risk import RiskClient
+        except ImportError:
+            from risk import RiskClient
+        client = RiskClient(client, risk)
     return client
+
+# python-binance's package __init__ imports the whole client (requests, dateparser, ...), about
+# 0.4 s, so its names are resolved on first attribute access: CLI modules write
+# `except (utils.BinanceAPIException, ...)`, which Python only evaluates while handling an error.
+_LAZY_NAMES = {
+    "Client": "binance.client",
+    "BinanceAPIException": "binance.exceptions",
+    "BinanceOrderException": "binance.exceptions",
+    "BinanceRequestException": "binance.exceptions",
+}
+
+def __getattr__(name):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    import importlib
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
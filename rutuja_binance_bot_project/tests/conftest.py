@@ -0,0 +1,5 @@
+import os, sys
+
+# Modules under src/ import their siblings script-style (``from utils import ...``),
+# so put src/ on the path the same way ``python src/<module>.py`` would.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
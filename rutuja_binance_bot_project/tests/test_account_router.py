@@ -0,0 +1,78 @@
+import json, shutil, os, threading, time
+import pytest
+from src.account_router import Account, AccountRouter, summarize
+from src.exchange_info import ExchangeInfoCache
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "futures_exchange_info.json")
+
+class StubClient:
+    def __init__(self, latency=0.0, fail=None):
+        self.latency = latency
+        self.fail = fail
+        self.orders = []
+        self._lock = threading.Lock()
+    def futures_create_order(self, **params):
+        time.sleep(self.latency)
+        if self.fail:
+            raise ValueError(self.fail)
+        with self._lock:
+            self.orders.append(params)
+            return {"orderId": len(self.orders), "status": "NEW", "symbol": params["symbol"]}
+
+@pytest.fixture
+def filters(tmp_path):
+    path = str(tmp_path / "exchange_info.json")
+    shutil.copy(FIXTURE, path)
+    return ExchangeInfoCache(path=path)
+
+def test_fan_out_places_every_pair_with_per_account_sizes(filters):
+    clients = {n: StubClient(latency=0.01) for n in ("a", "b", "c")}
+    with AccountRouter([Account(n, client=c, workers=2) for n, c in clients.items()], filters) as router:
+        start = time.perf_counter()
+        results = router.place_order(["BTCUSDT", "ETHUSDT"], "buy", {"a": 0.01, "b": 0.02}, order_type="LIMIT", price=30000)
+        elapsed = time.perf_counter() - start
+    assert [(r["account"], r["symbol"]) for r in results] == [("a", "BTCUSDT"), ("a", "ETHUSDT"), ("b", "BTCUSDT"), ("b", "ETHUSDT")]
+    assert all(r["error"] is None for r in results)
+    assert clients["a"].orders[0]["quantity"] == "0.010" and clients["b"].orders[0]["quantity"] == "0.020"
+    assert clients["c"].orders == []
+    assert elapsed < 0.04  # four 10 ms orders in parallel, not in sequence
+
+def test_failing_and_throttled_accounts_are_isolated():
+    ok = StubClient()
+    broken = StubClient(fail="Margin is insufficient.")
+    slow = Account("slow", client=StubClient(), limits={("orders", 1): 1}, workers=1)  # one order per second
+    router = AccountRouter([Account("ok", client=ok), Account("broken", client=broken), slow])
+    try:
+        start = time.perf_counter()
+        results = router.place_order(["BTCUSDT", "ETHUSDT", "BNBUSDT"], "SELL", 0.1, timeout=0.5)
+        assert time.perf_counter() - start < 1.0
+    finally:
+        router.close(wait=False)
+    summary = summarize(results)
+    assert summary["ok"] == {"ok": 3, "failed": 0, "errors": {}}
+    assert summary["broken"]["failed"] == 3 and summary["broken"]["errors"]["BTCUSDT"] == "Margin is insufficient."
+    assert summary["slow"]["ok"] == 1 and summary["slow"]["failed"] == 2
+    assert router.status()["broken"]["failed"] == 3
+
+def test_invalid_order_is_rejected_before_any_account_sends(filters):
+    clients = [StubClient(), StubClient()]
+    with AccountRouter([Account("a", client=clients[0]), Account("b", client=clients[1])], filters) as router:
+        with pytest.raises(ValueError):
+            router.place_order(["BTCUSDT", "NOPE"], "BUY", 0.01)
+        with pytest.raises(ValueError):
+            router.place_order(["BTCUSDT"], "BUY", 0.01, accounts=["a", "zzz"])
+    assert clients[0].orders == [] and clients[1].orders == []
+
+def test_run_strategy_and_config(tmp_path, filters, monkeypatch):
+    from src.advanced.twap import execute_twap
+    clients = {"a": StubClient(), "b": StubClient()}
+    with AccountRouter([Account(n, client=c) for n, c in clients.items()], filters) as router:
+        results = router.run_strategy(execute_twap, ["BTCUSDT"], side="BUY", total_qty=0.01, slices=2, interval_seconds=0)
+    assert [len(r["response"]) for r in results] == [2, 2]
+    assert [o["quantity"] for o in clients["a"].orders] == ["0.005", "0.005"]
+
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps([{"name": "sub1", "api_key_env": "SUB1_KEY", "api_secret_env": "SUB1_SECRET"}]))
+    monkeypatch.delenv("SUB1_KEY", raising=False)
+    with pytest.raises(EnvironmentError):
+        AccountRouter.from_config(str(path))
@@ -0,0 +1,58 @@
+import asyncio, hashlib, hmac, time
+from urllib.parse import parse_qsl
+import pytest
+from aiohttp import web
+from binance.exceptions import BinanceAPIException
+from src.async_bot import AsyncBasicBot
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_post("/fapi/v1/order", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, "http://127.0.0.1:%d" % port
+
+def test_async_orders_are_signed_and_concurrent():
+    seen = []
+    async def handler(request):
+        body = await request.text()
+        query, signature = body.rsplit("&signature=", 1)
+        assert hmac.new(b"secret", query.encode(), hashlib.sha256).hexdigest() == signature
+        assert request.headers["X-MBX-APIKEY"] == "key"
+        seen.append(dict(parse_qsl(query)))
+        await asyncio.sleep(0.05)
+        return web.json_response({"orderId": len(seen), "status": "NEW"})
+
+    async def run():
+        runner, url = await _serve(handler)
+        try:
+            async with AsyncBasicBot("key", "secret", base_url=url, connection_limit=50) as bot:
+                coros = [bot.place_limit_order("btcusdt", "buy", 30000 + i, 0.001) for i in range(20)]
+                return await asyncio.gather(*coros)
+        finally:
+            await runner.cleanup()
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    assert time.perf_counter() - start < 0.05 * 20 / 2
+    assert len(results) == 20
+    assert {p["symbol"] for p in seen} == {"BTCUSDT"} and {p["type"] for p in seen} == {"LIMIT"}
+
+def test_async_error_raises_binance_exception():
+    async def handler(request):
+        return web.json_response({"code": -2019, "msg": "Margin is insufficient."}, status=400)
+
+    async def run():
+        runner, url = await _serve(handler)
+        try:
+            async with AsyncBasicBot("key", "secret", base_url=url) as bot:
+                await bot.place_market_order("BTCUSDT", "SELL", 1)
+        finally:
+            await runner.cleanup()
+
+    with pytest.raises(BinanceAPIException) as exc:
+        asyncio.run(run())
+    assert exc.value.code == -2019
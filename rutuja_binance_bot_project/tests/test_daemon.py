@@ -0,0 +1,61 @@
+import os, shutil, subprocess, sys
+import pytest
+import requests
+from src.daemon import BotDaemon, mark_stream
+from src.daemon_client import DaemonClient, DaemonError
+from src.exchange_info import ExchangeInfoCache
+from src.simulator import SimulatedFuturesClient
+from src.risk import RiskEngine, RiskLimits, RiskRejected
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE = os.path.join(ROOT, "tests", "fixtures", "futures_exchange_info.json")
+
+@pytest.fixture
+def daemon(tmp_path):
+    shutil.copy(FIXTURE, str(tmp_path / "exchange_info.json"))
+    client = SimulatedFuturesClient()
+    client.process_trade("BTCUSDT", 0, 30000.0)
+    bot = BotDaemon(client, str(tmp_path / "bot.sock"), ExchangeInfoCache(path=str(tmp_path / "exchange_info.json"))).start()
+    yield bot
+    bot.shutdown()
+
+def test_commands_over_one_connection(daemon):
+    with DaemonClient(daemon.address) as conn:
+        assert conn.request("ping") == {"pong": True}
+        res = conn.request("limit", symbol="BTCUSDT", side="BUY", price=29950.04, quantity=0.0104)
+        assert res["price"] == "29950.0" and res["origQty"] == "0.01" and res["status"] == "NEW"
+        twap = conn.request("twap", symbol="BTCUSDT", side="SELL", total_qty=0.01, slices=2, interval_seconds=60)
+        assert conn.request("twap_cancel", execution=twap["execution"])["state"] == "CANCELLED"
+        with pytest.raises(DaemonError, match="not trading"):
+            conn.request("market", symbol="LUNAUSDT", side="BUY", quantity=1)
+        assert conn.request("status")["served"] == 4
+
+def test_transport_error_is_a_failed_reply_not_a_dropped_connection(daemon, monkeypatch):
+    def drop(**params):
+        raise requests.ConnectionError("Connection aborted.")
+    monkeypatch.setattr(daemon.client, "futures_create_order", drop)
+    with DaemonClient(daemon.address) as conn:
+        with pytest.raises(DaemonError, match="Connection aborted"):
+            conn.request("market", symbol="BTCUSDT", side="BUY", quantity=0.002)
+        status = conn.request("status")
+        assert (status["served"], status["failed"]) == (0, 1)
+
+def test_cli_thin_client(daemon):
+    out = subprocess.run([sys.executable, os.path.join(ROOT, "src", "market_orders.py"), "--symbol", "BTCUSDT",
+                          "--side", "BUY", "--quantity", "0.002", "--daemon", daemon.address],
+                         cwd=str(os.path.dirname(daemon.address)), capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stdout + out.stderr
+    assert "'status': 'FILLED'" in out.stdout
+
+def test_mark_stream_keeps_the_price_band_current():
+    risk = RiskEngine(RiskLimits(max_price_deviation=0.05), {"ETHUSDT": RiskLimits()})
+    risk.set_mark("BTCUSDT", 30000.0)                   # the startup mark from sync()
+    assert risk.tracked_symbols() == ["BTCUSDT", "ETHUSDT"]
+    stream = mark_stream(risk, risk.tracked_symbols())
+    assert "btcusdt@aggTrade/ethusdt@aggTrade" in stream.url and stream.root is None
+    order = {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "price": "36000", "quantity": "0.001"}
+    with pytest.raises(RiskRejected):
+        risk.reserve(dict(order))
+    stream.on_message({"stream": "btcusdt@aggTrade", "data": {"e": "aggTrade", "s": "BTCUSDT", "p": "35900.0", "q": "1", "T": 1}})
+    risk.reserve(dict(order))
+    assert risk.status()["symbols"]["BTCUSDT"]["mark"] == 35900.0
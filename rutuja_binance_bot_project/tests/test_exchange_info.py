@@ -0,0 +1,72 @@
+import json, os, shutil
+from decimal import Decimal
+import pytest
+from src.exchange_info import ExchangeInfoCache, split_qty
+from src.utils import validate_symbol
+from src.advanced.twap import execute_twap
+from src.advanced.grid_strategy import create_grid
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "futures_exchange_info.json")
+
+class FixtureClient:
+    def __init__(self):
+        self.fetches = 0
+    def futures_exchange_info(self):
+        self.fetches += 1
+        with open(FIXTURE) as f:
+            return json.load(f)
+    def futures_create_order(self, **kwargs):
+        return kwargs
+
+@pytest.fixture
+def cache(tmp_path):
+    path = str(tmp_path / "exchange_info.json")
+    shutil.copy(FIXTURE, path)
+    return ExchangeInfoCache(path=path)
+
+def test_filters_loaded_from_disk(cache):
+    btc = cache.get("BTCUSDT")
+    assert btc.tick_size == Decimal("0.10") and btc.step_size == Decimal("0.001")
+    assert btc.min_notional == Decimal("100") and btc.market_max_qty == Decimal("120")
+    assert "DOGEUSDT" not in cache
+
+def test_stale_cache_is_refetched_and_rewritten(tmp_path):
+    path = str(tmp_path / "sub" / "exchange_info.json")
+    client = FixtureClient()
+    cache = ExchangeInfoCache(client, path=path, ttl=60)
+    assert cache.get("ETHUSDT").tick_size == Decimal("0.01")
+    assert client.fetches == 1 and os.path.exists(path)
+    os.utime(path, (0, 0))
+    ExchangeInfoCache(client, path=path, ttl=60).get("ETHUSDT")
+    assert client.fetches == 2
+
+def test_snap_rounds_to_exchange_grid(cache):
+    btc = cache.get("BTCUSDT")
+    assert btc.snap(0.0123456, 30000.0499999) == ("0.012", "30000.0")
+    assert cache.get("1000SHIBUSDT").snap(500000.9, 1e-05) == ("500000", "0.000010")
+    with pytest.raises(ValueError):
+        btc.snap(0.001, 30000)  # 30 USDT notional < 100
+    with pytest.raises(ValueError):
+        btc.snap(500, market=True)
+
+def test_validate_symbol_uses_cache(cache):
+    assert validate_symbol("BTCUSDT", cache).symbol == "BTCUSDT"
+    with pytest.raises(ValueError):
+        validate_symbol("LUNAUSDT", cache)
+    with pytest.raises(ValueError):
+        validate_symbol("FOOUSDT", cache)
+
+def test_split_qty_is_exact():
+    parts = split_qty(0.01, 3, Decimal("0.001"))
+    assert parts == [Decimal("0.004"), Decimal("0.003"), Decimal("0.003")]
+    assert sum(parts) == Decimal("0.010")
+
+def test_twap_and_grid_send_snapped_values(tmp_path):
+    path = str(tmp_path / "exchange_info.json")
+    shutil.copy(FIXTURE, path)
+    cache = ExchangeInfoCache(path=path)
+    res = execute_twap(FixtureClient(), "BTCUSDT", "BUY", total_qty=0.01, slices=3, interval_seconds=0, filters=cache)
+    assert [r["quantity"] for r in res] == ["0.004", "0.003", "0.003"]
+    orders = create_grid(FixtureClient(), "ETHUSDT", lower=3000, upper=3100, grid_size=4, quantity=0.0101, filters=cache)
+    assert [o["price"] for o in orders] == ["3000.00", "3033.33", "3066.67", "3100.00"]
+    assert {o["quantity"] for o in orders} == {"0.010"}
@@ -1,4 +1,6 @@
-from src.advanced.grid_strategy import create_grid
+import requests
+from binance.exceptions import BinanceAPIException
+from src.advanced.grid_strategy import create_grid, create_grid_batch
 class DummyClient:
     def futures_create_order(self, **kwargs):
         return {"ok": True, "kwargs": kwargs}
@@ -6,3 +8,91 @@ def test_grid_params():
     client = DummyClient()
     orders = create_grid(client, "BTCUSDT", lower=30000, upper=31000, grid_size=3, quantity=0.001, test=True)
     assert len(orders) == 3
+
+class FlakyBatchClient:
+    def __init__(self, reject_once):
+        self.reject_once = set(reject_once)
+        self.sent = []
+    def futures_place_batch_order(self, batchOrders):
+        out = []
+        for o in batchOrders:
+            self.sent.append(o["price"])
+            if o["price"] in self.reject_once:
+                self.reject_once.discard(o["price"])
+                out.append({"code": -1008, "msg": "Server is currently overloaded"})
+            else:
+                out.append({"orderId": len(self.sent), "price": o["price"]})
+        return out
+
+def test_grid_batch_retries_only_failed_levels():
+    client = FlakyBatchClient(reject_once={"30200.0", "30700.0"})
+    res = create_grid_batch(client, "BTCUSDT", lower=30000, upper=31000, grid_size=11, quantity=0.001, max_workers=3)
+    assert [r["index"] for r in res] == list(range(11))
+    assert all(r["error"] is None for r in res)
+    assert len(client.sent) == 13
+    assert res[2]["attempts"] == 2 and res[7]["attempts"] == 2 and res[0]["attempts"] == 1
+    assert res[2]["response"]["price"] == "30200.0"
+
+class DroppingBatchClient(FlakyBatchClient):
+    def futures_place_batch_order(self, batchOrders):
+        if "30700.0" in [o["price"] for o in batchOrders]:
+            self.sent.extend(o["price"] for o in batchOrders)
+            raise requests.ConnectionError("Connection aborted.")
+        return super().futures_place_batch_order(batchOrders)
+
+def test_grid_batch_transport_error_fails_its_batch_without_resending():
+    client = DroppingBatchClient(reject_once=set())
+    res = create_grid_batch(client, "BTCUSDT", lower=30000, upper=31000, grid_size=11, quantity=0.001, max_workers=3)
+    failed = [r["index"] for r in res if r["error"] is not None]
+    assert failed == [5, 6, 7, 8, 9]
+    assert all(r["attempts"] == 1 for r in res)
+    assert "Connection aborted" in res[7]["error"] and res[7]["response"] is None
+    assert len(client.sent) == 11
+
+class UnknownStatusBatchClient(FlakyBatchClient):
+    def futures_place_batch_order(self, batchOrders):
+        prices = [o["price"] for o in batchOrders]
+        if "30200.0" in prices:
+            self.sent.extend(prices)
+            raise BinanceAPIException(None, 503, '{"code": -1007, "msg": "Timeout waiting for response from backend server."}')
+        out = super().futures_place_batch_order(batchOrders)
+        if "30700.0" in prices:
+            out[prices.index("30700.0")] = {"code": -1007, "msg": "Send status unknown; execution status unknown."}
+        return out
+
+def test_grid_batch_does_not_resend_unknown_status_orders():
+    client = UnknownStatusBatchClient(reject_once={"30900.0"})
+    res = create_grid_batch(client, "BTCUSDT", lower=30000, upper=31000, grid_size=11, quantity=0.001, max_workers=3)
+    assert [r["index"] for r in res if r["error"] is not None] == [0, 1, 2, 3, 4, 7]
+    assert all(r["attempts"] == 1 for r in res if r["index"] != 9) and res[9]["attempts"] == 2
+    assert len(client.sent) == 12
+
+from src.advanced.grid_planner import plan_grid, recenter
+
+def test_plan_grid_geometric_sides_follow_mark_price():
+    plan = plan_grid(100, 400, 3, mode="geometric", mark_price=200, notional=100, tick_size=0.1, step_size=0.001)
+    assert plan.prices.tolist() == [100.0, 200.0, 400.0]
+    assert plan.sides.tolist() == [1, 0, -1]
+    assert plan.quantities.tolist() == [1.0, 0.5, 0.25]
+    assert [(i, side) for i, side, _, _ in plan.orders()] == [(0, "BUY"), (2, "SELL")]
+
+def test_recenter_only_touches_changed_levels():
+    plan = plan_grid(30000, 31000, 11, mark_price=30500, quantity=0.001, tick_size=0.1)
+    moved, diff = recenter(plan, 30700)
+    assert moved.prices[0] == 30200.0 and moved.prices[-1] == 31200.0
+    # 30200..30400 and 30800..31000 keep their orders; 30600 flips to BUY and 30700 goes idle.
+    assert plan.prices[diff.cancel].tolist() == [30000.0, 30100.0, 30600.0, 30700.0]
+    assert moved.prices[diff.place].tolist() == [30500.0, 30600.0, 31100.0, 31200.0]
+    assert len(diff.keep) == 6
+
+def test_recenter_sizes_new_levels_from_notional():
+    plan = plan_grid(100, 200, 11, mark_price=150, notional=1000, tick_size=0.1, step_size=0.001)
+    moved, _ = recenter(plan, 180)
+    assert moved.prices[-1] == 230.0
+    # Levels past the old upper bound are sized from the notional, not copied from the 200.0 edge.
+    assert moved.quantities[-3:].tolist() == [4.761, 4.545, 4.347]
+    assert moved.quantities[:8].tolist() == plan.quantities[3:].tolist()
+
+def test_grid_with_mark_price_skips_level_on_mark():
+    orders = create_grid(DummyClient(), "BTCUSDT", lower=30000, upper=31000, grid_size=3, quantity=0.001, test=True, mark_price=30500)
+    assert [(o["side"], o["price"]) for o in orders] == [("BUY", "30000.0"), ("SELL", "31000.0")]
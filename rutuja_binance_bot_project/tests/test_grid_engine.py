@@ -0,0 +1,79 @@
+import math
+import requests
+from src.simulator import SimulatedFuturesClient
+from src.backtest import Columns, run_backtest
+from src.advanced.grid_planner import plan_grid
+from src.advanced.grid_engine import GridEngine
+from src.advanced.oco_listener import UserDataStream
+
+def test_engine_rearms_filled_levels_in_simulator():
+    client = SimulatedFuturesClient(maker_fee=0, taker_fee=0)
+    client.process_trade("BTCUSDT", 0, 100.0)
+    plan = plan_grid(96, 104, 9, mark_price=100, quantity=1, tick_size=0.1)
+    engine = GridEngine(client, "BTCUSDT", plan).attach(client).start()
+    assert [side for _, side, _ in engine.open_levels()] == ["BUY"] * 4 + ["SELL"] * 4
+    n = 2000
+    closes = [100 + 5 * math.sin(i / 20.0) for i in range(n)]
+    klines = Columns(open_time=list(range(n)), open=closes, high=[c + 0.2 for c in closes],
+                     low=[c - 0.2 for c in closes], close=closes, volume=[10.0] * n)
+    report = run_backtest(client, "BTCUSDT", klines)
+    assert engine.fills.sum() > 50 and engine.rearmed == engine.fills.sum()
+    assert report["realized_pnl"] > 0
+    # One empty slot is kept next to the price; every other level holds exactly one order.
+    assert len(engine.open_levels()) == 8 == len(client.futures_get_open_orders(symbol="BTCUSDT"))
+    engine.stop()
+    assert client.futures_get_open_orders(symbol="BTCUSDT") == []
+
+class RecordingClient:
+    def __init__(self):
+        self.created = []
+    def futures_place_batch_order(self, batchOrders):
+        return [{"orderId": i + 1, "clientOrderId": o["newClientOrderId"]} for i, o in enumerate(batchOrders)]
+    def futures_create_order(self, **params):
+        self.created.append(params)
+        return {"orderId": 100 + len(self.created)}
+
+def test_engine_on_user_data_stream_events():
+    client = RecordingClient()
+    stream = UserDataStream(client, "ws://unused/")
+    plan = plan_grid(100, 104, 5, mark_price=102, quantity=0.01)
+    engine = GridEngine(client, "BTCUSDT", plan).attach(stream).start()
+    buy_cid = engine.level_client_ids[1]
+    stream._dispatch({"e": "ORDER_TRADE_UPDATE", "o": {"i": 2, "c": buy_cid, "X": "PARTIALLY_FILLED"}})
+    assert client.created == []
+    stream._dispatch({"e": "ORDER_TRADE_UPDATE", "o": {"i": 2, "c": buy_cid, "X": "FILLED"}})
+    assert [(o["side"], o["price"]) for o in client.created] == [("SELL", "102.0")]
+    assert engine.order_ids[2] == 101 and engine.order_ids[1] == 0
+    assert [lvl for lvl, _, _ in engine.open_levels()] == [0, 2, 3, 4]
+
+class LossyClient(SimulatedFuturesClient):
+    """Places the second batch but loses the response; with `drop`, orders die before they are sent."""
+    def __init__(self):
+        super().__init__(maker_fee=0, taker_fee=0)
+        self.batches = 0
+        self.drop = False
+    def futures_place_batch_order(self, batchOrders):
+        self.batches += 1
+        res = super().futures_place_batch_order(batchOrders=batchOrders)
+        if self.batches == 2:
+            raise requests.ReadTimeout("Read timed out.")
+        return res
+    def futures_create_order(self, **params):
+        if self.drop:
+            raise requests.ConnectionError("Connection aborted.")
+        return super().futures_create_order(**params)
+
+def test_transport_errors_are_reconciled_not_resent():
+    client = LossyClient()
+    client.process_trade("BTCUSDT", 0, 100.0)
+    plan = plan_grid(96, 104, 9, mark_price=100, quantity=1, tick_size=0.1)
+    engine = GridEngine(client, "BTCUSDT", plan).attach(client).start()
+    # The batch whose response was lost is found among the open orders, with its order ids.
+    assert len(engine.open_levels()) == 8 == len(client.futures_get_open_orders(symbol="BTCUSDT"))
+    assert client.batches == 2 and all(engine.order_ids[[0, 1, 2, 3, 5, 6, 7, 8]] > 0)
+    # The re-arm SELL never reached the exchange: the level is freed, not left OPEN.
+    client.drop = True
+    client.process_trade("BTCUSDT", 1, 98.9)
+    assert engine.fills[3] == 1 and engine.errors == 1
+    assert [lvl for lvl, _, _ in engine.open_levels()] == [0, 1, 2, 5, 6, 7, 8]
+    assert engine.state[4] == 0
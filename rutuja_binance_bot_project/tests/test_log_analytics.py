@@ -0,0 +1,64 @@
+import gzip, logging, os, subprocess, sys
+import pytest
+from src.utils import JsonFormatter
+from src.log_analytics import analyze, log_files
+
+T0 = 1760000000.0
+
+def _line(t, msg, *args, level=logging.INFO, thread=1, exc=None):
+    rec = logging.LogRecord("binance_bot", level, __file__, 1, msg, args, exc)
+    rec.created, rec.msecs, rec.thread = t, (t - int(t)) * 1000, thread
+    return JsonFormatter().format(rec) + "\n"
+
+def _api_error():
+    try:
+        raise RuntimeError("APIError(code=-2019): Margin is insufficient.")
+    except RuntimeError:
+        return sys.exc_info()
+
+def test_rotations_are_read_oldest_first_including_gzip(tmp_path):
+    for name in ("bot.log", "bot.log.1", "bot.log.2.gz", "other.log", "notes.txt"):
+        (tmp_path / name).write_text("")
+    names = [p.rsplit("/", 1)[1] for p in log_files([str(tmp_path)])]
+    assert names == ["bot.log.2.gz", "bot.log.1", "bot.log", "other.log"]
+    assert log_files([str(tmp_path / "bot.log")]) == [str(tmp_path / n) for n in ("bot.log.2.gz", "bot.log.1", "bot.log")]
+
+def test_lifecycles_latency_and_error_codes(tmp_path):
+    old = [_line(T0, "Placing LIMIT order %s %s qty=%s price=%s", "BUY", "BTCUSDT", "0.001", "30000.0"),
+           _line(T0 + 0.5, "AsyncBasicBot initialized (base_url=x, connection_limit=100)"),
+           _line(T0, "Placing MARKET order %s %s qty=%s", "SELL", "ETHUSDT", "1", thread=2),
+           # Same thread, answered out of order: the ETH response still pairs with the ETH request.
+           _line(T0 + 0.020, "Placing MARKET order %s %s qty=%s", "SELL", "BTCUSDT", "0.002", thread=2),
+           _line(T0 + 0.030, "Market order response: %s", {"orderId": 8, "symbol": "BTCUSDT", "side": "SELL", "status": "FILLED"}, thread=2),
+           _line(T0 + 0.040, "Limit order response: %s", {"orderId": 7, "symbol": "BTCUSDT", "side": "BUY", "status": "NEW",
+                                                          "clientOrderId": "web_1"})]
+    with gzip.open(tmp_path / "basic_bot.log.1.gz", "wt") as f:
+        f.writelines(old)
+    new = [_line(T0 + 0.055, "Binance error placing market order: %s", "APIError(code=-2019): Margin is insufficient.",
+                 level=logging.ERROR, thread=2, exc=_api_error()),
+           _line(T0 + 2, "Order update id=%s status=%s", "7", "PARTIALLY_FILLED", thread=3),
+           _line(T0 + 3.5, "Order update id=%s status=%s", "7", "FILLED", thread=3),
+           _line(T0 + 4, "Grid level %d at %s rejected: %s", 2, "29000.0", {"code": -2010, "msg": "Order would immediately trigger."},
+                 level=logging.ERROR, thread=4),
+           _line(T0 + 5, "Placing %s at %s", "BUY", "29900.0", thread=4),
+           "not json\n"]
+    (tmp_path / "basic_bot.log").write_text("".join(new))
+    seen = []
+    report = analyze([str(tmp_path / "basic_bot.log")], seen.append)
+    assert report["lines"] == 12 and len(report["files"]) == 2
+    o = report["orders"]
+    assert (o["requests"], o["responses"], o["failed"], o["no_response"], o["updates"]) == (4, 2, 2, 1, 2)
+    assert o["by_kind"] == {"LIMIT": 1, "MARKET": 2, "GRID": 1} and o["by_final_status"] == {"FILLED": 2}
+    assert report["latency_ms"]["LIMIT"]["max"] == pytest.approx(40, abs=1)
+    assert report["latency_ms"]["MARKET"]["count"] == 1 and report["latency_ms"]["MARKET"]["max"] == pytest.approx(10, abs=1)
+    assert report["errors"]["-2019"]["count"] == 1 and report["errors"]["-2019"]["message"].startswith("Margin is insufficient")
+    assert report["errors"]["-2010"]["message"] == "Order would immediately trigger."
+    by_id = {lc["orderId"]: lc for lc in seen}
+    assert by_id["7"]["statuses"] == ["NEW", "PARTIALLY_FILLED", "FILLED"] and by_id["7"]["clientOrderId"] == "web_1"
+    assert by_id["7"]["lifetime_ms"] == pytest.approx(3500, abs=1) and by_id["8"]["kind"] == "MARKET"
+    assert report["lifetime_ms"]["count"] == 2
+
+def test_imports_as_a_package_without_src_on_the_path():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", "import src.log_analytics"], cwd=root, capture_output=True, text=True, timeout=60)
+    assert out.returncode == 0, out.stderr
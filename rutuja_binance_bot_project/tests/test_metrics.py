@@ -0,0 +1,97 @@
+import os, random, shutil, threading, time, urllib.request
+import numpy as np
+from src import metrics
+from src.metrics import MetricsRegistry, Histogram, bucket_index, bucket_indices, bucket_value, instrument_signing, serve_metrics
+from src.basic_bot import BasicBot
+from src.exchange_info import ExchangeInfoCache
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "futures_exchange_info.json")
+
+def test_buckets_keep_values_within_two_percent():
+    rng = random.Random(7)
+    values = [0, 1, 127, 128, 255, 256] + [int(10 ** rng.uniform(2, 13)) for _ in range(5000)]
+    idx = bucket_indices(np.array(values, dtype=np.int64)).tolist()
+    for v, i in zip(values, idx):
+        assert i == bucket_index(v)
+        assert bucket_value(i) <= v and v - bucket_value(i) <= v / 64
+
+def test_quantiles_and_buffered_folding():
+    h = Histogram("network")
+    for us in range(1, 10001):            # 1 µs .. 10 ms, uniform
+        h.record(us * 1000)
+    assert h.count == 8192                # two full buffers folded, the rest still pending
+    s = h.summary()
+    assert s["count"] == 10000 and s["max_us"] == 10000
+    assert abs(s["p50_us"] - 5000) / 5000 < 0.02 and abs(s["p99_us"] - 9900) / 9900 < 0.02
+
+def test_concurrent_records_are_not_lost():
+    h = Histogram("x")
+    def work():
+        for _ in range(20000):
+            h.record(1500)
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    h.fold()
+    assert h.count == 80000 and h.counts[bucket_index(1500)] == 80000
+
+def test_timer_decorator_and_order_timer_stages():
+    reg = MetricsRegistry()
+    with reg.timer("signal", symbol="BTCUSDT"):
+        time.sleep(0.002)
+
+    @reg.timed("risk")
+    def check():
+        return 1
+    check()
+
+    class Client:
+        def _generate_signature(self, data):
+            time.sleep(0.001)
+            return "sig"
+        def futures_create_order(self, **params):
+            self._generate_signature(params)
+            return {"orderId": 1, "updateTime": time.time() * 1e3}
+    client = instrument_signing(instrument_signing(Client()))
+    t = reg.order("BTCUSDT", "LIMIT")
+    t.send(client.futures_create_order, symbol="BTCUSDT")
+    stages = {(s["stage"], s["symbol"], s["type"]): s for s in reg.snapshot()}
+    assert stages[("signal", "BTCUSDT", "")]["p50_us"] >= 1900
+    assert stages[("risk", "", "")]["count"] == 1
+    signing = stages[("signing", "BTCUSDT", "LIMIT")]
+    assert signing["count"] == 1 and 900 <= signing["p50_us"] < 50000
+    assert stages[("network", "BTCUSDT", "LIMIT")]["count"] == 1
+    assert ("exchange", "BTCUSDT", "LIMIT") in stages
+
+def test_basic_bot_records_every_stage_and_endpoint_serves_them(tmp_path):
+    path = str(tmp_path / "exchange_info.json")
+    shutil.copy(FIXTURE, path)
+
+    class Client:
+        def futures_create_order(self, **params):
+            return {"orderId": 7, "status": "NEW", **params}
+    reg = MetricsRegistry()
+    bot = BasicBot("key", "secret", testnet=False, client=Client(), filters=ExchangeInfoCache(path=path), metrics=reg)
+    for _ in range(3):
+        bot.place_limit_order("BTCUSDT", "BUY", 30000, 0.01)
+    bot.place_market_order("BTCUSDT", "SELL", 0.01)
+    got = {(s["stage"], s["type"]): s["count"] for s in reg.snapshot()}
+    assert got[("validation", "LIMIT")] == 3 and got[("network", "LIMIT")] == 3
+    assert got[("logging", "LIMIT")] == 6 and got[("validation", "MARKET")] == 1
+
+    server = serve_metrics(0, registry=reg)
+    try:
+        url = "http://127.0.0.1:%d/metrics" % server.server_address[1]
+        body = urllib.request.urlopen(url, timeout=5).read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert "# TYPE binance_bot_latency_seconds summary" in body
+    assert 'binance_bot_latency_seconds_count{stage="network",symbol="BTCUSDT",type="LIMIT"} 3' in body
+    assert 'stage="validation",symbol="BTCUSDT",type="MARKET",quantile="0.99"' in body
+
+def test_script_and_package_imports_share_one_registry():
+    import metrics as script_metrics
+    assert script_metrics.REGISTRY is metrics.REGISTRY
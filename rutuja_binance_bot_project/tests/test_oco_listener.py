@@ -0,0 +1,55 @@
+import json, os, threading, time
+from websockets.sync.server import serve
+from src.advanced.oco_listener import UserDataStream
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "order_trade_updates.jsonl")
+
+class RestClient:
+    API_KEY = "key"
+    def __init__(self):
+        self.cancelled = []
+        self.listen_keys = 0
+        self.statuses = {202: "FILLED"}
+    def futures_stream_get_listen_key(self):
+        self.listen_keys += 1
+        return "lk%d" % self.listen_keys
+    def futures_stream_keepalive(self, listenKey):
+        return {}
+    def futures_stream_close(self, listenKey):
+        return {}
+    def futures_get_order(self, symbol, orderId):
+        return {"orderId": orderId, "status": self.statuses.get(orderId, "NEW")}
+    def futures_cancel_order(self, symbol, orderId):
+        self.cancelled.append(orderId)
+        return {"orderId": orderId, "status": "CANCELED"}
+
+def test_replayed_events_and_reconnect_resync():
+    with open(FIXTURE) as f:
+        recorded = f.read().splitlines()
+    paths = []
+
+    def handler(ws):
+        paths.append(ws.request.path)
+        if len(paths) == 1:
+            for line in recorded:
+                ws.send(line)
+            time.sleep(0.1)
+            return  # drop the connection; pair B fills while we are offline
+        ws.recv()  # keep the second connection open until the client leaves
+
+    server = serve(handler, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "ws://127.0.0.1:%d/ws/" % server.socket.getsockname()[1]
+    client = RestClient()
+    stream = UserDataStream(client, stream_url=url, backoff_initial=0.01)
+    pair_a = stream.add_oco("BTCUSDT", 101, 102)
+    pair_b = stream.add_oco("BTCUSDT", 201, 202)
+    stream.start()
+    try:
+        assert pair_a.done.wait(5) and pair_b.done.wait(5)
+    finally:
+        stream.stop()
+        server.shutdown()
+    assert client.cancelled == [102, 201]
+    assert pair_a.triggered_by == 101 and pair_b.triggered_by == 202
+    assert paths[:2] == ["/ws/lk1", "/ws/lk2"] and stream.connections >= 2
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from src.backtest import Columns
+from src.optimizer import SharedKlines, ResultCache, expand, sweep
+
+def _klines(n=3000, seed=5, flat=False):
+    rng = np.random.default_rng(seed)
+    close = np.full(n, 100.0) if flat else 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.r_[close[0], close[:-1]]
+    return Columns(open_time=(1700000000000 + np.arange(n) * 60000).tolist(), open=open_.tolist(),
+                   high=(np.maximum(open_, close) * 1.001).tolist(), low=(np.minimum(open_, close) * 0.999).tolist(),
+                   close=close.tolist(), volume=rng.lognormal(0, 0.5, n).tolist())
+
+def test_shared_block_is_mapped_not_copied_and_unlinked_on_release():
+    k = _klines(500)
+    data = SharedKlines.create(k)
+    other = SharedKlines.attach(data.name, data.rows)
+    other.close[10] = 123.0                              # same pages
+    assert data.close[10] == 123.0 and data.bar_ms == other.bar_ms == 60000
+    typical = (np.array(k.high) + np.array(k.low) + data.close) / 3
+    v = np.array(k.volume)
+    assert data.vwap(20, 80) == pytest.approx((typical[20:80] * v[20:80]).sum() / v[20:80].sum())
+    assert [b[0] for b in data.bars(3, 5)] == k.open_time[3:5]
+    other.release()
+    name = data.name
+    data.release()
+    with pytest.raises(FileNotFoundError):
+        SharedKlines.attach(name, 500)
+
+def test_grid_sweep_is_parallel_cached_and_ranked(tmp_path):
+    k = _klines()
+    space = {"lower": [90, 95, 120], "upper": [105, 110], "grid_size": [5, 11], "quantity": 0.1, "rearm": [False, True]}
+    assert len(expand(space)) == 24
+    cache = ResultCache(str(tmp_path / "cache.jsonl"))
+    rows = sweep("grid", k, space, {"maker_fee": 0.0002}, workers=2, cache=cache)
+    assert [r["net_pnl"] for r in rows[:16]] == sorted((r["net_pnl"] for r in rows[:16]), reverse=True)
+    assert all("error" in r for r in rows[16:]) and all(r["lower"] == 120 for r in rows[16:])
+    assert all(0 <= r["fill_rate"] <= 1 for r in rows[:16])
+    again = ResultCache(str(tmp_path / "cache.jsonl"))
+    inline = sweep("grid", k, space, {"maker_fee": 0.0002}, workers=1, cache=again)
+    assert again.hits == 16 and inline == rows
+    fresh = sweep("grid", k, dict(space, lower=[90]), {"maker_fee": 0.0002}, workers=1)
+    assert fresh == [r for r in rows if r["lower"] == 90]
+
+def test_twap_reports_shortfall_against_arrival_and_vwap():
+    rows = sweep("twap", _klines(flat=True), {"slices": [1, 10], "interval_seconds": 120, "total_qty": 2, "windows": 5},
+                 {"taker_fee": 0, "slippage_bps": 10}, workers=1)
+    for r in rows:
+        assert r["fill_rate"] == pytest.approx(1.0) and r["windows"] == 5
+        assert r["shortfall_bps"] == pytest.approx(10) and r["slippage_bps"] == pytest.approx(10)
+        assert r["net_pnl"] == pytest.approx(-0.2)
+    assert {r["duration_seconds"] for r in rows} == {0.0, 1080.0}
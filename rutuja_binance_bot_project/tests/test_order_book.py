@@ -0,0 +1,90 @@
+import sys, threading
+import pytest
+from src.order_book import LocalOrderBook, DepthStream, OrderBookGap
+from src.limit_orders import place_limit_order
+from src.market_orders import place_market_order
+
+SNAPSHOT = {"lastUpdateId": 100,
+            "bids": [["99.9", "1"], ["99.8", "2"], ["99.5", "5"]],
+            "asks": [["100.0", "1"], ["100.1", "2"], ["100.5", "5"]]}
+
+def diff(U, u, pu, bids=(), asks=()):
+    return {"e": "depthUpdate", "E": u, "s": "BTCUSDT", "U": U, "u": u, "pu": pu,
+            "b": [list(x) for x in bids], "a": [list(x) for x in asks]}
+
+def test_snapshot_and_diffs_keep_sorted_sides():
+    book = LocalOrderBook("BTCUSDT")
+    book.load_snapshot(SNAPSHOT)
+    assert book.apply_diff(diff(90, 99, 89)) is False  # older than the snapshot
+    book.apply_diff(diff(95, 105, 94, bids=[("99.95", "3"), ("99.9", "0")], asks=[("100.0", "0")]))
+    book.apply_diff(diff(106, 110, 105, asks=[("100.3", "4")]))
+    assert book.best_bid() == (99.95, 3.0) and book.best_ask() == (100.1, 2.0)
+    assert book.depth("SELL", 3) == [(100.1, 2.0), (100.3, 4.0), (100.5, 5.0)]
+    assert book.depth_at("BUY", 99.8) == 2.0 and book.cumulative_depth("BUY", 99.8) == 5.0
+    est = book.estimate_market("BUY", 4)
+    assert est["worst_price"] == 100.3 and est["avg_price"] == pytest.approx((2 * 100.1 + 2 * 100.3) / 4)
+    with pytest.raises(OrderBookGap):
+        book.apply_diff(diff(112, 115, 111))
+    assert not book.synced
+    with pytest.raises(ValueError):
+        book.best_bid()
+
+class SnapshotClient:
+    def __init__(self):
+        self.snapshots = 0
+        self.orders = []
+    def futures_order_book(self, symbol, limit):
+        self.snapshots += 1
+        return SNAPSHOT if self.snapshots == 1 else dict(SNAPSHOT, lastUpdateId=200)
+    def futures_create_order(self, **params):
+        self.orders.append(params)
+        return params
+
+def test_stream_resyncs_after_gap_and_feeds_order_helpers():
+    client = SnapshotClient()
+    stream = DepthStream(client, ["BTCUSDT"])
+    stream.on_message({"stream": "btcusdt@depth@100ms", "data": diff(98, 101, 97)})
+    stream.on_message({"stream": "btcusdt@depth@100ms", "data": diff(105, 106, 104)})  # pu != 101
+    assert client.snapshots == 1 and not stream["BTCUSDT"].synced
+    stream.on_message({"data": diff(150, 201, 149, bids=[("99.9", "4")])})
+    book = stream["BTCUSDT"]
+    assert client.snapshots == 2 and book.synced and book.best_bid() == (99.9, 4.0)
+
+    place_limit_order(client, "BTCUSDT", "SELL", None, 0.01, book=book, post_only=True)
+    assert client.orders[-1]["price"] == "100.0" and client.orders[-1]["timeInForce"] == "GTX"
+    with pytest.raises(ValueError):
+        place_market_order(client, "BTCUSDT", "BUY", 5, book=book, max_slippage_bps=5)
+    place_market_order(client, "BTCUSDT", "BUY", 1, book=book, max_slippage_bps=5)
+    assert len(client.orders) == 2
+
+def test_readers_never_see_a_half_applied_update():
+    book = LocalOrderBook("BTCUSDT")
+    book.load_snapshot(SNAPSHOT)
+    errors, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                book.best_bid(), book.best_ask(), book.depth("BUY", 5), book.estimate_market("SELL", 2)
+            except Exception as e:
+                errors.append(e)
+                return
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    try:
+        for t in readers:
+            t.start()
+        last = 100
+        for n in range(50000):
+            # Add and remove the best bid on every update so readers race the removal.
+            qty = "0" if n % 2 else "1"
+            book.apply_diff(diff(last, last + 1, last, bids=[("99.99", qty)]))
+            last += 1
+    finally:
+        done.set()
+        for t in readers:
+            t.join()
+        sys.setswitchinterval(interval)
+    assert errors == [] and book.best_bid() == (99.9, 1.0)
@@ -0,0 +1,69 @@
+import hashlib, hmac, random
+from decimal import Decimal
+import pytest
+from binance.client import Client
+from src.order_encoding import HmacSha256, OrderEncoder, SymbolFormat, format_number, install_fast_signing
+
+def test_precomputed_hmac_matches_hmac_for_short_and_long_keys():
+    for key in ("secret", "k" * 64, "x" * 100):
+        signer = HmacSha256(key)
+        for msg in (b"", b"symbol=BTCUSDT&side=BUY", b"q" * 300):
+            assert signer.hexdigest(msg) == hmac.new(key.encode(), msg, hashlib.sha256).hexdigest()
+
+def test_numbers_are_canonical_and_fixed_precision():
+    assert format_number(1e-05) == "0.00001" and format_number(0.1 + 0.2) == "0.3"
+    assert format_number(30200.0) == "30200.0" and format_number(0.0) == "0.0" and format_number(-1e-05) == "-0.00001"
+    assert format_number("1E-7") == "0.0000001" and format_number("30000.10") == "30000.10"
+    assert format_number(Decimal("1E+2")) == "100" and format_number(True) == "true" and format_number(7) == "7"
+    assert format_number(29999.999999999996) == "30000.0" and format_number(3.0000000000000004) == "3.0"
+    assert format_number(2.000000001) == "2.0" and format_number(1e16) == "10000000000000000.0"
+    assert format_number(5e20) == "500000000000000000000.0"
+    for text in ("SELL", "true", "GTE_GTC", "e", "1e", "E-7"):
+        assert format_number(text) == text
+    assert format_number("-2.5e+3") == "-2500" and format_number(".5E1") == "5"
+    for bad in (float("nan"), 2.5e-09, -4e-09):
+        with pytest.raises(ValueError):
+            format_number(bad)
+    fmt = SymbolFormat(Decimal("0.10"), "0.001")
+    assert (fmt.price_decimals, fmt.qty_decimals) == (1, 3)
+    assert fmt.price(30000.04999) == fmt.price("30000.04999") == "30000.0" and fmt.qty(1e-05) == "0.000"
+    rng = random.Random(3)
+    for _ in range(2000):
+        x = rng.uniform(0, 1000)
+        assert fmt.qty(x) == format(Decimal(x).quantize(Decimal("0.001")), "f")
+
+def test_encoder_signs_the_body_as_sent():
+    enc = OrderEncoder("secret")
+    params = {"symbol": "BTCUSDT", "side": "BUY", "price": 30000.1, "quantity": 1e-05, "newClientOrderId": "a b/c",
+              "reduceOnly": False, "stopPrice": None}
+    body = enc.sign(params, timestamp=1700000000000)
+    query, signature = body.rsplit("&signature=", 1)
+    assert query == ("symbol=BTCUSDT&side=BUY&price=30000.1&quantity=0.00001&newClientOrderId=a%20b%2Fc"
+                     "&reduceOnly=false&timestamp=1700000000000")
+    assert signature == hmac.new(b"secret", query.encode(), hashlib.sha256).hexdigest()
+    assert enc.sign({}, timestamp=5).startswith("timestamp=5&signature=")
+
+def test_fast_signing_matches_python_binance_for_string_params():
+    plain, fast = Client.__new__(Client), Client.__new__(Client)
+    plain.API_SECRET = fast.API_SECRET = "secret"
+    plain.session = fast.session = None                  # built without __init__, which would ping the API
+    assert install_fast_signing(fast) is fast and fast._generate_signature._fast
+    install_fast_signing(fast)
+    data = {"symbol": "BTCUSDT", "side": "SELL", "type": "LIMIT", "quantity": "0.010", "price": "30000.1",
+            "recvWindow": 5000, "timestamp": 1700000000000, "newClientOrderId": None}
+    assert fast._generate_signature(data) == plain._generate_signature(data)
+    signed = dict(data, signature="abc")
+    assert fast._order_params(signed) == plain._order_params(signed)
+    # Floats are sent (and signed) in canonical form instead of repr.
+    assert dict(fast._order_params({"quantity": 1e-05}))["quantity"] == "0.00001"
+
+def test_symbol_filters_format_through_symbol_format_like_format_decimal():
+    from src.exchange_info import SymbolFilters, format_decimal
+    rng = random.Random(11)
+    for tick, step in (("0.10", "0.001"), ("10", "1"), ("0.5", "0.00001000"), ("0.00000100", "100")):
+        f = SymbolFilters({"symbol": "XUSDT", "filters": [{"filterType": "PRICE_FILTER", "tickSize": tick},
+                                                           {"filterType": "LOT_SIZE", "stepSize": step}]})
+        for _ in range(200):
+            qty, price = rng.uniform(100, 10000), rng.uniform(0.001, 50000)
+            q, p = f.round_qty(qty), f.round_price(price)
+            assert f.snap(qty, price) == (format_decimal(q, f.step_size), format_decimal(p, f.tick_size))
@@ -0,0 +1,69 @@
+from src.simulator import SimulatedFuturesClient
+from src.order_journal import OrderJournal, ACKED, MISSING
+from src.advanced.twap import execute_twap
+from src.advanced.oco import place_oco
+
+class Crash(Exception):
+    pass
+
+class CrashingClient(SimulatedFuturesClient):
+    """Dies right after the exchange accepted the n-th order, before the response is journaled."""
+    def __init__(self, crash_after):
+        super().__init__()
+        self.crash_after = crash_after
+    def futures_create_order(self, **params):
+        res = super().futures_create_order(**params)
+        if len(self._orders) == self.crash_after:
+            raise Crash()
+        return res
+
+def test_twap_resumes_without_duplicate_slices(tmp_path):
+    client = CrashingClient(crash_after=3)
+    client.process_trade("BTCUSDT", 0, 100.0)
+    journal = OrderJournal(str(tmp_path / "orders.sqlite3"))
+    try:
+        execute_twap(client, "BTCUSDT", "BUY", 5, slices=5, interval_seconds=0, journal=journal, run_id="twap-test")
+    except Crash:
+        pass
+    # Slots 3 and 4 were never reached; a new run is not reconciled, so they have no rows yet.
+    assert [r["status"] for r in journal.orders("twap-test")] == [ACKED, ACKED, "INTENT"]
+    journal.close()
+
+    journal = OrderJournal(str(tmp_path / "orders.sqlite3"))  # restarted process
+    [run] = journal.unfinished_runs("twap")
+    assert run["run_id"] == "twap-test" and run["params"]["slices"] == 5
+    client.crash_after = None
+    results = execute_twap(client, "BTCUSDT", "BUY", 5, slices=5, interval_seconds=0, journal=journal, run_id="twap-test")
+    assert len(client._orders) == 5 and len(results) == 5
+    assert sorted(o["clientOrderId"] for o in client._orders.values()) == ["twap-test-%d" % i for i in range(5)]
+    assert all(r["status"] == ACKED for r in journal.orders("twap-test"))
+    assert journal.unfinished_runs() == []
+    journal.close()
+
+def test_oco_reconcile_places_only_missing_leg(tmp_path):
+    client = SimulatedFuturesClient()
+    client.process_trade("BTCUSDT", 0, 100.0)
+    journal = OrderJournal(str(tmp_path / "orders.sqlite3"), flush_interval=0.01)
+    assert journal.new_run("oco", {"symbol": "BTCUSDT"}, "oco-1") == ("oco-1", True)
+    client.futures_create_order(symbol="BTCUSDT", side="SELL", type="TAKE_PROFIT_MARKET", stopPrice="110",
+                                quantity="1", newClientOrderId="oco-1-0")  # TP sent, then the process died
+    assert journal.reconcile(client, "oco-1", "BTCUSDT", (0, 1)) == {0: ACKED, 1: MISSING}
+    res = place_oco(client, "BTCUSDT", "BUY", 1, tp_price=110, sl_price=95, journal=journal, run_id="oco-1")
+    assert res["tp"]["clientOrderId"] == "oco-1-0" and res["sl"]["clientOrderId"] == "oco-1-1"
+    assert len(client.futures_get_open_orders(symbol="BTCUSDT")) == 2
+    journal.close()
+
+class LookupCountingClient(SimulatedFuturesClient):
+    lookups = 0
+    def futures_get_order(self, **params):
+        self.lookups += 1
+        return super().futures_get_order(**params)
+
+def test_new_named_run_is_not_reconciled(tmp_path):
+    client = LookupCountingClient()
+    client.process_trade("BTCUSDT", 0, 100.0)
+    journal = OrderJournal(str(tmp_path / "orders.sqlite3"))
+    execute_twap(client, "BTCUSDT", "BUY", 5, slices=5, interval_seconds=0, journal=journal, run_id="nightly-1")
+    assert client.lookups == 0 and [r["status"] for r in journal.orders("nightly-1")] == [ACKED] * 5
+    assert journal.new_run("twap", {}, "nightly-1") == ("nightly-1", False)
+    journal.close()
@@ -0,0 +1,84 @@
+import threading, time
+import requests
+from requests.hooks import dispatch_hook
+from src.rate_limiter import RequestScheduler, ScheduledClient, PRIORITY_CANCEL, PRIORITY_NEW
+
+class RecordingClient:
+    def __init__(self, headers=None):
+        self.calls = []
+        self.response = type("Resp", (), {"headers": headers or {}})()
+    def futures_create_order(self, **kwargs):
+        self.calls.append(("create", kwargs.get("reduceOnly")))
+        return {"status": "NEW"}
+    def futures_cancel_order(self, **kwargs):
+        self.calls.append(("cancel", None))
+        return {"status": "CANCELED"}
+
+def test_orders_queue_once_bucket_is_empty():
+    sched = RequestScheduler(limits={("orders", 1): 4}, safety_margin=1.0)
+    client = ScheduledClient(RecordingClient(), sched)
+    start = time.perf_counter()
+    for _ in range(6):
+        client.futures_create_order(symbol="BTCUSDT")
+    assert time.perf_counter() - start >= 0.4
+    m = sched.metrics()
+    assert m["calls"] == 6 and m["throttled_calls"] >= 1 and m["queue_depth"] == 0
+
+def test_cancels_and_reduce_only_jump_the_queue():
+    sched = RequestScheduler(limits={("weight", 0.3): 1}, safety_margin=1.0)
+    raw = RecordingClient()
+    client = ScheduledClient(raw, sched)
+    client.futures_create_order(symbol="BTCUSDT")  # drains the bucket
+    threads = [threading.Thread(target=client.futures_create_order, kwargs={"symbol": "BTCUSDT"})]
+    threads[0].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=client.futures_create_order, kwargs={"symbol": "BTCUSDT", "reduceOnly": True}))
+    threads.append(threading.Thread(target=client.futures_cancel_order, kwargs={"symbol": "BTCUSDT", "orderId": 1}))
+    for t in threads[1:]:
+        t.start()
+    time.sleep(0.05)
+    assert sched.metrics()["queue_depth"] == 3
+    for t in threads:
+        t.join()
+    assert [c[0] for c in raw.calls[1:]] == ["cancel", "create", "create"]
+    assert raw.calls[2][1] is True
+
+def test_used_weight_header_resyncs_bucket():
+    sched = RequestScheduler(limits={("weight", 60): 100}, safety_margin=1.0)
+    client = ScheduledClient(RecordingClient(headers={"X-MBX-USED-WEIGHT-1M": "100"}), sched)
+    client.futures_create_order(symbol="BTCUSDT")
+    start = time.perf_counter()
+    sched.acquire(weight=1)
+    assert time.perf_counter() - start >= 0.5
+
+class SessionClient(RecordingClient):
+    """Delivers each response through the session hooks, like python-binance's requests session."""
+    def __init__(self):
+        super().__init__(headers={"X-MBX-USED-WEIGHT-1M": "0"})
+        self.session = requests.Session()
+    def futures_create_order(self, **kwargs):
+        resp = requests.Response()
+        resp.headers["X-MBX-USED-WEIGHT-1M"] = "100"
+        dispatch_hook("response", self.session.hooks, resp)
+        # Another thread's response lands on the shared attribute before this call returns.
+        self.response = type("Resp", (), {"headers": {"X-MBX-USED-WEIGHT-1M": "0"}})()
+        return super().futures_create_order(**kwargs)
+
+def test_headers_come_from_this_requests_response():
+    sched = RequestScheduler(limits={("weight", 60): 100}, safety_margin=1.0)
+    raw = SessionClient()
+    client = ScheduledClient(ScheduledClient(raw, sched), sched)
+    assert len(raw.session.hooks["response"]) == 1
+    client.futures_create_order(symbol="BTCUSDT")
+    start = time.perf_counter()
+    sched.acquire(weight=1)
+    assert time.perf_counter() - start >= 0.5
+
+def test_script_and_package_imports_share_one_scheduler():
+    import rate_limiter
+    from src import rate_limiter as pkg
+    from src.basic_bot import BasicBot
+    assert rate_limiter.default_scheduler() is pkg.default_scheduler()
+    scheduled = rate_limiter.ScheduledClient(RecordingClient())
+    bot = BasicBot("k", "s", client=scheduled)
+    assert bot.client is scheduled
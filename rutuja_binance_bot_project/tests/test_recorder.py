@@ -0,0 +1,86 @@
+import json, os, threading, time
+import numpy as np
+from websockets.sync.server import serve
+from src.recorder import MarketDataRecorder, ChunkWriter, chunk_paths, iter_chunks, load, replay_trades, replay_klines
+from src.backtest import Columns, run_trades
+from src.simulator import SimulatedFuturesClient
+
+def _trade(i, symbol="BTCUSDT"):
+    return {"e": "aggTrade", "E": 1000 + i, "s": symbol, "a": i, "p": "%.1f" % (100 + i % 7), "q": "0.5",
+            "f": i, "l": i, "T": 1000 + i, "m": i % 2 == 0}
+
+def test_stream_is_recorded_into_columnar_chunks(tmp_path):
+    messages = [{"stream": "btcusdt@aggTrade", "data": _trade(i)} for i in range(25)]
+    messages.append({"stream": "ethusdt@bookTicker", "data": {"e": "bookTicker", "u": 9, "E": 1005, "T": 1004, "s": "ETHUSDT",
+                                                              "b": "2000.1", "B": "3", "a": "2000.2", "A": "4"}})
+    messages.append({"stream": "btcusdt@kline_1m", "data": {"e": "kline", "E": 1, "s": "BTCUSDT", "k": {
+        "t": 0, "T": 59999, "s": "BTCUSDT", "o": "1", "h": "2", "l": "0.5", "c": "1.5", "v": "10", "n": 3, "x": False}}})
+    messages.append({"stream": "btcusdt@kline_1m", "data": {"e": "kline", "E": 2, "s": "BTCUSDT", "k": {
+        "t": 0, "T": 59999, "s": "BTCUSDT", "o": "1", "h": "2", "l": "0.5", "c": "1.6", "v": "12", "n": 4, "x": True}}})
+    paths = []
+
+    def handler(ws):
+        paths.append(ws.request.path)
+        for m in messages:
+            ws.send(json.dumps(m))
+        ws.recv()
+
+    server = serve(handler, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = "ws://127.0.0.1:%d/stream?streams=" % server.socket.getsockname()[1]
+    rec = MarketDataRecorder(str(tmp_path), ["BTCUSDT", "ETHUSDT"], chunk_rows=10, stream_base=base).start()
+    deadline = time.monotonic() + 5
+    while rec.events < 27 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    rec.stop()
+    server.shutdown()
+    assert "btcusdt@aggTrade/btcusdt@bookTicker/btcusdt@kline_1m/ethusdt@aggTrade" in paths[0]
+    assert rec.events == 27                                   # the open kline is skipped
+    assert len(chunk_paths(str(tmp_path), "BTCUSDT", "trade")) == 3   # 10 + 10 + 5 (flushed on stop)
+    trades = load(str(tmp_path), "BTCUSDT", "trade")
+    assert trades.time.tolist() == list(range(1000, 1025)) and trades.id.dtype == np.int64
+    assert trades.buyer_maker[:3].tolist() == [True, False, True] and trades.price[8] == 101.0
+    book = load(str(tmp_path), "ETHUSDT", "book_ticker")
+    assert book.time.tolist() == [1004] and book.ask_qty.tolist() == [4.0]
+    assert load(str(tmp_path), "BTCUSDT", "kline").close.tolist() == [1.6]
+
+def test_range_reads_are_memory_mapped(tmp_path):
+    w = ChunkWriter(str(tmp_path / "BTCUSDT" / "trade"), "trade", chunk_rows=1000)
+    n = 4500
+    w.extend({"time": np.arange(n) * 10, "id": np.arange(n), "price": np.linspace(100, 110, n),
+              "qty": np.ones(n), "buyer_maker": np.zeros(n, dtype=bool)})
+    w.flush()
+    chunks = list(iter_chunks(str(tmp_path), "BTCUSDT", "trade", start=9995, end=25000))
+    assert [len(c) for c in chunks] == [1000, 500]             # chunks start at 10000 and 20000; 25000 ends the range
+    assert chunks[0].time[0] == 10000 and isinstance(chunks[0].price.base, np.memmap)
+    assert load(str(tmp_path), "BTCUSDT", "trade", start=25000, end=25001).id.tolist() == [2500]
+    # a second writer continues the chunk sequence instead of overwriting
+    ChunkWriter(str(tmp_path / "BTCUSDT" / "trade"), "trade").extend({"time": [50000], "id": [n], "price": [1.0],
+                                                                      "qty": [1.0], "buyer_maker": [True]})
+    assert len(chunk_paths(str(tmp_path), "BTCUSDT", "trade")) == 5
+
+def test_replay_matches_csv_backtest(tmp_path):
+    n = 3000
+    prices = (100 + np.sin(np.arange(n) / 50) * 5).round(1)
+    w = ChunkWriter(str(tmp_path / "BTCUSDT" / "trade"), "trade", chunk_rows=700)
+    w.extend({"time": np.arange(n), "id": np.arange(n), "price": prices, "qty": np.full(n, 2.0), "buyer_maker": np.zeros(n, bool)})
+    w.flush()
+
+    def run(feed):
+        client = SimulatedFuturesClient(maker_fee=0, taker_fee=0)
+        client.process_trade("BTCUSDT", 0, 100.0)
+        for price in (97, 99, 101, 103):
+            client.futures_create_order(symbol="BTCUSDT", side="BUY" if price < 100 else "SELL", type="LIMIT",
+                                        price=str(price), quantity="1")
+        return feed(client)
+    from_csv = run(lambda c: run_trades(c, "BTCUSDT", Columns(time=list(range(n)), price=prices.tolist(), qty=[2.0] * n)))
+    recorded = run(lambda c: replay_trades(c, str(tmp_path), "BTCUSDT"))
+    for key in ("trades", "fills", "filled_qty", "realized_pnl", "position"):
+        assert recorded[key] == from_csv[key]
+    assert recorded["trades"] == n and recorded["fills"] > 0
+
+    w = ChunkWriter(str(tmp_path / "BTCUSDT" / "kline"), "kline")
+    w.extend({"open_time": [0, 60000], "close_time": [59999, 119999], "open": [100, 101], "high": [102, 103],
+              "low": [99, 100], "close": [101, 102], "volume": [5, 6], "trades": [10, 12]})
+    w.flush()
+    assert replay_klines(SimulatedFuturesClient(), str(tmp_path), "BTCUSDT")["bars"] == 2
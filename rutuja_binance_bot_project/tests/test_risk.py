@@ -0,0 +1,77 @@
+import pytest
+from src.risk import RiskEngine, RiskLimits, RiskClient, RiskRejected, REJECT_CODE
+from src.simulator import SimulatedFuturesClient
+from src.advanced.twap import execute_twap
+
+def _client(engine, price=100.0):
+    sim = SimulatedFuturesClient(maker_fee=0, taker_fee=0)
+    sim.process_trade("BTCUSDT", 0, price)
+    sim.subscribe(engine.handle_event)
+    engine.set_mark("BTCUSDT", price)
+    return sim, RiskClient(sim, engine)
+
+def _reject(engine, reason, **params):
+    with pytest.raises(RiskRejected) as e:
+        engine.reserve(dict({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT"}, **params))
+    assert e.value.reason == reason
+
+def test_limits_count_open_orders_and_account_exposure():
+    engine = RiskEngine(RiskLimits(max_position=1, max_order_notional=60, max_price_deviation=0.05),
+                        {"ETHUSDT": RiskLimits(max_position=10)}, max_leverage=2, equity=1000)
+    _reject(engine, "no_price", quantity=1)
+    engine.set_mark("BTCUSDT", 100)
+    engine.reserve({"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "price": "99", "quantity": "0.6"})
+    _reject(engine, "position", price="99", quantity="0.5")         # 0.6 open + 0.5 would exceed 1
+    _reject(engine, "price_band", price="90", quantity="0.1")
+    _reject(engine, "order_notional", price="100", quantity="0.61", side="SELL")
+    engine.set_mark("ETHUSDT", 200)
+    engine.set_position("ETHUSDT", 7)                                 # 1400 of exposure + 59.4 open
+    with pytest.raises(RiskRejected) as e:
+        engine.reserve({"symbol": "ETHUSDT", "side": "BUY", "type": "MARKET", "quantity": "3"})
+    assert e.value.reason == "leverage"
+    # Reduce-only orders shrink the position and skip the exposure checks.
+    engine.reserve({"symbol": "ETHUSDT", "side": "SELL", "type": "MARKET", "quantity": "7", "reduceOnly": "true"})
+    status = engine.status()
+    assert status["accepted"] == 2 and status["rejections"]["position"] == 1
+    assert status["symbols"]["BTCUSDT"]["open_buy"] == pytest.approx(0.6)
+    assert status["gross_exposure"] == pytest.approx(1400 + 59.4)
+
+def test_state_follows_responses_and_fill_events_without_double_counting():
+    engine = RiskEngine(RiskLimits(max_position=1))
+    sim, client = _client(engine)
+    client.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity="0.4")
+    resting = client.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", price="95", quantity="0.5")
+    s = engine.status()["symbols"]["BTCUSDT"]
+    assert s["position"] == pytest.approx(0.4) and s["open_buy"] == pytest.approx(0.5)
+    with pytest.raises(RiskRejected):
+        client.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", price="95", quantity="0.2")
+    sim.process_trade("BTCUSDT", 1, 94.0)                           # the resting order fills via an event
+    # A late websocket copy of an already-settled fill, and a fill from an order placed elsewhere.
+    late = {"s": "BTCUSDT", "c": resting["clientOrderId"], "S": "BUY", "x": "TRADE", "X": "FILLED", "l": "0.5", "z": "0.5", "L": "95"}
+    engine.on_order_update(late)
+    engine.on_order_update(dict(late, c="web_ui_1", l="0.05"))
+    s = engine.status()
+    assert s["symbols"]["BTCUSDT"]["position"] == pytest.approx(0.95) and s["open_orders"] == 0
+    assert sim.futures_position_information("BTCUSDT")[0]["positionAmt"] == "0.9"
+    other = client.futures_create_order(symbol="BTCUSDT", side="SELL", type="LIMIT", price="120", quantity="0.3")
+    client.futures_cancel_order(symbol="BTCUSDT", orderId=other["orderId"])
+    assert engine.status()["symbols"]["BTCUSDT"]["open_sell"] == 0
+
+def test_batch_sends_only_accepted_entries_and_failed_sends_release():
+    engine = RiskEngine(RiskLimits(max_order_qty=1))
+    sim, client = _client(engine)
+    orders = [{"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "price": "90", "quantity": q, "timeInForce": "GTC"}
+              for q in ("0.5", "2", "0.5")]
+    res = client.futures_place_batch_order(batchOrders=orders)
+    assert res[1]["code"] == REJECT_CODE and "max_order_qty" in res[1]["msg"]
+    assert res[0]["status"] == res[2]["status"] == "NEW" and len(sim.futures_get_open_orders("BTCUSDT")) == 2
+    with pytest.raises(ValueError):
+        client.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", quantity="0.5")   # simulator: no price
+    assert engine.status()["symbols"]["BTCUSDT"]["open_buy"] == pytest.approx(1.0)
+
+def test_strategies_treat_rejections_as_failed_orders():
+    engine = RiskEngine(RiskLimits(max_position=0.03))
+    sim, client = _client(engine)
+    results = execute_twap(client, "BTCUSDT", "BUY", 0.05, slices=5, interval_seconds=0)
+    assert len(results) == 3 and engine.status()["rejections"] == {"position": 2}
+    assert engine.status()["symbols"]["BTCUSDT"]["position"] == pytest.approx(0.03)
@@ -0,0 +1,82 @@
+import math, time
+import pytest
+from src.simulator import SimulatedFuturesClient, SimulationError
+from src.backtest import Columns, load_klines, load_trades, run_backtest
+from src.advanced.grid_strategy import create_grid
+from src.advanced.oco import place_oco
+
+def _client(price=100.0, **kwargs):
+    client = SimulatedFuturesClient(maker_fee=0, taker_fee=0, **kwargs)
+    client.process_trade("BTCUSDT", 0, price)
+    return client
+
+def test_price_time_priority_with_limited_liquidity():
+    client = _client(participation=1.0)
+    first = client.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", price="99", quantity="1")
+    better = client.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", price="99.5", quantity="1")
+    second = client.futures_create_order(symbol="BTCUSDT", side="BUY", type="LIMIT", price="99", quantity="1")
+    client.process_trade("BTCUSDT", 1, 98.9, qty=1.5)
+    status = lambda o: client.futures_get_order(orderId=o["orderId"])
+    assert status(better)["status"] == "FILLED"
+    assert status(first)["status"] == "PARTIALLY_FILLED" and status(first)["executedQty"] == "0.5"
+    assert status(second)["status"] == "NEW"
+
+def test_market_and_stop_orders_with_pnl_and_slippage():
+    client = _client(slippage_bps=10)
+    client.futures_create_order(symbol="BTCUSDT", side="BUY", type="MARKET", quantity="2")
+    res = place_oco(client, "BTCUSDT", "BUY", 2, tp_price=110, sl_price=95)
+    events = []
+    client.subscribe(events.append)
+    client.process_bar("BTCUSDT", 60000, 100, 111, 99, 109)  # hits the take-profit only
+    tp = client.futures_get_order(orderId=res["tp"]["orderId"])
+    assert tp["status"] == "FILLED" and float(tp["avgPrice"]) == pytest.approx(110 * 0.999)
+    assert client.futures_get_order(orderId=res["sl"]["orderId"])["status"] == "NEW"
+    assert [e["o"]["X"] for e in events] == ["FILLED"]
+    report = client.report("BTCUSDT")
+    assert report["position"]["BTCUSDT"] == 0
+    assert report["realized_pnl"] == pytest.approx(2 * (110 * 0.999 - 100 * 1.001))
+    assert report["slippage_bps"] == pytest.approx(10, rel=1e-3)
+    with pytest.raises(SimulationError):
+        client.futures_create_order(symbol="BTCUSDT", side="SELL", type="STOP_MARKET", stopPrice="120", quantity="1")
+
+def test_grid_backtest_from_csv(tmp_path):
+    path = tmp_path / "klines.csv"
+    rows = ["open_time,open,high,low,close,volume,close_time"]
+    price = 100.0
+    for i in range(2000):
+        nxt = 100 + 5 * math.sin(i / 20.0)
+        rows.append("%d,%f,%f,%f,%f,10,%d" % (i * 60000, price, max(price, nxt) + 0.2, min(price, nxt) - 0.2, nxt, i * 60000 + 59999))
+        price = nxt
+    path.write_text("\n".join(rows))
+    klines = load_klines(str(path))
+    assert len(klines) == 2000 and klines.open_time[1] == 60000
+    client = _client(price=100.0)
+
+    def rearm(event):
+        o = event["o"]
+        if o["X"] == "FILLED" and o["o"] == "LIMIT":
+            side = "SELL" if o["S"] == "BUY" else "BUY"
+            step = 1 if side == "SELL" else -1
+            client.futures_create_order(symbol="BTCUSDT", side=side, type="LIMIT", price=str(float(o["p"]) + step), quantity=o["q"])
+    client.subscribe(rearm)
+    create_grid(client, "BTCUSDT", lower=96, upper=104, grid_size=9, quantity=1)
+    report = run_backtest(client, "BTCUSDT", klines)
+    assert report["bars"] == 2000 and report["fills"] > 50
+    assert report["realized_pnl"] > 0
+
+def test_trades_csv_without_header(tmp_path):
+    path = tmp_path / "trades.csv"
+    path.write_text("1,100.5,0.2,20.1,1700000000000,true\n2,100.4,0.1,10.04,1700000000100,false\n")
+    trades = load_trades(str(path))
+    assert trades.price == [100.5, 100.4] and trades.time == [1700000000000, 1700000000100]
+
+def test_replay_speed():
+    n = 200000
+    closes = [100 + 5 * math.sin(i / 50.0) for i in range(n)]
+    klines = Columns(open_time=list(range(n)), open=closes, high=[c + 0.1 for c in closes],
+                     low=[c - 0.1 for c in closes], close=closes, volume=[1.0] * n)
+    client = _client(price=100.0)
+    create_grid(client, "BTCUSDT", lower=80, upper=120, grid_size=41, quantity=1)
+    start = time.perf_counter()
+    run_backtest(client, "BTCUSDT", klines)
+    assert time.perf_counter() - start < 3.0
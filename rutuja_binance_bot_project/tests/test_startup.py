@@ -0,0 +1,35 @@
+import os, re, subprocess, sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+CLIS = ("market_orders.py", "limit_orders.py", "stop_limit_orders.py")
+# Loaded only once a client is built or an order is actually sent.
+HEAVY = ("binance", "requests", "aiohttp", "dateparser", "websockets", "numpy", "PIL")
+# Our own import cost (cumulative, microseconds) for a CLI's --help; currently ~20 ms.
+BUDGET_US = 150_000
+
+def _import_profile(script, tmp_path, *args):
+    out = subprocess.run([sys.executable, "-X", "importtime", os.path.join(SRC, script), *args],
+                         cwd=str(tmp_path), capture_output=True, text=True, timeout=60)
+    modules = {}
+    for line in out.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if m:
+            modules[m.group(4)] = (int(m.group(2)), len(m.group(3)))
+    return out, modules
+
+def test_cli_help_skips_heavy_imports(tmp_path):
+    for script in CLIS:
+        out, modules = _import_profile(script, tmp_path, "--help")
+        assert out.returncode == 0 and "usage:" in out.stdout
+        heavy = sorted(m for m in modules if m.split(".")[0] in HEAVY)
+        assert heavy == [], "%s --help imports %s" % (script, heavy)
+        ours = sum(us for name, (us, depth) in modules.items()
+                   if depth == 1 and name.split(".")[0] in ("utils", "exchange_info", "daemon_client", "rate_limiter"))
+        assert ours < BUDGET_US, "%s: project imports took %d us" % (script, ours)
+    assert os.listdir(str(tmp_path)) == []  # no log files or directories created
+
+def test_input_errors_fail_before_client(tmp_path):
+    out, modules = _import_profile("limit_orders.py", tmp_path, "--symbol", "BTCUSDT", "--side", "HOLD",
+                                   "--price", "1", "--quantity", "1")
+    assert out.returncode == 2 and "side must be BUY or SELL" in out.stderr
+    assert not any(m.split(".")[0] == "binance" for m in modules)
@@ -1,4 +1,6 @@
-from src.advanced.twap import execute_twap
+import threading, time
+import requests
+from src.advanced.twap import execute_twap, TwapScheduler
 class DummyClient:
     def futures_create_order(self, **kwargs):
         return {"ok": True, "kwargs": kwargs}
@@ -7,3 +9,78 @@ def test_twap_slices(tmp_path):
     client = DummyClient()
     res = execute_twap(client, "BTCUSDT", "BUY", total_qty=0.01, slices=5, interval_seconds=0, test=True)
     assert len(res) == 5
+
+class CountingClient:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.count = 0
+        self.lock = threading.Lock()
+    def futures_create_order(self, **kwargs):
+        time.sleep(self.latency)
+        with self.lock:
+            self.count += 1
+        return {"status": "FILLED", **kwargs}
+
+def test_scheduler_runs_many_twaps_on_one_loop():
+    client = CountingClient()
+    with TwapScheduler(client, max_workers=4) as sched:
+        runs = [sched.submit("BTCUSDT", "BUY", total_qty=0.03, slices=3, interval_seconds=0.02) for _ in range(500)]
+        events = [list(r.progress(timeout=5)) for r in runs]
+    assert client.count == 1500
+    assert all(e[-1]["type"] == "done" and e[-1]["sent"] == 3 for e in events)
+    assert threading.active_count() < 20
+
+def test_slices_stay_on_schedule_despite_latency():
+    with TwapScheduler(CountingClient(latency=0.03)) as sched:
+        run = sched.submit("BTCUSDT", "SELL", total_qty=0.04, slices=4, interval_seconds=0.1)
+        slices = [e for e in run.progress(timeout=5) if e["type"] == "slice"]
+    start = slices[0]["scheduled_at"]
+    for i, e in enumerate(slices):
+        assert abs(e["scheduled_at"] - (start + 0.1 * i)) < 1e-9
+        assert abs(e["lag"]) < 0.05
+
+def test_pause_resume_and_cancel():
+    with TwapScheduler(CountingClient()) as sched:
+        run = sched.submit("BTCUSDT", "BUY", total_qty=1, slices=5, interval_seconds=0.05, jitter=0.2)
+        stream = run.progress(timeout=5)
+        assert next(stream)["type"] == "slice"
+        run.pause()
+        assert next(stream)["type"] == "paused"
+        time.sleep(0.15)
+        assert run.next_index == 1
+        run.resume()
+        kinds = [next(stream)["type"] for _ in range(2)]
+        assert kinds == ["resumed", "slice"]
+        run.cancel()
+        last = list(stream)[-1]
+    assert last["type"] == "cancelled" and last["remaining"] == 5 - run.next_index
+
+class FlakyClient(CountingClient):
+    def futures_create_order(self, **kwargs):
+        with self.lock:
+            self.count += 1
+            if self.count == 2:
+                raise requests.ConnectionError("connection reset by peer")
+        return {"status": "FILLED", **kwargs}
+
+def test_transport_errors_fail_the_slice_and_the_run_still_finishes():
+    with TwapScheduler(FlakyClient()) as sched:
+        run = sched.submit("BTCUSDT", "BUY", total_qty=0.03, slices=3, interval_seconds=0.01)
+        events = list(run.progress(timeout=5))
+        assert not sched.active
+    slices = [e for e in events if e["type"] == "slice"]
+    assert [e["error"] is not None for e in slices] == [False, True, False]
+    assert "connection reset" in slices[1]["error"]
+    assert events[-1] == dict(events[-1], type="done", sent=2, failed=1)
+
+def test_stopping_the_scheduler_cancels_pending_slices():
+    sched = TwapScheduler(CountingClient()).start()
+    run = sched.submit("BTCUSDT", "BUY", total_qty=0.03, slices=3, interval_seconds=60)
+    paused = sched.submit("BTCUSDT", "SELL", total_qty=0.02, slices=2, interval_seconds=60)
+    stream = run.progress(timeout=5)
+    assert next(stream)["type"] == "slice"
+    paused.pause()
+    sched.stop()
+    assert [e["type"] for e in stream] == ["cancelled"]
+    assert [e["type"] for e in paused.progress(timeout=5)][-1] == "cancelled"
+    assert run.state == paused.state == "CANCELLED" and not sched.active
@@ -1,4 +1,5 @@
-from src.utils import validate_symbol
+import json, logging, queue, threading
+from src.utils import validate_symbol, JsonFormatter, BoundedQueueHandler, enable_queued_logging, disable_queued_logging
 import pytest
 
 def test_validate_symbol_ok():
@@ -7,3 +8,47 @@ def test_validate_symbol_ok():
 def test_validate_symbol_fail():
     with pytest.raises(ValueError):
         validate_symbol("BTC")
+
+class ListHandler(logging.Handler):
+    def __init__(self, gate=None):
+        super().__init__(logging.DEBUG)
+        self.setFormatter(JsonFormatter())
+        self.lines = []
+        self.threads = set()
+        self.gate = gate
+    def emit(self, record):
+        if self.gate is not None:
+            self.gate.wait()
+        self.threads.add(threading.get_ident())
+        self.lines.append(self.format(record))
+
+def test_queued_logging_formats_off_thread():
+    logger = logging.getLogger("binance_bot")
+    saved = list(logger.handlers)
+    for h in saved:
+        logger.removeHandler(h)
+    sink = ListHandler()
+    logger.addHandler(sink)
+    try:
+        enable_queued_logging()
+        logger.info("Order response: %s", {"orderId": 1, "status": "NEW"})
+        disable_queued_logging()
+    finally:
+        logger.removeHandler(sink)
+        for h in saved:
+            logger.addHandler(h)
+    assert threading.get_ident() not in sink.threads
+    assert json.loads(sink.lines[0])["message"] == "Order response: {'orderId': 1, 'status': 'NEW'}"
+
+def test_debug_records_are_shed_under_backpressure():
+    q = queue.Queue(maxsize=10)
+    handler = BoundedQueueHandler(q, debug_sample_rate=4)
+    logger = logging.getLogger("test_backpressure")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    for i in range(100):
+        logger.debug("tick %d", i)
+    assert q.qsize() == 10
+    assert handler.dropped == 90
+    logger.removeHandler(handler)
@@ -0,0 +1,138 @@
+import os, shutil, threading
+from decimal import Decimal
+import numpy as np
+import pytest
+import requests
+from src.advanced.vwap import VolumeProfile, VwapExecution, allocate_units, backtest_vwap, DAY_MS
+from src.backtest import Columns
+from src.exchange_info import ExchangeInfoCache
+from src.simulator import SimulatedFuturesClient
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "futures_exchange_info.json")
+DAY0 = 19700 * DAY_MS
+
+@pytest.fixture
+def filters(tmp_path):
+    path = str(tmp_path / "exchange_info.json")
+    shutil.copy(FIXTURE, path)
+    return ExchangeInfoCache(path=path)
+
+def _profile():
+    # Two days of 1m klines: volume 1 per minute, except 3 per minute between 00:30 and 01:00 UTC.
+    t = DAY0 + np.arange(2 * 1440) * 60000
+    minute = (t % DAY_MS) // 60000
+    return VolumeProfile.from_klines(t.tolist(), np.where((minute >= 30) & (minute < 60), 3.0, 1.0).tolist(), bin_minutes=5)
+
+def test_profile_from_klines_and_exact_allocation():
+    p = _profile()
+    assert p.volumes[0] == 5 and p.volumes[6] == 15 and p.daily == 1440 + 60
+    assert p.expected(DAY0 + 20 * 60000, DAY0 + 40 * 60000) == pytest.approx(10 + 30)
+    assert p.expected(DAY0 - 60000, DAY0 + 60000) == pytest.approx(2)       # across midnight
+    w = p.weights(DAY0 + np.array([0, 30, 60]) * 60000)
+    assert w.tolist() == pytest.approx([0.25, 0.75])
+    units = allocate_units(1001, [1, 1, 1, 3.5])
+    assert units.sum() == 1001 and np.all(np.abs(units - np.array([1, 1, 1, 3.5]) / 6.5 * 1001) < 1)
+
+def _trades(volume_per_minute):
+    # One trade every 10 s over the first hour at a drifting price.
+    t = DAY0 + np.arange(360) * 10000
+    minute = (t - DAY0) // 60000
+    qty = np.array([volume_per_minute(int(m)) / 6 for m in minute])
+    price = 100 + np.arange(360) * 0.01
+    return Columns(time=t.tolist(), price=price.tolist(), qty=qty.tolist())
+
+def _run(filters, trades, total="1.234", cap=None):
+    client = SimulatedFuturesClient(maker_fee=0, taker_fee=0)
+    client.process_trade("BTCUSDT", DAY0 - 1, 100.0)
+    ex = VwapExecution(client, "BTCUSDT", "BUY", total, _profile(), DAY0, 3600, slice_seconds=300,
+                       max_participation=cap, filters=filters)
+    return ex, backtest_vwap(client, ex, trades)
+
+def test_volume_weighted_schedule_fills_exact_total(filters):
+    ex, report = _run(filters, _trades(lambda m: 3.0 if 30 <= m < 60 else 1.0))
+    assert ex.done and ex.executed == ex.units == 1234 and report["executed"] == "1.234"
+    assert report["filled_qty"] == pytest.approx(1.234)
+    sizes = [float(r["origQty"]) for r in ex.results]
+    assert all(Decimal(str(s)) % Decimal("0.001") == 0 for s in sizes)
+    # volume is three times heavier in the second half hour, so it gets ~3/4 of the order
+    assert sum(sizes[6:]) / sum(sizes) == pytest.approx(0.75, abs=0.02)
+    assert abs(report["slippage_bps"]) < 20
+
+def test_slices_follow_streamed_volume(filters):
+    planned, _ = _run(filters, _trades(lambda m: 3.0 if 30 <= m < 60 else 1.0))
+    busy, _ = _run(filters, _trades(lambda m: 6.0 if m < 15 else (3.0 if 30 <= m < 60 else 1.0)))
+    # the first 15 minutes trade six times the forecast volume, so after slice 4 we are ahead of plan
+    ahead = lambda ex: sum(float(r["origQty"]) for r in ex.results[:4])
+    assert ahead(busy) > ahead(planned) * 1.5
+    assert busy.executed == busy.units
+
+def test_participation_cap_limits_every_child_but_the_last(filters):
+    trades = _trades(lambda m: 0.2)                     # 1 unit of volume per 5-minute slice
+    ex, report = _run(filters, trades, total="0.5", cap=0.1)
+    sizes = [float(r["origQty"]) for r in ex.results]
+    assert all(s <= 0.1 + 1e-9 for s in sizes[:-1])    # 10% of the previous slice's volume
+    assert ex.executed == ex.units and report["executed"] == "0.500"
+
+def test_handle_event_filters_symbol(filters):
+    ex = VwapExecution(SimulatedFuturesClient(), "BTCUSDT", "SELL", 0.01, _profile(), DAY0, 600, 300, filters=filters, test=True)
+    ex.handle_event({"e": "aggTrade", "s": "ETHUSDT", "T": DAY0 + 1, "q": "5"})
+    ex.handle_event({"e": "aggTrade", "s": "BTCUSDT", "T": DAY0 + 1, "q": "2"})
+    assert ex.observed == 2.0 and not ex.results and ex.next_slice == 0     # orders are left to run()
+    ex.advance(DAY0 + 1)
+    assert len(ex.results) == 1 and ex.next_slice == 1
+    with pytest.raises(ValueError):
+        VwapExecution(None, "BTCUSDT", "BUY", 0.0001, _profile(), DAY0, 600, filters=filters)
+
+def test_stream_thread_only_counts_volume_while_run_fires_each_slice_once(filters):
+    ex = VwapExecution(SimulatedFuturesClient(), "BTCUSDT", "BUY", 0.05, _profile(), DAY0, 600, 60, filters=filters, test=True)
+    now = [DAY0]
+    stop = threading.Event()
+    callers = set()
+    send = ex._send
+    ex._send = lambda k, units: callers.add(threading.get_ident()) or send(k, units)
+
+    def stream():
+        while not stop.is_set():
+            ex.handle_event({"e": "aggTrade", "s": "BTCUSDT", "T": now[0], "q": "0.01"})
+
+    def clock():
+        now[0] += 20000
+        return now[0] / 1000
+    feeder = threading.Thread(target=stream)
+    feeder.start()
+    try:
+        ex.run(poll_seconds=0, clock=clock)
+    finally:
+        stop.set()
+        feeder.join()
+    assert callers == {threading.get_ident()}
+    assert ex.executed == ex.units and ex.next_slice == len(ex.planned)
+    assert sum(float(r["quantity"]) for r in ex.results) == pytest.approx(0.05)
+
+class SlowClient(SimulatedFuturesClient):
+    """Drops the first child on a transport error; feeds a trade from another thread during later sends."""
+    def __init__(self):
+        super().__init__()
+        self.execution = None
+        self.calls = 0
+        self.stream_blocked = []
+    def futures_create_order(self, **params):
+        self.calls += 1
+        if self.calls == 1:
+            raise requests.ConnectionError("Connection aborted.")
+        feeder = threading.Thread(target=self.execution.handle_event,
+                                  args=({"e": "aggTrade", "s": "BTCUSDT", "T": DAY0 + 1, "q": "1"},))
+        feeder.start()
+        feeder.join(1.0)
+        self.stream_blocked.append(feeder.is_alive())
+        return super().futures_create_order(**params)
+
+def test_orders_are_sent_outside_the_volume_lock_and_transport_errors_roll_over(filters):
+    client = SlowClient()
+    client.process_trade("BTCUSDT", DAY0, 30000.0)
+    ex = client.execution = VwapExecution(client, "BTCUSDT", "BUY", 0.01, _profile(), DAY0, 600, 300, filters=filters)
+    ex.advance(DAY0)
+    assert ex.errors == 1 and ex.executed == 0 and not ex.done
+    ex.advance(DAY0 + 600000)
+    assert ex.done and ex.executed == ex.units and len(ex.results) == 1
+    assert client.stream_blocked == [False] and ex.observed == 1.0